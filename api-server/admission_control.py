@@ -0,0 +1,188 @@
+"""
+LLM 생성 요청 입장 제어 (Admission Control) 모듈
+- 동시 생성 수 제한 (세마포어)
+- 제한된 대기열 + 대기 타임아웃
+- 대기열 깊이/대기 시간 지표 제공
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+
+class AdmissionRejected(Exception):
+    """입장 거부 기본 예외 (HTTP 응답 코드와 Retry-After 포함)"""
+    
+    status_code = 503
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionRejected):
+    """대기열이 가득 찬 경우"""
+    
+    status_code = 429
+
+
+class QueueTimeoutError(AdmissionRejected):
+    """대기열에서 제한 시간 내에 슬롯을 얻지 못한 경우"""
+    
+    status_code = 503
+
+
+class AdmissionController:
+    """동시성 제한기 + 제한된 대기열"""
+    
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        max_queue: int = None,
+        queue_timeout: float = None
+    ):
+        """
+        입장 제어기 초기화
+        
+        Args:
+            max_concurrency: 동시에 실행할 수 있는 생성 요청 수
+            max_queue: 슬롯을 기다릴 수 있는 최대 요청 수
+            queue_timeout: 대기열 최대 대기 시간 (초)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("OLLAMA_MAX_QUEUE", "8"))
+        self.queue_timeout = queue_timeout or float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "30"))
+        
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queue_depth = 0
+        
+        # 누적 지표
+        self.admitted_total = 0
+        self.rejected_full_total = 0
+        self.rejected_timeout_total = 0
+        self.wait_seconds_sum = 0.0
+        self.wait_seconds_max = 0.0
+        
+        # 생성 소요 시간 지수이동평균 (Retry-After 추정, 저하 모드 판단용)
+        self.service_time_ewma = 10.0
+        self.last_completed_at: Optional[float] = None     # 마지막 생성 완료 시각 (monotonic)
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # 이벤트 루프가 생성된 뒤에 세마포어를 만든다
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    def estimate_retry_after(self) -> int:
+        """현재 대기열을 비우는 데 걸릴 예상 시간 (초)"""
+        backlog = self.queue_depth + self.in_flight
+        estimate = self.service_time_ewma * backlog / self.max_concurrency
+        return max(1, int(round(estimate)))
+    
+    @asynccontextmanager
+    async def slot(self):
+        """
+        생성 슬롯 획득
+        
+        Raises:
+            QueueFullError: 대기열이 가득 찬 경우
+            QueueTimeoutError: 대기 시간이 queue_timeout을 초과한 경우
+        """
+        if self.semaphore.locked() and self.queue_depth >= self.max_queue:
+            self.rejected_full_total += 1
+            raise QueueFullError(
+                "LLM 생성 대기열이 가득 찼습니다.",
+                retry_after=self.estimate_retry_after()
+            )
+        
+        self.queue_depth += 1
+        wait_start = time.monotonic()
+        acquired = False
+        try:
+            # wait_for는 타임아웃과 획득이 겹치면 슬롯을 잃을 수 있으므로 timeout 컨텍스트 사용
+            async with asyncio.timeout(self.queue_timeout):
+                acquired = await self.semaphore.acquire()
+        except BaseException as e:
+            # 획득 직후 취소/시간 초과가 겹친 경우 슬롯을 돌려줌
+            if acquired:
+                self.semaphore.release()
+            if isinstance(e, TimeoutError):
+                self.rejected_timeout_total += 1
+                raise QueueTimeoutError(
+                    "LLM 생성 대기 시간이 초과되었습니다.",
+                    retry_after=self.estimate_retry_after()
+                ) from None
+            raise
+        finally:
+            self.queue_depth -= 1
+            waited = time.monotonic() - wait_start
+            self.wait_seconds_sum += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        
+        self.admitted_total += 1
+        self.in_flight += 1
+        service_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+            elapsed = time.monotonic() - service_start
+            self.service_time_ewma = 0.8 * self.service_time_ewma + 0.2 * elapsed
+            self.last_completed_at = time.monotonic()
+    
+    async def try_acquire_extra(self) -> bool:
+        """
+        대기 없이 추가 슬롯 획득 (헤지 요청처럼 이미 슬롯을 가진 요청이 부하를 더할 때)
+        
+        대기 중인 요청이 있거나 남은 슬롯이 없으면 획득하지 않습니다.
+        획득에 성공하면 release_extra()로 반환해야 합니다.
+        
+        Returns:
+            획득 여부
+        """
+        if self.queue_depth or self.semaphore.locked():
+            return False
+        # locked()가 아니면 acquire()는 양보 없이 바로 반환
+        await self.semaphore.acquire()
+        self.in_flight += 1
+        return True
+    
+    def release_extra(self):
+        """try_acquire_extra()로 얻은 슬롯 반환"""
+        self.in_flight -= 1
+        self.semaphore.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """현재 상태 및 누적 지표"""
+        waits = self.admitted_total + self.rejected_timeout_total
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted_total": self.admitted_total,
+            "rejected_full_total": self.rejected_full_total,
+            "rejected_timeout_total": self.rejected_timeout_total,
+            "wait_seconds_sum": round(self.wait_seconds_sum, 6),
+            "wait_seconds_avg": round(self.wait_seconds_sum / waits, 6) if waits else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "service_seconds_ewma": round(self.service_time_ewma, 6),
+        }
+
+
+# 싱글톤 인스턴스
+_admission_controller = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """입장 제어기 싱글톤 인스턴스 반환"""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
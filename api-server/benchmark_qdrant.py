@@ -0,0 +1,159 @@
+"""
+Qdrant 연결 방식별 성능 측정 스크립트
+- server(별도 Qdrant 파드) / memory / local(임베디드) 모드를 같은 데이터로 비교
+- 적재 처리량, 검색 지연(p50/p95, 문서 필터 포함), 동시 검색 처리량, 프로세스 메모리 증가량 보고
+- 측정용 임시 컬렉션을 만들고 끝나면 삭제
+
+사용 예 (API 서버 Pod 안에서):
+    python benchmark_qdrant.py --modes server local --points 20000 --queries 500
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+import numpy as np
+
+from qdrant_client_wrapper import QdrantWrapper, create_qdrant_client
+
+
+def _rss_mb() -> float:
+    """현재 프로세스 RSS (MB)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    return {"p50_ms": pct(0.50), "p95_ms": pct(0.95)}
+
+
+def make_dataset(points: int, dim: int, docs: int, seed: int = 0):
+    """문서별로 모인 정규화 벡터 + 질의 벡터 생성"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(docs, dim)).astype(np.float32)
+    doc_of = rng.integers(0, docs, size=points)
+    vectors = centers[doc_of] + 0.5 * rng.normal(size=(points, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, doc_of
+
+
+def run_mode(mode: str, vectors: np.ndarray, doc_of: np.ndarray, args) -> Dict[str, Any]:
+    rss_before = _rss_mb()
+    path = tempfile.mkdtemp(prefix="qdrant-bench-") if mode == "local" else None
+    client = create_qdrant_client(args.host, args.port, mode=mode, path=path)
+    qdrant = QdrantWrapper(
+        host=args.host,
+        port=args.port,
+        collection_name=f"bench_{uuid.uuid4().hex[:8]}",
+        client=client,
+        mode=mode
+    )
+    rng = np.random.default_rng(1)
+    
+    try:
+        qdrant.ensure_collection(vectors.shape[1])
+        
+        # 적재 (문서 단위 add_documents, API 업로드와 같은 경로)
+        started = time.monotonic()
+        for doc in range(args.docs):
+            rows = np.flatnonzero(doc_of == doc)
+            if len(rows):
+                qdrant.add_documents(
+                    texts=[f"doc{doc} chunk{i}" for i in range(len(rows))],
+                    embeddings=vectors[rows],
+                    doc_id=f"doc{doc}"
+                )
+        upsert_seconds = time.monotonic() - started
+        
+        # 질의: 저장된 벡터 근처
+        picks = rng.integers(0, len(vectors), size=args.queries)
+        queries = vectors[picks] + 0.1 * rng.normal(size=(args.queries, vectors.shape[1])).astype(np.float32)
+        
+        # 워밍업
+        for query in queries[:10]:
+            qdrant.search(query, top_k=args.top_k)
+        
+        latencies = []
+        for query in queries:
+            t = time.monotonic()
+            qdrant.search(query, top_k=args.top_k)
+            latencies.append(time.monotonic() - t)
+        
+        filtered = []
+        for query, pick in zip(queries, picks):
+            t = time.monotonic()
+            qdrant.search(query, top_k=args.top_k, doc_id=f"doc{doc_of[pick]}")
+            filtered.append(time.monotonic() - t)
+        
+        # 동시 검색 처리량
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda q: qdrant.search(q, top_k=args.top_k), queries))
+        concurrent_qps = len(queries) / (time.monotonic() - started)
+        
+        return {
+            "mode": mode,
+            "upsert_pps": len(vectors) / upsert_seconds,
+            "search": _percentiles(latencies),
+            "filtered": _percentiles(filtered),
+            "concurrent_qps": concurrent_qps,
+            "rss_delta_mb": _rss_mb() - rss_before,
+        }
+    finally:
+        try:
+            client.delete_collection(qdrant.collection_name)
+        finally:
+            if path:
+                client.close()
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qdrant 연결 방식별 성능 측정")
+    parser.add_argument("--modes", nargs="+", default=["server", "local"], choices=["server", "memory", "local"])
+    parser.add_argument("--host", default=None, help="Qdrant 서버 호스트 (기본: QDRANT_HOST)")
+    parser.add_argument("--port", type=int, default=6333, help="Qdrant 서버 포트")
+    parser.add_argument("--points", type=int, default=20000, help="적재할 포인트 수")
+    parser.add_argument("--dim", type=int, default=384, help="벡터 차원")
+    parser.add_argument("--docs", type=int, default=100, help="문서 수")
+    parser.add_argument("--queries", type=int, default=300, help="질의 수")
+    parser.add_argument("--top-k", type=int, default=5, help="검색 결과 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 검색 스레드 수")
+    args = parser.parse_args()
+    args.host = args.host or os.getenv("QDRANT_HOST", "qdrant-service")
+    
+    vectors, doc_of = make_dataset(args.points, args.dim, args.docs)
+    results = []
+    for mode in args.modes:
+        print(f"[{mode}] 측정 중...")
+        results.append(run_mode(mode, vectors, doc_of, args))
+    
+    print(f"\n=== Qdrant 모드별 결과 ({args.points} 포인트, {args.dim}차원) ===")
+    print(f"{'mode':>7} {'적재 pts/s':>10} {'검색 p50':>9} {'검색 p95':>9} {'필터 p50':>9} {'필터 p95':>9} "
+          f"{'동시 qps':>9} {'RSS 증가 MB':>11}")
+    for r in results:
+        print(
+            f"{r['mode']:>7} {r['upsert_pps']:>10.0f} {r['search']['p50_ms']:>9.2f} {r['search']['p95_ms']:>9.2f} "
+            f"{r['filtered']['p50_ms']:>9.2f} {r['filtered']['p95_ms']:>9.2f} {r['concurrent_qps']:>9.0f} "
+            f"{r['rss_delta_mb']:>11.0f}"
+        )
+    print("\nserver 모드의 RSS 증가량에는 Qdrant 파드 메모리가 포함되지 않습니다 (kubectl top pod로 확인).")
+    print("임베디드 모드는 전수 비교(HNSW 없음)이므로 포인트 수가 많아질수록 검색 지연이 선형으로 증가합니다.")
+
+
+if __name__ == "__main__":
+    main()
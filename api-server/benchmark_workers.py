@@ -0,0 +1,170 @@
+"""
+워커 수별 메모리/처리량 측정 스크립트
+- 워커 수마다 gunicorn(preload)을 띄워 readiness를 기다린 뒤 부하 측정
+- 프로세스별 RSS와 PSS(공유 페이지를 나눠 계산한 실사용량) 보고
+- 부하는 LLM을 호출하지 않는 질의(min_score=1.0 → 임베딩 + 검색 후 not_found)로 생성
+
+사용 예 (Qdrant 접근 가능한 환경에서):
+    python benchmark_workers.py --workers 1 2 3 4 --concurrency 16 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List
+
+import httpx
+
+
+QUERIES = [
+    "Kubernetes Pod이란 무엇인가요?",
+    "벡터 데이터베이스는 어떻게 검색하나요?",
+    "배포 절차를 설명해 주세요",
+    "리소스 제한은 어떻게 설정하나요?",
+]
+
+
+def _read_kb(path: str, field: str) -> int:
+    """/proc 상태 파일에서 kB 값 읽기"""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_report(master_pid: int) -> Dict[str, Any]:
+    """마스터/워커 프로세스별 RSS, PSS (MB)"""
+    processes = {"master": master_pid}
+    for i, pid in enumerate(_children(master_pid)):
+        processes[f"worker{i}"] = pid
+    
+    report = {}
+    for name, pid in processes.items():
+        report[name] = {
+            "rss_mb": _read_kb(f"/proc/{pid}/status", "VmRSS") / 1024,
+            "pss_mb": _read_kb(f"/proc/{pid}/smaps_rollup", "Pss") / 1024,
+        }
+    return report
+
+
+async def wait_ready(base_url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(f"{base_url}/health/ready")
+                if response.status_code == 200:
+                    return True
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(1.0)
+    return False
+
+
+async def load_test(base_url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """duration 동안 concurrency개 클라이언트로 /query 반복 호출"""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    
+    async def client_loop(index: int):
+        nonlocal errors
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            i = index
+            while time.monotonic() < deadline:
+                body = {"query": f"{QUERIES[i % len(QUERIES)]} #{i}", "min_score": 1.0}
+                started = time.monotonic()
+                try:
+                    response = await client.post(f"{base_url}/query", json=body)
+                    if response.status_code == 200:
+                        latencies.append(time.monotonic() - started)
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                i += concurrency
+    
+    started = time.monotonic()
+    await asyncio.gather(*[client_loop(i) for i in range(concurrency)])
+    elapsed = time.monotonic() - started
+    
+    latencies.sort()
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+    }
+
+
+def run_one(workers: int, args) -> Dict[str, Any]:
+    env = dict(os.environ, API_WORKERS=str(workers), API_PORT=str(args.port))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if not asyncio.run(wait_ready(base_url, args.startup_timeout)):
+            raise RuntimeError(f"워커 {workers}개: readiness 대기 시간 초과")
+        # 요청 처리 전 메모리 (모델 공유 상태)
+        idle = memory_report(process.pid)
+        result = asyncio.run(load_test(base_url, args.concurrency, args.duration))
+        loaded = memory_report(process.pid)
+        return {"workers": workers, "idle": idle, "loaded": loaded, **result}
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 수별 RSS/처리량 측정")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="측정할 워커 수 목록")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 클라이언트 수")
+    parser.add_argument("--duration", type=float, default=20.0, help="워커 수별 부하 시간 (초)")
+    parser.add_argument("--port", type=int, default=18000, help="측정용 서버 포트")
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="readiness 대기 시간 (초)")
+    args = parser.parse_args()
+    
+    results = [run_one(workers, args) for workers in args.workers]
+    
+    print("\n=== 워커 수별 결과 ===")
+    print(f"{'workers':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6} "
+          f"{'RSS 합 MB':>10} {'PSS 합 MB':>10} {'워커당 PSS MB':>13}")
+    for r in results:
+        procs = r["loaded"].values()
+        worker_pss = [v["pss_mb"] for k, v in r["loaded"].items() if k != "master"]
+        print(
+            f"{r['workers']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['errors']:>6} "
+            f"{sum(v['rss_mb'] for v in procs):>10.0f} {sum(v['pss_mb'] for v in procs):>10.0f} "
+            f"{(sum(worker_pss) / max(1, len(worker_pss))):>13.0f}"
+        )
+    print("\nRSS는 공유 페이지를 프로세스마다 중복 계산하므로, 실제 파드 메모리는 PSS 합계를 기준으로 보세요.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+PDF 일괄 적재 CLI
+- 추출/청킹 (프로세스 풀) → 임베딩 (문서 간 배치) → 저장 (병렬 upsert)
+- 단계 사이를 제한된 큐로 연결하여 세 단계가 동시에 동작
+- 체크포인트 매니페스트로 중단 후 재개
+- 처리량 리포트 (pages/s, chunks/s)
+
+사용 예:
+    python bulk_ingest.py /data/pdfs --manifest ingest_manifest.jsonl --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+from pdf_processor import extract_pages_from_pdf, chunk_pages_for_model
+
+
+# 종료 신호
+_DONE = object()
+
+# 워커 프로세스 전역 (토크나이저만 로드)
+_worker_model = None
+
+
+def _init_worker(model_name: str, max_tokens: int):
+    """추출 워커 초기화 - 임베딩 모델 대신 토크나이저만 로드"""
+    global _worker_model
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    from transformers import AutoTokenizer
+    _worker_model = SimpleNamespace(
+        tokenizer=AutoTokenizer.from_pretrained(model_name),
+        max_tokens=max_tokens
+    )
+
+
+def _extract_and_chunk(path: str) -> Dict[str, Any]:
+    """PDF 하나를 읽어 페이지 추출 + 청킹 (워커 프로세스에서 실행)"""
+    started = time.monotonic()
+    data = Path(path).read_bytes()
+    pages = extract_pages_from_pdf(data)
+    chunks = chunk_pages_for_model(pages, _worker_model)
+    return {
+        "path": path,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "pages": len(pages),
+        "texts": [chunk.pop("text") for chunk in chunks],
+        "metadata": [{"filename": Path(path).name, **chunk} for chunk in chunks],
+        "seconds": time.monotonic() - started,
+    }
+
+
+def _file_key(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class Manifest:
+    """체크포인트 매니페스트 (JSON Lines, 파일 단위로 추가 기록)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry.get("status") == "done":
+                            self.done[entry["path"]] = entry
+    
+    def is_done(self, key: Dict[str, Any]) -> bool:
+        entry = self.done.get(key["path"])
+        return bool(entry) and entry["size"] == key["size"] and entry["mtime_ns"] == key["mtime_ns"]
+    
+    def record(self, entry: Dict[str, Any]):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if entry.get("status") == "done":
+                self.done[entry["path"]] = entry
+
+
+class StageStats:
+    """단계별 처리량/소요 시간 집계"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = 0
+        self.failed = 0
+        self.pages = 0
+        self.chunks = 0
+        self.busy = {"extract": 0.0, "embed": 0.0, "upsert": 0.0}
+    
+    def add_busy(self, stage: str, seconds: float):
+        with self._lock:
+            self.busy[stage] += seconds
+    
+    def add_failure(self):
+        with self._lock:
+            self.failed += 1
+    
+    def report(self, elapsed: float) -> str:
+        elapsed = max(elapsed, 1e-9)
+        lines = [
+            "=== 적재 결과 ===",
+            f"파일: {self.files} 완료, {self.failed} 실패",
+            f"페이지: {self.pages} ({self.pages / elapsed:.1f} pages/s)",
+            f"청크: {self.chunks} ({self.chunks / elapsed:.1f} chunks/s)",
+            f"경과 시간: {elapsed:.1f}s",
+        ]
+        for stage, busy in self.busy.items():
+            lines.append(f"  {stage:<8} 누적 작업 시간 {busy:.1f}s")
+        return "\n".join(lines)
+
+
+def _document_id(sha256: str) -> str:
+    """파일 내용 기준 결정적 문서 ID (재실행 시 같은 포인트를 덮어씀)"""
+    from qdrant_client_wrapper import POINT_ID_NAMESPACE
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"file:{sha256}"))
+
+
+def run(
+    paths: List[Path],
+    manifest: Manifest,
+    workers: int,
+    embed_batch: int,
+    upsert_workers: int,
+    upsert_batch: int,
+    queue_size: int,
+    tenant: Optional[str] = None
+) -> StageStats:
+    """3단계 파이프라인 실행"""
+    from embedding_model import get_embedding_model
+    from qdrant_client_wrapper import get_qdrant_client, chunk_point_ids
+    
+    embedding_model = get_embedding_model()
+    qdrant = get_qdrant_client(tenant)
+    qdrant.ensure_collection(embedding_model.dimension)
+    
+    stats = StageStats()
+    extracted: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    embedded: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    
+    # ----- 1단계: 추출 + 청킹 (프로세스 풀, spawn으로 모델 메모리 미상속) -----
+    def extract_stage():
+        context = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(embedding_model.model_name, embedding_model.max_tokens)
+            ) as pool:
+                pending = []
+                for path in paths:
+                    pending.append((path, pool.submit(_extract_and_chunk, str(path))))
+                    # 제출량 제한: 워커 수의 2배까지만 앞서 나감
+                    while len(pending) >= workers * 2:
+                        _drain_one(pending)
+                while pending:
+                    _drain_one(pending)
+        finally:
+            # 오류가 나도 다음 단계가 멈추지 않도록 종료 신호 전달
+            extracted.put(_DONE)
+    
+    def _drain_one(pending):
+        path, future = pending.pop(0)
+        try:
+            doc = future.result()
+        except Exception as e:
+            stats.add_failure()
+            manifest.record({**_file_key(path), "status": "failed", "error": str(e)})
+            print(f"[실패] {path}: {e}")
+            return
+        stats.add_busy("extract", doc.pop("seconds"))
+        doc["key"] = _file_key(path)
+        extracted.put(doc)
+    
+    # ----- 2단계: 임베딩 (여러 문서의 청크를 모아 배치) -----
+    def embed_stage():
+        batch_docs = []
+        batch_size = 0
+        finished = False
+        try:
+            while not finished:
+                try:
+                    item = extracted.get(timeout=0.5 if batch_docs else None)
+                except queue.Empty:
+                    item = None
+                if item is _DONE:
+                    finished = True
+                elif item is not None:
+                    if item["texts"]:
+                        batch_docs.append(item)
+                        batch_size += len(item["texts"])
+                    else:
+                        embedded.put(item)
+                
+                # 배치가 찼거나, 입력이 잠시 끊겼거나, 끝났으면 임베딩 실행
+                if batch_docs and (batch_size >= embed_batch or item is None or finished):
+                    started = time.monotonic()
+                    texts = [text for doc in batch_docs for text in doc["texts"]]
+                    try:
+                        vectors = embedding_model.embed(texts)
+                    except Exception as e:
+                        # 배치의 문서만 실패 처리하고 다음 입력을 계속 소비
+                        for doc in batch_docs:
+                            stats.add_failure()
+                            manifest.record({**doc["key"], "status": "failed", "error": str(e)})
+                            print(f"[실패] {doc['key']['path']}: 임베딩 오류 {e}")
+                    else:
+                        stats.add_busy("embed", time.monotonic() - started)
+                        
+                        offset = 0
+                        for doc in batch_docs:
+                            doc["embeddings"] = vectors[offset:offset + len(doc["texts"])]
+                            offset += len(doc["texts"])
+                            embedded.put(doc)
+                    batch_docs, batch_size = [], 0
+        finally:
+            # 예기치 않은 오류로 빠져나와도 추출 단계가 put에서 멈추지 않도록 종료 신호까지 비움
+            while not finished:
+                finished = extracted.get() is _DONE
+            embedded.put(_DONE)
+    
+    # ----- 3단계: 병렬 upsert -----
+    def upsert_doc(doc):
+        started = time.monotonic()
+        doc_id = _document_id(doc["sha256"])
+        texts, metadata = doc["texts"], doc["metadata"]
+        ids = chunk_point_ids(doc_id, texts)
+        for i, meta in enumerate(metadata):
+            meta["chunk_index"] = i
+        for start in range(0, len(texts), upsert_batch):
+            end = start + upsert_batch
+            qdrant.add_documents(
+                texts=texts[start:end],
+                embeddings=doc["embeddings"][start:end],
+                metadata=metadata[start:end],
+                doc_id=doc_id,
+                point_ids=ids[start:end]
+            )
+        stats.add_busy("upsert", time.monotonic() - started)
+        
+        with stats._lock:
+            stats.files += 1
+            stats.pages += doc["pages"]
+            stats.chunks += len(texts)
+        manifest.record({
+            **doc["key"],
+            "status": "done",
+            "sha256": doc["sha256"],
+            "doc_id": doc_id,
+            "pages": doc["pages"],
+            "chunks": len(texts),
+        })
+        print(f"[완료] {doc['key']['path']} → {doc_id} ({len(texts)} 청크)")
+    
+    def upsert_stage():
+        slots = threading.Semaphore(upsert_workers * 2)
+        with ThreadPoolExecutor(max_workers=upsert_workers) as pool:
+            while True:
+                doc = embedded.get()
+                if doc is _DONE:
+                    break
+                slots.acquire()
+                future = pool.submit(upsert_doc, doc)
+                future.add_done_callback(lambda f: (slots.release(), _log_error(f)))
+    
+    def _log_error(future):
+        error = future.exception()
+        if error is not None:
+            stats.add_failure()
+            print(f"[실패] upsert: {error}")
+    
+    threads = [
+        threading.Thread(target=extract_stage, name="extract"),
+        threading.Thread(target=embed_stage, name="embed"),
+        threading.Thread(target=upsert_stage, name="upsert"),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="PDF 일괄 적재")
+    parser.add_argument("inputs", nargs="+", help="PDF 파일 또는 디렉토리")
+    parser.add_argument("--manifest", default="ingest_manifest.jsonl", help="체크포인트 매니페스트 경로")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="추출 프로세스 수")
+    parser.add_argument("--embed-batch", type=int, default=256, help="임베딩 배치 크기 (청크 수)")
+    parser.add_argument("--upsert-workers", type=int, default=4, help="병렬 upsert 스레드 수")
+    parser.add_argument("--upsert-batch", type=int, default=256, help="upsert 요청당 포인트 수")
+    parser.add_argument("--queue-size", type=int, default=16, help="단계 간 큐 크기 (문서 수)")
+    parser.add_argument("--tenant", default=None, help="적재할 테넌트 ID (기본: DEFAULT_TENANT)")
+    args = parser.parse_args(argv)
+    
+    paths = []
+    for entry in args.inputs:
+        entry = Path(entry)
+        if entry.is_dir():
+            paths.extend(sorted(p for p in entry.rglob("*") if p.suffix.lower() == ".pdf"))
+        else:
+            paths.append(entry)
+    
+    manifest = Manifest(args.manifest)
+    todo = [p for p in paths if not manifest.is_done(_file_key(p))]
+    print(f"대상 {len(paths)}개 중 {len(paths) - len(todo)}개는 이미 적재됨, {len(todo)}개 처리")
+    if not todo:
+        return
+    
+    started = time.monotonic()
+    stats = run(
+        todo,
+        manifest,
+        workers=args.workers,
+        embed_batch=args.embed_batch,
+        upsert_workers=args.upsert_workers,
+        upsert_batch=args.upsert_batch,
+        queue_size=args.queue_size,
+        tenant=args.tenant
+    )
+    print(stats.report(time.monotonic() - started))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+검색 전용 저하 모드 (Degraded Mode) 모듈
+- Ollama 장애/과부하 시 LLM 호출 없이 검색 결과로 즉시 응답
+- 판단 기준: Ollama 상태 점검 실패, LLM 대기열 깊이, 최근 생성 소요 시간
+- 추출형 답변: 질문 단어가 포함된 문장을 골라 강조 표시 (로컬 처리)
+"""
+
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from admission_control import get_admission_controller
+from health_monitor import get_health_monitor
+
+
+QUERY_MODES = ("auto", "llm", "retrieval")
+
+# 요청에서 mode를 지정하지 않았을 때의 기본값
+QUERY_MODE_DEFAULT = os.getenv("QUERY_MODE_DEFAULT", "auto")
+
+# auto 모드에서 LLM 생성을 기다리는 최대 시간 (초과 시 추출형 답변으로 전환, 0이면 제한 없음)
+DEGRADE_GENERATE_TIMEOUT = float(os.getenv("DEGRADE_GENERATE_TIMEOUT", "60"))
+
+# 추출형 답변에 사용할 최대 문장 수
+DEGRADED_MAX_SENTENCES = int(os.getenv("DEGRADED_MAX_SENTENCES", "3"))
+
+DEGRADED_NOTICE = "※ 현재 답변 생성 모델을 사용할 수 없어, 검색된 문서에서 질문과 관련된 문장을 발췌했습니다."
+EXTRACTIVE_NOTICE = "※ 검색된 문서에서 질문과 관련된 문장을 발췌했습니다."
+
+# 질문 단어 끝에서 떼어낼 조사 (긴 것부터 검사)
+_PARTICLES = sorted(
+    ["이란", "란", "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "으로", "로", "와", "과", "도", "만", "이나", "나"],
+    key=len,
+    reverse=True
+)
+
+# 강조 대상에서 제외할 의문사/기능어
+_STOPWORDS = {
+    "무엇", "무엇인가요", "무엇인지", "뭔가요", "어떻게", "어떤", "왜", "언제", "어디", "누가", "있나요", "하나요",
+    "설명", "설명해", "알려", "주세요", "what", "how", "why", "when", "where", "who", "which", "the", "is",
+    "are", "does", "do", "can", "and", "for", "with", "about",
+}
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+
+class DegradationPolicy:
+    """LLM 사용 여부 판단기"""
+    
+    def __init__(
+        self,
+        max_queue_depth: int = None,
+        max_latency: float = None,
+        latency_window: float = None,
+        on_unhealthy: bool = None
+    ):
+        """
+        판단기 초기화
+        
+        Args:
+            max_queue_depth: 이 값 이상 대기 중이면 저하 모드 (0이면 사용 안 함)
+            max_latency: 최근 생성 소요 시간(EWMA)이 이 값(초) 이상이면 저하 모드 (0이면 사용 안 함)
+            latency_window: 마지막 생성 완료 후 이 시간(초)이 지나면 소요 시간 기준을 적용하지 않음
+            on_unhealthy: Ollama 상태 점검 실패 시 저하 모드 여부
+        """
+        self.max_queue_depth = max_queue_depth if max_queue_depth is not None else int(os.getenv("DEGRADE_QUEUE_DEPTH", "6"))
+        self.max_latency = max_latency if max_latency is not None else float(os.getenv("DEGRADE_LATENCY_SECONDS", "45"))
+        self.latency_window = latency_window or float(os.getenv("DEGRADE_LATENCY_WINDOW", "60"))
+        if on_unhealthy is None:
+            on_unhealthy = os.getenv("DEGRADE_ON_UNHEALTHY", "true").lower() == "true"
+        self.on_unhealthy = on_unhealthy
+        
+        # 사유별 저하 응답 수
+        self.degraded_total: Dict[str, int] = {}
+    
+    def reason(self) -> Optional[str]:
+        """
+        현재 LLM을 건너뛰어야 하는 사유
+        
+        Returns:
+            사유 ("ollama_unhealthy", "queue_depth", "latency") 또는 None (LLM 사용)
+        """
+        if self.on_unhealthy:
+            monitor = get_health_monitor()
+            ollama = monitor.snapshot()["ollama"]
+            # 점검 루프가 동작하지 않는 환경(CLI 등)에서는 판단하지 않음
+            if monitor.is_alive() and ollama["checked_at"] is not None and not ollama["ok"]:
+                return "ollama_unhealthy"
+        
+        admission = get_admission_controller()
+        if self.max_queue_depth and admission.queue_depth >= self.max_queue_depth:
+            return "queue_depth"
+        
+        # 최근 완료된 생성이 없으면 소요 시간 기준을 풀어 다음 요청이 LLM으로 다시 측정
+        if self.max_latency and admission.last_completed_at is not None:
+            recent = time.monotonic() - admission.last_completed_at < self.latency_window
+            if recent and admission.service_time_ewma >= self.max_latency:
+                return "latency"
+        return None
+    
+    def record(self, reason: str):
+        self.degraded_total[reason] = self.degraded_total.get(reason, 0) + 1
+    
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "max_queue_depth": self.max_queue_depth,
+            "max_latency_seconds": self.max_latency,
+        }
+        for reason, count in sorted(self.degraded_total.items()):
+            stats[f"{reason}_total"] = count
+        return stats
+
+
+def _query_terms(query: str) -> List[str]:
+    """질문에서 강조할 단어 추출 (조사 제거, 의문사 제외)"""
+    terms = []
+    for token in re.findall(r"\w+", query.lower()):
+        for particle in _PARTICLES:
+            if token.endswith(particle) and len(token) > len(particle) + 1:
+                token = token[:-len(particle)]
+                break
+        if len(token) >= 2 and token not in _STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms
+
+
+def _source_label(result: Dict[str, Any]) -> str:
+    metadata = result.get("metadata", {})
+    label = metadata.get("filename") or "문서"
+    if metadata.get("page_start") is not None:
+        label += f" p.{metadata['page_start']}"
+    return label
+
+
+def extractive_answer(
+    query: str,
+    results: List[Dict[str, Any]],
+    max_sentences: int = None,
+    notice: str = DEGRADED_NOTICE
+) -> str:
+    """
+    검색 결과에서 질문 관련 문장을 골라 강조한 답변 생성 (LLM 미사용)
+    
+    Args:
+        query: 사용자 질문
+        results: 점수 순 검색 결과 (text, metadata 포함)
+        max_sentences: 최대 문장 수 (기본: DEGRADED_MAX_SENTENCES)
+        notice: 답변 앞에 붙일 안내 문구
+    
+    Returns:
+        안내 문구 + 출처가 붙은 발췌 문장 목록 (질문 단어는 **굵게** 표시)
+    """
+    max_sentences = max_sentences or DEGRADED_MAX_SENTENCES
+    terms = _query_terms(query)
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE) if terms else None
+    
+    # (일치 단어 수, -검색 순위, -문장 위치) 기준으로 선택
+    candidates: List[Tuple[Tuple[int, int, int], str, str]] = []
+    for rank, result in enumerate(results):
+        sentences = [s.strip() for s in _SENTENCE_SPLIT.split(result.get("text", "")) if s.strip()]
+        for position, sentence in enumerate(sentences):
+            lowered = sentence.lower()
+            matched = sum(1 for term in terms if term in lowered)
+            candidates.append(((matched, -rank, -position), sentence, _source_label(result)))
+    
+    if not candidates:
+        return notice
+    
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    # 겹치는 청크/문서에서 같은 문장이 반복되지 않도록 정규화한 문장 기준으로 중복 제거
+    seen = set()
+    unique = []
+    for candidate in candidates:
+        normalized = " ".join(candidate[1].split()).casefold()
+        if normalized not in seen:
+            seen.add(normalized)
+            unique.append(candidate)
+    selected = [c for c in unique if c[0][0] > 0][:max_sentences] or unique[:1]
+    # 원문 흐름대로 보이도록 검색 순위/문장 위치 순으로 정렬
+    selected.sort(key=lambda c: (-c[0][1], -c[0][2]))
+    
+    lines = [notice, ""]
+    for _, sentence, label in selected:
+        if pattern is not None:
+            sentence = pattern.sub(lambda m: f"**{m.group(0)}**", sentence)
+        lines.append(f"- {sentence} ({label})")
+    return "\n".join(lines)
+
+
+# 싱글톤 인스턴스
+_degradation_policy = None
+
+
+def get_degradation_policy() -> DegradationPolicy:
+    """저하 모드 판단기 싱글톤 인스턴스 반환"""
+    global _degradation_policy
+    if _degradation_policy is None:
+        _degradation_policy = DegradationPolicy()
+    return _degradation_policy
@@ -2,27 +2,50 @@
 로컬 임베딩 모델 모듈
 - sentence-transformers 기반 다국어 임베딩
 - 경량 모델 사용 (약 420MB)
+- 임베딩은 연속 float32 numpy 배열로 반환 (파이썬 float 리스트로 변환하지 않음)
+- EMBEDDING_SERVICE_URL이 설정되면 독립 임베딩 서비스를 호출하는 원격 클라이언트 사용
 """
 
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Optional
 import numpy as np
+import os
+import threading
+
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+
+# 독립 임베딩 서비스 주소 (비어 있으면 프로세스 안에서 모델 로드)
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "")
 
 
 class LocalEmbedding:
     """로컬 임베딩 모델 래퍼"""
     
-    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
         """
         임베딩 모델 초기화
         
         Args:
             model_name: 사용할 모델명 (기본: 다국어 MiniLM)
         """
+        # 원격 모드에서는 torch를 import하지 않도록 여기서 import
+        from sentence_transformers import SentenceTransformer
+        
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
     
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    @property
+    def tokenizer(self):
+        """모델 토크나이저 (청킹 시 토큰 수 계산용)"""
+        return self.model.tokenizer
+    
+    @property
+    def max_tokens(self) -> int:
+        """임베딩에 반영되는 최대 토큰 수 (특수 토큰 [CLS]/[SEP] 제외)"""
+        return self.model.max_seq_length - 2
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
         """
         텍스트 리스트를 임베딩 벡터로 변환
         
@@ -30,12 +53,12 @@ class LocalEmbedding:
             texts: 임베딩할 텍스트 리스트
         
         Returns:
-            임베딩 벡터 리스트
+            (len(texts), dimension) 형태의 연속 float32 배열
         """
         embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        return np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(texts), self.dimension)
     
-    def embed_single(self, text: str) -> List[float]:
+    def embed_single(self, text: str) -> np.ndarray:
         """
         단일 텍스트를 임베딩 벡터로 변환
         
@@ -43,19 +66,113 @@ class LocalEmbedding:
             text: 임베딩할 텍스트
         
         Returns:
-            임베딩 벡터
+            (dimension,) 형태의 float32 배열
         """
         embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        return np.ascontiguousarray(embedding, dtype=np.float32)
+
+
+class RemoteEmbedding:
+    """독립 임베딩 서비스 클라이언트 (LocalEmbedding과 같은 인터페이스)"""
+    
+    def __init__(self, base_url: str, timeout: float = None):
+        """
+        원격 임베딩 클라이언트 초기화
+        
+        Args:
+            base_url: 임베딩 서비스 주소 (예: http://embedding-service:8001)
+            timeout: 요청 제한 시간 (초)
+        """
+        import httpx
+        
+        self.base_url = base_url.rstrip("/")
+        self.client = httpx.Client(
+            timeout=timeout or float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "30"))
+        )
+        self._info: Optional[dict] = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+    
+    @property
+    def info(self) -> dict:
+        """서비스 모델 정보 (최초 1회 조회)"""
+        if self._info is None:
+            response = self.client.get(f"{self.base_url}/info")
+            response.raise_for_status()
+            self._info = response.json()
+        return self._info
+    
+    @property
+    def model_name(self) -> str:
+        return self.info["model_name"]
+    
+    @property
+    def dimension(self) -> int:
+        return self.info["dimension"]
+    
+    @property
+    def max_tokens(self) -> int:
+        return self.info["max_tokens"]
+    
+    @property
+    def tokenizer(self):
+        """청킹용 토크나이저 (모델 가중치 없이 토크나이저만 로드)"""
+        with self._lock:
+            if self._tokenizer is None:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+    
+    def ping(self):
+        """서비스 상태 확인 (실패 시 예외)"""
+        response = self.client.get(f"{self.base_url}/health")
+        response.raise_for_status()
+        if response.json().get("status") != "ok":
+            raise RuntimeError("임베딩 서비스가 아직 준비되지 않았습니다.")
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        텍스트 리스트를 임베딩 벡터로 변환
+        
+        Args:
+            texts: 임베딩할 텍스트 리스트
+        
+        Returns:
+            (len(texts), dimension) 형태의 연속 float32 배열
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        response = self.client.post(f"{self.base_url}/embed", json={"texts": list(texts)})
+        response.raise_for_status()
+        
+        rows, cols = (int(v) for v in response.headers["X-Embedding-Shape"].split(","))
+        vectors = np.frombuffer(response.content, dtype="<f4").reshape(rows, cols)
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+    
+    def embed_single(self, text: str) -> np.ndarray:
+        """
+        단일 텍스트를 임베딩 벡터로 변환
+        
+        Args:
+            text: 임베딩할 텍스트
+        
+        Returns:
+            (dimension,) 형태의 float32 배열
+        """
+        return self.embed([text])[0]
 
 
 # 싱글톤 인스턴스
 _embedding_model = None
 
 
-def get_embedding_model() -> LocalEmbedding:
-    """임베딩 모델 싱글톤 인스턴스 반환"""
+def get_embedding_model():
+    """임베딩 모델 싱글톤 인스턴스 반환 (EMBEDDING_SERVICE_URL이 있으면 원격 클라이언트)"""
     global _embedding_model
     if _embedding_model is None:
-        _embedding_model = LocalEmbedding()
+        if EMBEDDING_SERVICE_URL:
+            _embedding_model = RemoteEmbedding(EMBEDDING_SERVICE_URL)
+        else:
+            _embedding_model = LocalEmbedding()
     return _embedding_model
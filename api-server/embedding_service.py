@@ -0,0 +1,200 @@
+"""
+독립 임베딩 서비스 (별도 Deployment로 실행)
+- 여러 API 파드의 임베딩 요청을 하나의 모델로 처리
+- 서버 측 동적 배칭: 짧은 시간 동안 들어온 요청을 모아 한 번에 인코딩
+- 결과는 float32 바이너리로 전송 (JSON 숫자 직렬화 회피)
+
+실행:
+    uvicorn embedding_service:app --host 0.0.0.0 --port 8001
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from embedding_model import LocalEmbedding, EMBEDDING_MODEL_NAME
+
+
+# 응답 바이트 순서/타입 (RemoteEmbedding과 동일해야 함)
+WIRE_DTYPE = np.dtype("<f4")
+
+
+class DynamicBatcher:
+    """요청을 모아 한 번에 인코딩하는 배처"""
+    
+    def __init__(self, model: LocalEmbedding, max_batch: int = None, max_wait_ms: float = None):
+        """
+        배처 초기화
+        
+        Args:
+            model: 로컬 임베딩 모델
+            max_batch: 한 번에 인코딩할 최대 텍스트 수
+            max_wait_ms: 첫 요청 도착 후 배치를 채우기 위해 기다리는 최대 시간 (밀리초)
+        """
+        self.model = model
+        self.max_batch = max_batch or int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+        self.max_wait = (max_wait_ms or float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))) / 1000
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        # 누적 지표
+        self.batches_total = 0
+        self.texts_total = 0
+        self.requests_total = 0
+        self.encode_seconds_sum = 0.0
+    
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+    
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """텍스트 리스트 임베딩 (다른 요청과 함께 배치 처리)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        """첫 요청 이후 max_wait 동안, 또는 max_batch가 찰 때까지 요청 수집"""
+        items = [await self._queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+    
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            # 대기 중 취소된 요청은 제외
+            items = [(texts, future) for texts, future in items if not future.cancelled()]
+            if not items:
+                continue
+            
+            texts = [text for batch, _ in items for text in batch]
+            started = time.monotonic()
+            try:
+                vectors = await asyncio.to_thread(self.model.embed, texts)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            self.encode_seconds_sum += time.monotonic() - started
+            self.batches_total += 1
+            self.texts_total += len(texts)
+            self.requests_total += len(items)
+            
+            offset = 0
+            for batch, future in items:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(batch)])
+                offset += len(batch)
+    
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "texts_total": self.texts_total,
+            "encode_seconds_sum": round(self.encode_seconds_sum, 6),
+        }
+
+
+class EmbedRequest(BaseModel):
+    """임베딩 요청"""
+    texts: List[str]
+
+
+# 모델/배처는 시작 시 한 번만 생성
+_model: Optional[LocalEmbedding] = None
+_batcher: Optional[DynamicBatcher] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _model, _batcher
+    _model = await asyncio.to_thread(LocalEmbedding, EMBEDDING_MODEL_NAME)
+    _batcher = DynamicBatcher(_model)
+    _batcher.start()
+    yield
+    await _batcher.stop()
+
+
+app = FastAPI(title="K8S RAG Embedding Service", version="1.0.0", lifespan=lifespan)
+
+
+@app.get("/info")
+async def info():
+    """모델 정보 (RemoteEmbedding이 차원/토큰 수 확인에 사용)"""
+    return {
+        "model_name": _model.model_name,
+        "dimension": _model.dimension,
+        "max_tokens": _model.max_tokens,
+        "dtype": WIRE_DTYPE.str,
+    }
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok" if _model is not None else "loading"}
+
+
+@app.post("/embed")
+async def embed(request: EmbedRequest):
+    """
+    배치 임베딩
+    
+    Returns:
+        (len(texts), dimension) float32 little-endian 바이트
+        (X-Embedding-Shape 헤더에 "행,열")
+    """
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="texts가 비어 있습니다.")
+    
+    vectors = await _batcher.embed(request.texts)
+    body = np.ascontiguousarray(vectors, dtype=WIRE_DTYPE).tobytes()
+    return Response(
+        content=body,
+        media_type="application/octet-stream",
+        headers={"X-Embedding-Shape": f"{len(request.texts)},{_model.dimension}"}
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """동적 배칭 지표 (Prometheus 텍스트 형식)"""
+    lines = []
+    for name, value in _batcher.stats().items():
+        metric = f"rag_embedding_{name}"
+        kind = "counter" if name.endswith("_total") or name.endswith("_sum") else "gauge"
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,63 @@
+"""
+Gunicorn 설정 (다중 워커 모드)
+- 마스터 프로세스에서 임베딩 모델을 먼저 로드한 뒤 fork
+- 워커들은 모델 가중치 메모리를 copy-on-write로 공유 (워커마다 ~420MB 재로드 없음)
+- 워커별 torch 스레드 수 제한 (코어 과다 구독 방지)
+
+사용 예:
+    API_WORKERS=3 gunicorn -c gunicorn.conf.py main:app
+"""
+
+import gc
+import os
+
+
+bind = f"0.0.0.0:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv("API_WORKERS", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# 앱 모듈을 마스터에서 import (fork 전에 로드된 메모리를 워커가 공유)
+preload_app = True
+
+# 첫 요청 전에 모델 로드가 끝나므로 기본값이면 충분, 긴 생성 요청만 고려
+timeout = int(os.getenv("API_WORKER_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    """fork 전에 마스터에서 임베딩 모델 로드 및 워밍업"""
+    from embedding_model import EMBEDDING_SERVICE_URL, get_embedding_model
+    from qdrant_client_wrapper import QDRANT_MODE
+    
+    if QDRANT_MODE != "server" and workers > 1:
+        # 임베디드 Qdrant는 워커마다 별도 인스턴스가 되어 데이터가 공유되지 않음 (local은 파일 잠금으로 실패)
+        raise RuntimeError(f"QDRANT_MODE={QDRANT_MODE}에서는 API_WORKERS=1만 지원합니다.")
+    
+    if EMBEDDING_SERVICE_URL:
+        # 원격 임베딩 모드에서는 공유할 모델이 없음
+        return
+    
+    import torch
+    
+    # 마스터에서 OpenMP 스레드 풀을 만들지 않아야 fork 후 워커가 멈추지 않음
+    torch.set_num_threads(1)
+    model = get_embedding_model()
+    model.embed(["warmup"])
+    
+    # 이후 GC가 공유 객체의 헤더를 건드려 페이지가 복사되지 않도록 고정
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"임베딩 모델 사전 로드 완료: {model.model_name} (워커 {workers}개와 공유)")
+
+
+def post_fork(server, worker):
+    """워커별 추론 스레드 수 설정"""
+    from embedding_model import EMBEDDING_SERVICE_URL
+    
+    if EMBEDDING_SERVICE_URL:
+        return
+    
+    import torch
+    
+    torch.set_num_threads(int(os.getenv("EMBEDDING_THREADS_PER_WORKER", "1")))
@@ -0,0 +1,174 @@
+"""
+의존 서비스 상태 백그라운드 점검 모듈
+- 주기적으로 Qdrant / Ollama / 임베딩 모델 상태를 확인하여 캐시
+- /health 요청은 캐시된 결과로 즉시 응답 (실제 트래픽과 경쟁하지 않음)
+- liveness / readiness 판정 및 즉시 점검(deep) 지원
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Any, Optional, List
+
+from embedding_model import get_embedding_model
+from qdrant_client_wrapper import get_qdrant_client
+from ollama_client import get_ollama_client
+
+
+COMPONENTS = ["qdrant", "ollama", "embedding_model"]
+
+
+class ComponentStatus:
+    """구성 요소 하나의 마지막 점검 결과"""
+    
+    def __init__(self):
+        self.ok = False
+        self.checked_at: Optional[float] = None     # epoch 초
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    def to_dict(self, stale: bool) -> Dict[str, Any]:
+        return {
+            "ok": self.ok and not stale,
+            "stale": stale,
+            "checked_at": self.checked_at,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+        }
+
+
+class HealthMonitor:
+    """백그라운드 상태 점검기"""
+    
+    def __init__(
+        self,
+        interval: float = None,
+        timeout: float = None,
+        ready_requires: List[str] = None
+    ):
+        """
+        상태 점검기 초기화
+        
+        Args:
+            interval: 점검 주기 (초)
+            timeout: 구성 요소별 점검 제한 시간 (초)
+            ready_requires: readiness에 필요한 구성 요소 목록
+        """
+        self.interval = interval or float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+        self.timeout = timeout or float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+        if ready_requires is None:
+            ready_requires = os.getenv("HEALTH_READY_REQUIRES", "qdrant,embedding_model").split(",")
+        self.ready_requires = [c.strip() for c in ready_requires if c.strip()]
+        
+        # 이 시간보다 오래된 결과는 실패로 간주
+        self.stale_after = self.interval * 3 + self.timeout
+        
+        self.status: Dict[str, ComponentStatus] = {name: ComponentStatus() for name in COMPONENTS}
+        self._task: Optional[asyncio.Task] = None
+    
+    # ----- 구성 요소별 점검 -----
+    
+    async def _probe_qdrant(self, deep: bool) -> None:
+        ok = await asyncio.to_thread(get_qdrant_client().check_health)
+        if not ok:
+            raise RuntimeError("Qdrant 응답 없음")
+    
+    async def _probe_ollama(self, deep: bool) -> None:
+        ok = await get_ollama_client().check_health(timeout=self.timeout)
+        if not ok:
+            raise RuntimeError("정상 Ollama 레플리카 없음")
+    
+    async def _probe_embedding(self, deep: bool) -> None:
+        # 평상시에는 모델 로드 여부(원격 모드는 서비스 응답)만 확인, deep 점검에서만 실제 추론
+        model = await asyncio.to_thread(get_embedding_model)
+        if hasattr(model, "ping"):
+            await asyncio.to_thread(model.ping)
+        if deep:
+            await asyncio.to_thread(model.embed_single, "health check")
+    
+    async def _probe(self, name: str, deep: bool):
+        probes = {
+            "qdrant": self._probe_qdrant,
+            "ollama": self._probe_ollama,
+            "embedding_model": self._probe_embedding,
+        }
+        status = self.status[name]
+        started = time.monotonic()
+        try:
+            # 최초 모델 로드는 제한 시간 없이 기다림
+            timeout = None if name == "embedding_model" and not status.ok else self.timeout
+            await asyncio.wait_for(probes[name](deep), timeout=timeout)
+            status.ok = True
+            status.error = None
+        except asyncio.TimeoutError:
+            status.ok = False
+            status.error = f"점검 시간 초과 ({self.timeout:.0f}초)"
+        except Exception as e:
+            status.ok = False
+            status.error = str(e)
+        status.latency_ms = round((time.monotonic() - started) * 1000, 1)
+        status.checked_at = time.time()
+    
+    async def probe_all(self, deep: bool = False):
+        """모든 구성 요소를 동시에 점검하여 캐시 갱신"""
+        await asyncio.gather(*[self._probe(name, deep) for name in COMPONENTS])
+    
+    # ----- 백그라운드 루프 -----
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"상태 점검 오류: {e}")
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        """백그라운드 점검 시작 (이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """백그라운드 점검 중지"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    # ----- 조회 -----
+    
+    def _is_stale(self, status: ComponentStatus) -> bool:
+        if status.checked_at is None:
+            return True
+        return time.time() - status.checked_at > self.stale_after
+    
+    def is_alive(self) -> bool:
+        """점검 루프가 동작 중인지 (요청에 응답했다면 이벤트 루프는 살아 있음)"""
+        return self._task is not None and not self._task.done()
+    
+    def is_ready(self) -> bool:
+        """readiness에 필요한 구성 요소가 모두 정상인지"""
+        return all(
+            self.status[name].ok and not self._is_stale(self.status[name])
+            for name in self.ready_requires
+            if name in self.status
+        )
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """구성 요소별 마지막 점검 결과"""
+        return {name: status.to_dict(self._is_stale(status)) for name, status in self.status.items()}
+
+
+# 싱글톤 인스턴스
+_health_monitor = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    """상태 점검기 싱글톤 인스턴스 반환"""
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = HealthMonitor()
+    return _health_monitor
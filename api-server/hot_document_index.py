@@ -0,0 +1,233 @@
+"""
+문서 단위 인메모리 벡터 인덱스 (Hot Document Index)
+- doc_id 지정 질의를 Qdrant 왕복 없이 numpy 내적 top-k로 처리
+- 첫 접근 시 문서의 벡터/텍스트를 적재 (같은 문서의 동시 적재는 한 호출만 수행), 메모리 상한 LRU로 관리
+- 업로드/갱신/삭제 시 무효화 (현재 프로세스만), 다른 워커/레플리카의 변경은 TTL로 반영
+  → 다른 레플리카에서 PUT/DELETE한 문서는 최대 HOT_INDEX_TTL(기본 300초) 동안 이전 벡터로 검색될 수 있음
+- 적재되지 않았거나 너무 큰 문서는 None을 반환하여 Qdrant로 대체
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from qdrant_client_wrapper import SEARCH_PAYLOAD_FIELDS, get_qdrant_client
+
+
+class _DocEntry:
+    """적재된 문서 하나"""
+    
+    def __init__(self, ids: List[str], vectors: np.ndarray, texts: List[str], metadata: List[Dict[str, Any]]):
+        self.ids = ids
+        self.vectors = vectors          # (n, dim) 정규화된 float32
+        self.texts = texts
+        self.metadata = metadata
+        self.loaded_at = time.monotonic()
+        self.nbytes = vectors.nbytes + sum(len(t.encode("utf-8")) for t in texts)
+
+
+class HotDocumentIndex:
+    """(테넌트, doc_id)별 벡터 행렬 LRU 캐시"""
+    
+    def __init__(
+        self,
+        max_bytes: int = None,
+        max_doc_points: int = None,
+        ttl: float = None
+    ):
+        """
+        인덱스 초기화
+        
+        Args:
+            max_bytes: 캐시 전체 메모리 상한 (바이트)
+            max_doc_points: 캐시할 문서의 최대 청크 수 (초과 시 Qdrant 사용)
+            ttl: 적재 후 유효 시간 (초)
+        """
+        self.max_bytes = max_bytes or int(os.getenv("HOT_INDEX_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.max_doc_points = max_doc_points or int(os.getenv("HOT_INDEX_MAX_DOC_POINTS", "2000"))
+        self.ttl = ttl or float(os.getenv("HOT_INDEX_TTL", "300"))
+        
+        self._docs: "OrderedDict[Tuple[str, str], _DocEntry]" = OrderedDict()
+        self._oversized: Dict[Tuple[str, str], float] = {}   # (tenant, doc_id) -> 판정 시각
+        self._oversized_pruned_at = time.monotonic()
+        self._loading: Dict[Tuple[str, str], threading.Event] = {}  # 적재 중인 문서 → 완료 이벤트
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+    
+    def _get(self, tenant: str, doc_id: str) -> Optional[_DocEntry]:
+        key = (tenant, doc_id)
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._docs.get(key)
+                if entry is not None and now - entry.loaded_at < self.ttl:
+                    self._docs.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                if entry is not None:
+                    self._evict(key)
+                
+                self._prune_oversized(now)
+                checked = self._oversized.get(key)
+                if checked is not None and now - checked < self.ttl:
+                    self.fallbacks += 1
+                    return None
+                self._oversized.pop(key, None)
+                
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # 다른 호출이 같은 문서를 적재 중이면 끝날 때까지 기다린 뒤 캐시를 다시 확인
+            loading.wait()
+        
+        try:
+            entry = self._load(tenant, doc_id)
+            if entry is None:
+                return None
+            
+            with self._lock:
+                if entry.nbytes > self.max_bytes:
+                    # 캐시 전체 상한보다 큰 문서는 넣지 않고 Qdrant 사용
+                    self._oversized[key] = time.monotonic()
+                    self.fallbacks += 1
+                    return None
+                if key in self._docs:
+                    self._evict(key)
+                self._docs[key] = entry
+                self.total_bytes += entry.nbytes
+                while self.total_bytes > self.max_bytes:
+                    self._evict(next(iter(self._docs)))
+            return entry
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+    
+    def _prune_oversized(self, now: float):
+        """만료된 큰 문서 판정 기록 제거 (TTL 주기마다 한 번, 잠금 보유 상태에서 호출)"""
+        if now - self._oversized_pruned_at < self.ttl:
+            return
+        self._oversized = {key: checked for key, checked in self._oversized.items() if now - checked < self.ttl}
+        self._oversized_pruned_at = now
+    
+    def _evict(self, key: Tuple[str, str]):
+        entry = self._docs.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.nbytes
+    
+    def _load(self, tenant: str, doc_id: str) -> Optional[_DocEntry]:
+        """Qdrant에서 문서의 벡터/텍스트 적재 (너무 크면 None)"""
+        ids, vectors, texts, metadata = [], [], [], []
+        
+        points = get_qdrant_client(tenant).iter_document_points(
+            doc_id, with_payload=SEARCH_PAYLOAD_FIELDS, with_vectors=True
+        )
+        for point in points:
+            payload = dict(point.payload or {})
+            ids.append(str(point.id))
+            vectors.append(point.vector)
+            texts.append(payload.pop("text", ""))
+            metadata.append(payload)
+            
+            if len(ids) > self.max_doc_points:
+                with self._lock:
+                    self._oversized[(tenant, doc_id)] = time.monotonic()
+                    self.fallbacks += 1
+                return None
+        
+        if not ids:
+            return None
+        
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+        return _DocEntry(ids, np.ascontiguousarray(matrix), texts, metadata)
+    
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        doc_id: str,
+        tenant: str,
+        with_vectors: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        문서 내 코사인 유사도 top-k 검색
+        
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            top_k: 반환할 결과 수
+            doc_id: 검색할 문서 ID
+            tenant: 테넌트 ID
+            with_vectors: 결과에 (정규화된) 벡터 포함 여부
+        
+        Returns:
+            QdrantWrapper.search와 같은 형식의 결과, 캐시할 수 없으면 None
+        """
+        entry = self._get(tenant, doc_id)
+        if entry is None:
+            return None
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = entry.vectors @ query
+        
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        hits = []
+        for i in top:
+            hit = {
+                "id": entry.ids[i],
+                "score": float(scores[i]),
+                "text": entry.texts[i],
+                "doc_id": doc_id,
+                "metadata": entry.metadata[i]
+            }
+            if with_vectors:
+                hit["vector"] = entry.vectors[i]
+            hits.append(hit)
+        return hits
+    
+    def invalidate(self, tenant: str, doc_id: Optional[str] = None):
+        """문서(또는 테넌트 전체) 캐시 무효화"""
+        with self._lock:
+            keys = [key for key in list(self._docs) + list(self._oversized)
+                    if key[0] == tenant and (doc_id is None or key[1] == doc_id)]
+            for key in keys:
+                self._evict(key)
+                self._oversized.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """캐시 지표"""
+        return {
+            "documents": len(self._docs),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits_total": self.hits,
+            "misses_total": self.misses,
+            "fallbacks_total": self.fallbacks,
+        }
+
+
+# 싱글톤 인스턴스
+_hot_index = None
+
+
+def get_hot_index() -> HotDocumentIndex:
+    """문서 인덱스 싱글톤 인스턴스 반환"""
+    global _hot_index
+    if _hot_index is None:
+        _hot_index = HotDocumentIndex()
+    return _hot_index
@@ -0,0 +1,309 @@
+"""
+인덱스 스냅샷 내보내기/가져오기 CLI
+- 새 클러스터나 재해 복구 시 PDF 재추출/재임베딩 없이 인덱스 복원
+- 벡터는 float32 .npy (가져올 때 메모리 매핑으로 읽음), payload는 gzip JSON Lines, 문서 목록은 documents.json
+- 가져오기는 QdrantWrapper의 배치 업로드 경로를 그대로 사용 (포인트 ID 유지 → 재실행해도 중복 없음)
+- --native: Qdrant 자체 컬렉션 스냅샷 파일로 내보내기/복원 (테넌트별 컬렉션 모드 전용)
+
+사용 예:
+    python index_snapshot.py export /backup/rag-2024-06-01
+    python index_snapshot.py import /backup/rag-2024-06-01 --tenant team-a
+    python index_snapshot.py export /backup/native --native
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+REGISTRY_NAME = "documents.json"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_part(out_dir: Path, index: int, ids: List[str], vectors: List[np.ndarray], payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """파트 하나 기록 (벡터 .npy + payload .jsonl.gz)"""
+    vectors_file = out_dir / f"vectors-{index:05d}.npy"
+    payloads_file = out_dir / f"payloads-{index:05d}.jsonl.gz"
+    
+    np.save(vectors_file, np.asarray(vectors, dtype=np.float32))
+    with gzip.open(payloads_file, "wt", encoding="utf-8", compresslevel=6) as f:
+        for point_id, payload in zip(ids, payloads):
+            f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+    
+    return {
+        "points": len(ids),
+        "vectors": vectors_file.name,
+        "vectors_sha256": _sha256(vectors_file),
+        "payloads": payloads_file.name,
+        "payloads_sha256": _sha256(payloads_file),
+    }
+
+
+def export_index(qdrant, out_dir: Path, part_size: int = 50000, scroll_batch: int = 1024) -> Dict[str, Any]:
+    """
+    테넌트 인덱스 전체를 디렉토리로 내보내기
+    
+    Args:
+        qdrant: 내보낼 테넌트의 QdrantWrapper
+        out_dir: 출력 디렉토리
+        part_size: 파트 파일당 포인트 수
+        scroll_batch: scroll 요청당 포인트 수
+    
+    Returns:
+        매니페스트 딕셔너리
+    """
+    from embedding_model import EMBEDDING_MODEL_NAME
+    
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if (out_dir / MANIFEST_NAME).exists():
+        raise FileExistsError(f"이미 스냅샷이 있습니다: {out_dir}")
+    
+    parts = []
+    registry: Dict[str, Dict[str, Any]] = {}
+    ids: List[str] = []
+    vectors: List[np.ndarray] = []
+    payloads: List[Dict[str, Any]] = []
+    dimension = None
+    
+    for point in qdrant.iter_points(with_payload=True, with_vectors=True, batch_size=scroll_batch):
+        payload = point.payload or {}
+        ids.append(str(point.id))
+        vectors.append(np.asarray(point.vector, dtype=np.float32))
+        payloads.append(payload)
+        dimension = dimension or len(point.vector)
+        
+        doc_id = payload.get("doc_id")
+        entry = registry.get(doc_id)
+        if entry is None:
+            entry = registry[doc_id] = {
+                "doc_id": doc_id,
+                "filename": payload.get("filename", "Unknown"),
+                "chunk_count": 0,
+            }
+        entry["chunk_count"] += 1
+        
+        if len(ids) >= part_size:
+            parts.append(_write_part(out_dir, len(parts), ids, vectors, payloads))
+            print(f"파트 {len(parts)} 기록 ({sum(p['points'] for p in parts)} 포인트)")
+            ids, vectors, payloads = [], [], []
+    
+    if ids:
+        parts.append(_write_part(out_dir, len(parts), ids, vectors, payloads))
+    
+    with open(out_dir / REGISTRY_NAME, "w", encoding="utf-8") as f:
+        json.dump(list(registry.values()), f, ensure_ascii=False, indent=2)
+    
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "tenant": qdrant.tenant,
+        "collection": qdrant.collection_name,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "dimension": dimension,
+        "points": sum(p["points"] for p in parts),
+        "documents": len(registry),
+        "parts": parts,
+    }
+    # 매니페스트를 마지막에 기록 (중단된 내보내기는 가져올 수 없음)
+    with open(out_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def import_index(
+    qdrant,
+    in_dir: Path,
+    batch_size: int = 4096,
+    parallel: int = 1,
+    verify: bool = True,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    스냅샷 디렉토리를 테넌트 인덱스로 가져오기 (임베딩 모델 실행 없음)
+    
+    Args:
+        qdrant: 가져올 테넌트의 QdrantWrapper
+        in_dir: 스냅샷 디렉토리
+        batch_size: upsert 호출당 포인트 수
+        parallel: 업로드 병렬 프로세스 수
+        verify: 파일 체크섬 검증 여부
+        force: 임베딩 모델 불일치 무시
+    
+    Returns:
+        매니페스트 딕셔너리
+    """
+    from embedding_model import EMBEDDING_MODEL_NAME
+    
+    with open(in_dir / MANIFEST_NAME, encoding="utf-8") as f:
+        manifest = json.load(f)
+    
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 스냅샷 형식: {manifest.get('format_version')}")
+    if manifest["embedding_model"] != EMBEDDING_MODEL_NAME and not force:
+        # 다른 모델의 벡터를 섞으면 검색 결과가 무의미해짐
+        raise ValueError(
+            f"임베딩 모델 불일치: 스냅샷 {manifest['embedding_model']}, 현재 {EMBEDDING_MODEL_NAME} (--force로 무시)"
+        )
+    if not manifest["points"]:
+        return manifest
+    
+    qdrant.ensure_collection(manifest["dimension"])
+    
+    done = 0
+    for part in manifest["parts"]:
+        vectors_file = in_dir / part["vectors"]
+        payloads_file = in_dir / part["payloads"]
+        if verify:
+            for path, expected in ((vectors_file, part["vectors_sha256"]), (payloads_file, part["payloads_sha256"])):
+                if _sha256(path) != expected:
+                    raise ValueError(f"체크섬 불일치: {path}")
+        
+        # 벡터는 메모리 매핑으로 배치 단위만 읽음
+        vectors = np.load(vectors_file, mmap_mode="r")
+        if vectors.shape != (part["points"], manifest["dimension"]):
+            raise ValueError(f"벡터 크기 불일치: {vectors_file} {vectors.shape}")
+        
+        with gzip.open(payloads_file, "rt", encoding="utf-8") as f:
+            ids: List[str] = []
+            payloads: List[Dict[str, Any]] = []
+            start = 0
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                payloads.append(record["payload"])
+                if len(ids) >= batch_size:
+                    qdrant.upsert_points(ids, vectors[start:start + len(ids)], payloads, parallel=parallel)
+                    start += len(ids)
+                    done += len(ids)
+                    ids, payloads = [], []
+            if ids:
+                qdrant.upsert_points(ids, vectors[start:start + len(ids)], payloads, parallel=parallel)
+                done += len(ids)
+        
+        print(f"{part['vectors']} 완료 ({done}/{manifest['points']} 포인트)")
+    
+    return manifest
+
+
+def _snapshot_base_url(qdrant) -> str:
+    if qdrant.mode != "server":
+        raise ValueError("임베디드 Qdrant는 컬렉션 스냅샷을 지원하지 않습니다 (--native 없이 사용).")
+    return f"http://{qdrant.host}:{qdrant.port}/collections/{qdrant.collection_name}/snapshots"
+
+
+def export_native(qdrant, out_dir: Path) -> Path:
+    """Qdrant 컬렉션 스냅샷 생성 후 파일로 다운로드"""
+    import httpx
+    
+    if qdrant.shard_key is not None:
+        raise ValueError("shard_key 모드에서는 컬렉션 스냅샷이 다른 테넌트를 포함하므로 지원하지 않습니다.")
+    
+    base_url = _snapshot_base_url(qdrant)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    snapshot = qdrant.client.create_snapshot(collection_name=qdrant.collection_name, wait=True)
+    target = out_dir / f"{qdrant.collection_name}.snapshot"
+    
+    try:
+        with httpx.stream("GET", f"{base_url}/{snapshot.name}", timeout=None) as response:
+            response.raise_for_status()
+            with open(target, "wb") as f:
+                for block in response.iter_bytes(1 << 20):
+                    f.write(block)
+    finally:
+        # 서버 디스크에 스냅샷을 남기지 않음
+        qdrant.client.delete_snapshot(collection_name=qdrant.collection_name, snapshot_name=snapshot.name)
+    return target
+
+
+def import_native(qdrant, snapshot_file: Path):
+    """스냅샷 파일을 업로드하여 컬렉션 복원 (기존 컬렉션은 대체됨)"""
+    import httpx
+    
+    if qdrant.shard_key is not None:
+        raise ValueError("shard_key 모드에서는 컬렉션 스냅샷 복원을 지원하지 않습니다.")
+    
+    with open(snapshot_file, "rb") as f:
+        response = httpx.post(
+            f"{_snapshot_base_url(qdrant)}/upload",
+            params={"priority": "snapshot", "wait": "true"},
+            files={"snapshot": (snapshot_file.name, f, "application/octet-stream")},
+            timeout=None
+        )
+    response.raise_for_status()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="인덱스 스냅샷 내보내기/가져오기")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = sub.add_parser("export", help="인덱스를 디렉토리로 내보내기")
+    export_parser.add_argument("path", help="출력 디렉토리")
+    export_parser.add_argument("--part-size", type=int, default=50000, help="파트 파일당 포인트 수")
+    export_parser.add_argument("--native", action="store_true", help="Qdrant 컬렉션 스냅샷으로 내보내기")
+    
+    import_parser = sub.add_parser("import", help="스냅샷 디렉토리(또는 --native 파일)에서 가져오기")
+    import_parser.add_argument("path", help="스냅샷 디렉토리 또는 .snapshot 파일")
+    import_parser.add_argument("--batch", type=int, default=4096, help="upsert 호출당 포인트 수")
+    import_parser.add_argument("--parallel", type=int, default=1, help="업로드 병렬 프로세스 수")
+    import_parser.add_argument("--recreate", action="store_true", help="가져오기 전 테넌트 데이터 삭제")
+    import_parser.add_argument("--no-verify", action="store_true", help="체크섬 검증 생략")
+    import_parser.add_argument("--force", action="store_true", help="임베딩 모델 불일치 무시")
+    import_parser.add_argument("--native", action="store_true", help="Qdrant 컬렉션 스냅샷 파일 복원")
+    
+    for sub_parser in (export_parser, import_parser):
+        sub_parser.add_argument("--tenant", default=None, help="대상 테넌트 ID (기본: DEFAULT_TENANT)")
+    args = parser.parse_args(argv)
+    
+    from qdrant_client_wrapper import get_qdrant_client
+    qdrant = get_qdrant_client(args.tenant)
+    path = Path(args.path)
+    started = time.monotonic()
+    
+    if args.command == "export":
+        if args.native:
+            target = export_native(qdrant, path)
+            print(f"컬렉션 스냅샷 저장: {target} ({target.stat().st_size / 1e6:.1f} MB)")
+        else:
+            manifest = export_index(qdrant, path, part_size=args.part_size)
+            print(f"내보내기 완료: 문서 {manifest['documents']}개, 포인트 {manifest['points']}개 → {path}")
+    else:
+        if args.native:
+            import_native(qdrant, path)
+            print(f"컬렉션 '{qdrant.collection_name}' 스냅샷 복원 완료")
+        else:
+            if args.recreate:
+                qdrant.drop_tenant()
+            manifest = import_index(
+                qdrant,
+                path,
+                batch_size=args.batch,
+                parallel=args.parallel,
+                verify=not args.no_verify,
+                force=args.force
+            )
+            elapsed = max(time.monotonic() - started, 1e-9)
+            print(
+                f"가져오기 완료: 문서 {manifest['documents']}개, 포인트 {manifest['points']}개 "
+                f"({manifest['points'] / elapsed:.0f} points/s)"
+            )
+    
+    print(f"경과 시간: {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
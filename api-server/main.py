@@ -3,26 +3,62 @@ FastAPI 메인 애플리케이션
 - PDF 업로드 API
 - RAG 질의응답 API
 - 헬스체크 API
+- 지표 API
+- 관리자 API (프로파일러)
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Query, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import PlainTextResponse, JSONResponse
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Literal
+import asyncio
+import hmac
+import os
+import time
 import uvicorn
 
-from pdf_processor import extract_text_from_pdf, chunk_text
+from pdf_processor import extract_pages_from_pdf, chunk_pages_for_model
 from embedding_model import get_embedding_model
 from qdrant_client_wrapper import get_qdrant_client
 from ollama_client import get_ollama_client
-from rag_pipeline import get_document_pipeline, get_rag_pipeline, generate_node
+from admission_control import AdmissionRejected, get_admission_controller
+from singleflight import make_query_key, get_query_coalescer
+from hot_document_index import get_hot_index
+from tenancy import DEFAULT_TENANT, TENANT_HEADER, InvalidTenantError, UnknownTenantError, resolve_tenant
+from health_monitor import get_health_monitor
+from tracing import span, trace_request
+from profiler import ProfilerBusyError, sample_stacks
+from degraded_mode import QUERY_MODE_DEFAULT, get_degradation_policy
+from rag_pipeline import (
+    get_rag_pipeline,
+    QUERY_TEMPERATURE,
+    QUERY_EXPANSION_ENABLED,
+    RETRIEVAL_MAX_K,
+    RETRIEVAL_MIN_SCORE,
+    RETRIEVAL_SCORE_GAP,
+    RETRIEVAL_STRATEGY,
+    MMR_LAMBDA,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """시작 시 백그라운드 상태 점검(임베딩 모델 로드 포함) 시작, 종료 시 정리"""
+    monitor = get_health_monitor()
+    monitor.start()
+    yield
+    await monitor.stop()
+    await get_ollama_client().aclose()
 
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="K8S RAG API",
     description="Kubernetes 기반 RAG (Retrieval-Augmented Generation) 시스템",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -32,8 +68,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# 관리자 API 토큰 (비어 있으면 관리자 API 비활성화)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """요청별 구간 시간을 Server-Timing 헤더로 반환"""
+    with trace_request(f"{request.method} {request.url.path}", path=request.url.path) as current:
+        response = await call_next(request)
+    if current is not None:
+        response.headers["Server-Timing"] = current.server_timing()
+    return response
+
 
 # ===== Request/Response 모델 =====
 
@@ -41,6 +91,14 @@ class QueryRequest(BaseModel):
     """질의 요청"""
     query: str
     doc_id: Optional[str] = None
+    tenant: Optional[str] = None    # 테넌트 ID (기본: 쿼리 파라미터/X-Tenant-ID 헤더)
+    expand: Optional[bool] = None   # 질의 확장 (기본: QUERY_EXPANSION_ENABLED)
+    top_k: Optional[int] = Field(None, ge=1, le=20)             # 최대 청크 수 (기본: RETRIEVAL_MAX_K)
+    min_score: Optional[float] = Field(None, ge=-1.0, le=1.0)   # 최소 유사도 (기본: RETRIEVAL_MIN_SCORE)
+    score_gap: Optional[float] = Field(None, ge=0.0, le=1.0)    # 최고 점수 대비 허용 하락 비율 (기본: RETRIEVAL_SCORE_GAP)
+    strategy: Optional[Literal["score", "mmr"]] = None          # 청크 선택 방식 (기본: RETRIEVAL_STRATEGY)
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)   # MMR 관련성 가중치 (기본: MMR_LAMBDA)
+    mode: Optional[Literal["auto", "llm", "retrieval"]] = None   # 응답 방식 (기본: QUERY_MODE_DEFAULT)
 
 
 class QueryResponse(BaseModel):
@@ -48,6 +106,10 @@ class QueryResponse(BaseModel):
     query: str
     response: str
     contexts: List[str]
+    sources: List[Dict[str, Any]] = []
+    answer_mode: str = "llm"                # 실제 응답 방식 (llm / extractive / not_found)
+    degraded: bool = False                  # LLM 장애/과부하로 추출형 답변을 반환했는지
+    degraded_reason: Optional[str] = None   # 전환 사유 (ollama_unhealthy, queue_depth, latency, llm_timeout 등)
 
 
 class UploadResponse(BaseModel):
@@ -58,12 +120,52 @@ class UploadResponse(BaseModel):
     message: str
 
 
+class UpdateResponse(BaseModel):
+    """문서 갱신 응답"""
+    doc_id: str
+    filename: str
+    chunks_count: int
+    added: int
+    removed: int
+    unchanged: int
+    message: str
+
+
 class HealthResponse(BaseModel):
     """헬스체크 응답"""
     status: str
     qdrant: bool
     ollama: bool
     embedding_model: bool
+    ready: bool = False
+    components: Dict[str, Dict[str, Any]] = {}
+
+
+# ===== 테넌트 =====
+
+def _tenant_or_400(tenant: Optional[str]) -> str:
+    try:
+        return resolve_tenant(tenant)
+    except UnknownTenantError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except InvalidTenantError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def get_tenant(
+    tenant: Optional[str] = Query(None, description="테넌트 ID"),
+    x_tenant_id: Optional[str] = Header(None, alias=TENANT_HEADER)
+) -> str:
+    """요청 테넌트 결정 (쿼리 파라미터 → X-Tenant-ID 헤더 → DEFAULT_TENANT)"""
+    return _tenant_or_400(tenant or x_tenant_id)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")):
+    """X-Admin-Token 헤더 검증 (ADMIN_TOKEN 미설정 시 관리자 API 비활성화)"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="관리자 API가 비활성화되어 있습니다.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
 
 
 # ===== API 엔드포인트 =====
@@ -74,39 +176,27 @@ async def root():
     return {
         "message": "K8S RAG API Server",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "liveness": "/health/live",
+        "readiness": "/health/ready"
     }
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
-    """헬스체크 - 모든 서비스 상태 확인"""
-    
-    # Qdrant 상태 확인
-    qdrant_ok = False
-    try:
-        qdrant = get_qdrant_client()
-        qdrant.get_collection_info()
-        qdrant_ok = True
-    except Exception:
-        pass
+async def health_check(deep: bool = False):
+    """
+    헬스체크 - 모든 서비스 상태 (백그라운드 점검 결과 캐시)
     
-    # Ollama 상태 확인
-    ollama_ok = False
-    try:
-        ollama = get_ollama_client()
-        ollama_ok = await ollama.check_health()
-    except Exception:
-        pass
+    - deep=true: 즉시 모든 서비스를 다시 점검 (임베딩 추론 포함, 디버깅용)
+    """
+    monitor = get_health_monitor()
+    if deep:
+        await monitor.probe_all(deep=True)
     
-    # 임베딩 모델 상태 확인
-    embedding_ok = False
-    try:
-        embedding = get_embedding_model()
-        embedding.embed_single("test")
-        embedding_ok = True
-    except Exception:
-        pass
+    components = monitor.snapshot()
+    qdrant_ok = components["qdrant"]["ok"]
+    ollama_ok = components["ollama"]["ok"]
+    embedding_ok = components["embedding_model"]["ok"]
     
     status = "healthy" if all([qdrant_ok, ollama_ok, embedding_ok]) else "degraded"
     
@@ -114,12 +204,67 @@ async def health_check():
         status=status,
         qdrant=qdrant_ok,
         ollama=ollama_ok,
-        embedding_model=embedding_ok
+        embedding_model=embedding_ok,
+        ready=monitor.is_ready(),
+        components=components
     )
 
 
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness - 프로세스와 이벤트 루프가 응답하는지 (의존 서비스와 무관)"""
+    monitor = get_health_monitor()
+    if not monitor.is_alive():
+        # 점검 루프가 멈췄으면 다시 시작
+        monitor.start()
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """Readiness - 트래픽을 받을 수 있는지 (HEALTH_READY_REQUIRES 구성 요소 기준, 캐시)"""
+    monitor = get_health_monitor()
+    ready = monitor.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "components": monitor.snapshot()}
+    )
+
+
+async def _read_pdf_chunks(file: UploadFile):
+    """
+    업로드된 PDF를 읽어 청킹
+    
+    Returns:
+        (청크 텍스트 리스트, 청크별 메타데이터 리스트)
+    """
+    # 파일 검증
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="PDF 파일만 업로드 가능합니다.")
+    
+    # PDF 읽기
+    pdf_bytes = await file.read()
+    
+    # 페이지별 텍스트 추출
+    with span("pdf_extract"):
+        pages = extract_pages_from_pdf(pdf_bytes)
+    if not any(page.strip() for page in pages):
+        raise HTTPException(status_code=400, detail="PDF에서 텍스트를 추출할 수 없습니다.")
+    
+    # 청킹 (임베딩 모델 토큰 기준)
+    with span("chunk"):
+        chunks = chunk_pages_for_model(pages, get_embedding_model())
+    if not chunks:
+        raise HTTPException(status_code=400, detail="텍스트 청킹에 실패했습니다.")
+    
+    # 페이지/문자 오프셋을 payload에 함께 저장
+    texts = [chunk.pop("text") for chunk in chunks]
+    metadata = [{"filename": file.filename, **chunk} for chunk in chunks]
+    return texts, metadata
+
+
 @app.post("/upload", response_model=UploadResponse, tags=["Documents"])
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...), tenant: str = Depends(get_tenant)):
     """
     PDF 파일 업로드 및 벡터 저장
     
@@ -129,132 +274,188 @@ async def upload_pdf(file: UploadFile = File(...)):
     - Qdrant에 저장
     """
     
-    # 파일 검증
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="PDF 파일만 업로드 가능합니다.")
-    
     try:
-        # PDF 읽기
-        pdf_bytes = await file.read()
-        
-        # 텍스트 추출
-        text = extract_text_from_pdf(pdf_bytes)
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="PDF에서 텍스트를 추출할 수 없습니다.")
-        
-        # 청킹
-        chunks = chunk_text(text, chunk_size=500, overlap=50)
-        if not chunks:
-            raise HTTPException(status_code=400, detail="텍스트 청킹에 실패했습니다.")
+        texts, metadata = await _read_pdf_chunks(file)
         
         # 임베딩
         embedding_model = get_embedding_model()
-        embeddings = embedding_model.embed(chunks)
+        with span("embed", chunks=len(texts)):
+            embeddings = embedding_model.embed(texts)
         
-        # Qdrant 저장
-        qdrant = get_qdrant_client()
+        # Qdrant 저장 (테넌트 컬렉션/샤드)
+        qdrant = get_qdrant_client(tenant)
         qdrant.ensure_collection(embedding_model.dimension)
         
         import uuid
         doc_id = str(uuid.uuid4())
         
-        metadata = [{"filename": file.filename} for _ in chunks]
         qdrant.add_documents(
-            texts=chunks,
+            texts=texts,
             embeddings=embeddings,
             metadata=metadata,
             doc_id=doc_id
         )
+        get_hot_index().invalidate(tenant, doc_id)
         
         return UploadResponse(
             doc_id=doc_id,
             filename=file.filename,
-            chunks_count=len(chunks),
+            chunks_count=len(texts),
             message=f"문서 '{file.filename}'이 성공적으로 업로드되었습니다."
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"업로드 처리 중 오류: {str(e)}")
 
 
-@app.post("/query", response_model=QueryResponse, tags=["RAG"])
-async def query_rag(request: QueryRequest):
+@app.put("/documents/{doc_id}", response_model=UpdateResponse, tags=["Documents"])
+async def update_document(doc_id: str, file: UploadFile = File(...), tenant: str = Depends(get_tenant)):
     """
-    RAG 질의응답
+    문서 증분 갱신 (doc_id 유지)
     
-    - 질문을 임베딩
-    - Qdrant에서 유사 문서 검색
-    - Ollama로 답변 생성
+    - 새 PDF를 청킹하여 청크 해시를 저장된 포인트와 비교
+    - 새로 생긴 청크만 임베딩/저장, 사라진 청크는 삭제
     """
     
-    if not request.query.strip():
-        raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
-    
     try:
-        # 임베딩 모델
-        embedding_model = get_embedding_model()
+        qdrant = get_qdrant_client(tenant)
+        if not qdrant.get_document_points(doc_id):
+            raise HTTPException(status_code=404, detail=f"문서 {doc_id}를 찾을 수 없습니다.")
         
-        # 쿼리 임베딩
-        query_embedding = embedding_model.embed_single(request.query)
+        texts, metadata = await _read_pdf_chunks(file)
         
-        # Qdrant 검색
-        qdrant = get_qdrant_client()
-        results = qdrant.search(
-            query_embedding=query_embedding,
-            top_k=3,
-            doc_id=request.doc_id
+        embedding_model = get_embedding_model()
+        result = qdrant.update_document(
+            doc_id=doc_id,
+            texts=texts,
+            embed=embedding_model.embed,
+            metadata=metadata
         )
+        get_hot_index().invalidate(tenant, doc_id)
         
-        contexts = [r["text"] for r in results]
-        
-        if not contexts:
-            return QueryResponse(
-                query=request.query,
-                response="관련 문서를 찾을 수 없습니다. 먼저 PDF를 업로드해주세요.",
-                contexts=[]
-            )
-        
-        # Ollama로 답변 생성
-        ollama = get_ollama_client()
-        
-        context_text = "\n\n---\n\n".join(contexts)
-        
-        system_prompt = """당신은 주어진 문서를 바탕으로 질문에 답변하는 AI 어시스턴트입니다.
-반드시 제공된 컨텍스트 내용만을 기반으로 답변하세요.
-컨텍스트에 없는 정보는 "해당 정보를 찾을 수 없습니다"라고 답변하세요.
-한국어로 친절하게 답변하세요."""
-        
-        prompt = f"""[참고 문서]
-{context_text}
+        return UpdateResponse(
+            doc_id=doc_id,
+            filename=file.filename,
+            chunks_count=len(texts),
+            added=result["added"],
+            removed=result["removed"],
+            unchanged=result["unchanged"],
+            message=f"문서 '{file.filename}'이 갱신되었습니다."
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"갱신 처리 중 오류: {str(e)}")
 
-[질문]
-{request.query}
 
-[답변]"""
-        
-        response = await ollama.generate(
-            prompt=prompt,
-            system_prompt=system_prompt,
-            temperature=0.3
+def _source_of(result: Dict[str, Any]) -> Dict[str, Any]:
+    """검색 결과의 원문 위치 정보 (클라이언트가 원문 영역만 조회할 수 있도록)"""
+    metadata = result.get("metadata", {})
+    return {
+        "doc_id": result.get("doc_id"),
+        "filename": metadata.get("filename"),
+        "chunk_index": metadata.get("chunk_index"),
+        "page_start": metadata.get("page_start"),
+        "page_end": metadata.get("page_end"),
+        "char_start": metadata.get("char_start"),
+        "char_end": metadata.get("char_end"),
+        "score": result.get("score"),
+    }
+
+
+async def _answer_query(request: QueryRequest, tenant: str) -> QueryResponse:
+    """RAG 그래프 실행 (병합 대상 작업)"""
+    expand = QUERY_EXPANSION_ENABLED if request.expand is None else request.expand
+    
+    state = await get_rag_pipeline().ainvoke({
+        "query": request.query,
+        "tenant": tenant,
+        "doc_id": request.doc_id,
+        "expand": expand,
+        "top_k": request.top_k,
+        "min_score": request.min_score,
+        "score_gap": request.score_gap,
+        "strategy": request.strategy,
+        "mmr_lambda": request.mmr_lambda,
+        "mode": request.mode or QUERY_MODE_DEFAULT
+    })
+    
+    if state.get("error"):
+        raise RuntimeError(state["error"])
+    
+    results = state.get("results") or []
+    reason = state.get("degraded_reason")
+    return QueryResponse(
+        query=request.query,
+        response=state["response"],
+        contexts=state.get("retrieved_contexts") or [],
+        sources=[_source_of(r) for r in results],
+        answer_mode=state.get("answer_mode", "llm"),
+        degraded=state.get("answer_mode") == "extractive" and reason != "requested",
+        degraded_reason=reason if state.get("answer_mode") == "extractive" else None
+    )
+
+
+@app.post("/query", response_model=QueryResponse, tags=["RAG"])
+async def query_rag(request: QueryRequest, tenant: str = Depends(get_tenant)):
+    """
+    RAG 질의응답 (LangGraph 비동기 파이프라인)
+    
+    - (선택) 질의 확장: 재작성 질문 생성
+    - 질문들을 임베딩하고 Qdrant에서 동시에 검색 후 병합
+    - 최소 유사도/점수 하락 기준으로 필요한 청크만 선택 (모두 미달이면 LLM 호출 없이 응답)
+    - strategy=mmr: 후보를 더 가져와 서로 중복되지 않는 청크 선택
+    - Ollama로 답변 생성
+    - mode=auto: LLM 장애/과부하(상태 점검 실패, 대기열 깊이, 생성 지연) 시 추출형 답변으로 즉시 응답
+    - mode=retrieval: 항상 추출형 답변 / mode=llm: 항상 LLM (과부하 시 429/503)
+    - 동시에 들어온 동일 질문은 하나의 생성 결과를 공유
+    """
+    
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
+    if request.tenant:
+        tenant = _tenant_or_400(request.tenant)
+    
+    try:
+        key = make_query_key(
+            request.query,
+            request.doc_id,
+            tenant=tenant,
+            temperature=QUERY_TEMPERATURE,
+            expand=QUERY_EXPANSION_ENABLED if request.expand is None else request.expand,
+            top_k=request.top_k or RETRIEVAL_MAX_K,
+            min_score=RETRIEVAL_MIN_SCORE if request.min_score is None else request.min_score,
+            score_gap=RETRIEVAL_SCORE_GAP if request.score_gap is None else request.score_gap,
+            strategy=request.strategy or RETRIEVAL_STRATEGY,
+            mmr_lambda=MMR_LAMBDA if request.mmr_lambda is None else request.mmr_lambda,
+            mode=request.mode or QUERY_MODE_DEFAULT
         )
+        result = await get_query_coalescer().do(key, lambda: _answer_query(request, tenant))
         
-        return QueryResponse(
-            query=request.query,
-            response=response,
-            contexts=contexts
+        # 병합된 요청은 정규화 전 원래 질문 문자열로 응답
+        if result.query != request.query:
+            result = result.model_copy(update={"query": request.query})
+        return result
+    
+    except AdmissionRejected as e:
+        # 과부하 시 즉시 거절하여 클라이언트가 재시도하도록 유도
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
         )
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"질의 처리 중 오류: {str(e)}")
 
 
 @app.get("/documents", tags=["Documents"])
-async def list_documents():
+async def list_documents(tenant: str = Depends(get_tenant)):
     """저장된 문서 정보 조회"""
     try:
-        qdrant = get_qdrant_client()
+        qdrant = get_qdrant_client(tenant)
         info = qdrant.get_collection_info()
         return info
     except Exception as e:
@@ -270,14 +471,14 @@ async def list_documents():
 
 
 @app.get("/documents/list", tags=["Documents"])
-async def list_all_documents():
+async def list_all_documents(tenant: str = Depends(get_tenant)):
     """
     저장된 모든 문서 목록 조회 (doc_id 포함)
     
     각 문서의 ID, 파일명, 청크 수를 확인할 수 있습니다.
     """
     try:
-        qdrant = get_qdrant_client()
+        qdrant = get_qdrant_client(tenant)
         documents = qdrant.list_documents()
         return {
             "total_documents": len(documents),
@@ -295,16 +496,31 @@ async def list_all_documents():
 
 
 @app.delete("/documents/{doc_id}", tags=["Documents"])
-async def delete_document(doc_id: str):
+async def delete_document(doc_id: str, tenant: str = Depends(get_tenant)):
     """문서 삭제"""
     try:
-        qdrant = get_qdrant_client()
+        qdrant = get_qdrant_client(tenant)
         qdrant.delete_document(doc_id)
+        get_hot_index().invalidate(tenant, doc_id)
         return {"message": f"문서 {doc_id}가 삭제되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"삭제 중 오류: {str(e)}")
 
 
+@app.delete("/tenants/{tenant_id}", tags=["Documents"], dependencies=[Depends(require_admin)])
+async def delete_tenant(tenant_id: str):
+    """테넌트 데이터 전체 삭제 (컬렉션 또는 샤드 키 단위, 관리자 토큰 필요)"""
+    tenant = _tenant_or_400(tenant_id)
+    if tenant == DEFAULT_TENANT:
+        raise HTTPException(status_code=400, detail="기본 테넌트는 삭제할 수 없습니다.")
+    try:
+        get_qdrant_client(tenant).drop_tenant()
+        get_hot_index().invalidate(tenant)
+        return {"message": f"테넌트 {tenant}의 문서가 모두 삭제되었습니다."}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"삭제 중 오류: {str(e)}")
+
+
 @app.get("/models", tags=["Ollama"])
 async def list_models():
     """사용 가능한 Ollama 모델 목록"""
@@ -316,6 +532,50 @@ async def list_models():
         return {"error": str(e), "models": []}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    """LLM 입장 제어 / 질의 병합 / 문서 인덱스 / 저하 모드 지표 (Prometheus 텍스트 형식)"""
+    groups = {
+        "rag_llm": get_admission_controller().stats(),
+        "rag_query_coalesce": get_query_coalescer().stats(),
+        "rag_hot_index": get_hot_index().stats(),
+        "rag_degraded": get_degradation_policy().stats(),
+    }
+    
+    lines = []
+    for prefix, stats in groups.items():
+        for name, value in stats.items():
+            metric = f"{prefix}_{name}"
+            kind = "counter" if name.endswith("_total") or name.endswith("_sum") else "gauge"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value}")
+    
+    return "\n".join(lines) + "\n"
+
+
+# ===== 관리자 API =====
+
+@app.get("/admin/profile", response_class=PlainTextResponse, tags=["Admin"], dependencies=[Depends(require_admin)])
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=60, description="수집 시간 (초)"),
+    interval_ms: float = Query(5.0, ge=1, le=100, description="샘플링 간격 (ms)")
+):
+    """
+    샘플링 프로파일 수집 (folded stack 형식)
+    
+    flamegraph.pl 또는 speedscope에 그대로 넣어 플레임그래프로 볼 수 있습니다.
+    """
+    try:
+        folded = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return PlainTextResponse(
+        folded,
+        headers={"Content-Disposition": f'attachment; filename="profile-{int(time.time())}.folded"'}
+    )
+
+
 # ===== 메인 실행 =====
 
 if __name__ == "__main__":
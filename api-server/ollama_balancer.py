@@ -0,0 +1,174 @@
+"""
+Ollama 다중 레플리카 로드밸런서
+- 정적 목록 또는 헤드리스 서비스 DNS로 엔드포인트 탐색
+- 진행 중 요청 수가 가장 적은 엔드포인트로 라우팅
+- 실패한 레플리카 일시 제외 (ejection)
+- 첫 토큰 지연 p95 추적 (헤지 요청 기준)
+"""
+
+import asyncio
+import os
+import socket
+import time
+from collections import deque
+from typing import List, Optional, Iterable
+
+
+class OllamaEndpoint:
+    """Ollama 레플리카 하나의 상태"""
+    
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.outstanding = 0                # 진행 중 요청 수
+        self.consecutive_failures = 0       # 연속 실패 횟수
+        self.ejected_until = 0.0            # 제외 해제 시각 (monotonic)
+    
+    def is_available(self, now: float) -> bool:
+        """제외 기간이 아닌지 확인"""
+        return now >= self.ejected_until
+    
+    def __repr__(self) -> str:
+        return f"OllamaEndpoint({self.base_url}, outstanding={self.outstanding})"
+
+
+class LatencyTracker:
+    """최근 첫 토큰 지연 시간 분위수 추적"""
+    
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """q 분위수 (표본이 부족하면 None)"""
+        if len(self.samples) < 20:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+def _normalize_url(entry: str, default_port: int) -> str:
+    """'host', 'host:port', 'http://host:port' 형태를 base URL로 변환"""
+    entry = entry.strip()
+    if entry.startswith("http://") or entry.startswith("https://"):
+        return entry.rstrip("/")
+    if ":" not in entry:
+        entry = f"{entry}:{default_port}"
+    return f"http://{entry}"
+
+
+class EndpointPool:
+    """Ollama 엔드포인트 풀"""
+    
+    def __init__(
+        self,
+        endpoints: Optional[Iterable[str]] = None,
+        headless_service: Optional[str] = None,
+        port: int = 11434,
+        refresh_interval: float = None,
+        eject_seconds: float = None,
+        failure_threshold: int = None
+    ):
+        """
+        엔드포인트 풀 초기화
+        
+        Args:
+            endpoints: 정적 엔드포인트 목록 ("host:port" 또는 URL)
+            headless_service: 레플리카 IP를 반환하는 헤드리스 서비스 DNS 이름
+            port: 엔드포인트 기본 포트
+            refresh_interval: 헤드리스 서비스 재조회 주기 (초)
+            eject_seconds: 실패한 레플리카 제외 시간 (초)
+            failure_threshold: 제외 전 허용 연속 실패 횟수
+        """
+        self.port = port
+        self.headless_service = headless_service
+        self.refresh_interval = refresh_interval or float(os.getenv("OLLAMA_DISCOVERY_INTERVAL", "30"))
+        self.eject_seconds = eject_seconds or float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))
+        self.failure_threshold = failure_threshold or int(os.getenv("OLLAMA_FAILURE_THRESHOLD", "1"))
+        
+        self.endpoints: List[OllamaEndpoint] = [
+            OllamaEndpoint(_normalize_url(e, port)) for e in (endpoints or []) if e.strip()
+        ]
+        self._last_refresh = 0.0
+        self.ttft = LatencyTracker()
+    
+    async def refresh(self, force: bool = False):
+        """헤드리스 서비스 DNS를 재조회하여 엔드포인트 목록 갱신"""
+        if not self.headless_service:
+            return
+        now = time.monotonic()
+        if not force and self.endpoints and now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        
+        try:
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(
+                self.headless_service, self.port, type=socket.SOCK_STREAM
+            )
+        except OSError as e:
+            print(f"Ollama 엔드포인트 조회 실패 ({self.headless_service}): {e}")
+            return
+        
+        urls = []
+        for family, _, _, _, sockaddr in infos:
+            host = sockaddr[0]
+            url = f"http://[{host}]:{self.port}" if family == socket.AF_INET6 else f"http://{host}:{self.port}"
+            if url not in urls:
+                urls.append(url)
+        
+        # 기존 엔드포인트의 상태(진행 중 요청, 제외 정보)는 유지
+        existing = {ep.base_url: ep for ep in self.endpoints}
+        self.endpoints = [existing.get(url) or OllamaEndpoint(url) for url in urls]
+    
+    def available(self) -> List[OllamaEndpoint]:
+        """현재 제외되지 않은 엔드포인트 목록"""
+        now = time.monotonic()
+        return [ep for ep in self.endpoints if ep.is_available(now)]
+    
+    def pick(self, exclude: Iterable[OllamaEndpoint] = ()) -> Optional[OllamaEndpoint]:
+        """
+        진행 중 요청이 가장 적은 엔드포인트 선택
+        
+        모든 레플리카가 제외된 경우 제외 해제가 가장 임박한 것을 반환합니다.
+        """
+        excluded = set(id(ep) for ep in exclude)
+        candidates = [ep for ep in self.endpoints if id(ep) not in excluded]
+        if not candidates:
+            return None
+        
+        now = time.monotonic()
+        healthy = [ep for ep in candidates if ep.is_available(now)]
+        if healthy:
+            return min(healthy, key=lambda ep: ep.outstanding)
+        return min(candidates, key=lambda ep: ep.ejected_until)
+    
+    def report_success(self, endpoint: OllamaEndpoint):
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_until = 0.0
+    
+    def report_failure(self, endpoint: OllamaEndpoint):
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            print(f"Ollama 레플리카 일시 제외: {endpoint.base_url} ({self.eject_seconds:.0f}초)")
+
+
+def build_endpoint_pool(host: str, port: int) -> EndpointPool:
+    """
+    환경 변수로 엔드포인트 풀 구성
+    
+    우선순위: OLLAMA_ENDPOINTS (쉼표 구분 목록) → OLLAMA_HEADLESS_SERVICE → 단일 host
+    """
+    static = os.getenv("OLLAMA_ENDPOINTS", "")
+    if static.strip():
+        return EndpointPool(endpoints=static.split(","), port=port)
+    
+    headless = os.getenv("OLLAMA_HEADLESS_SERVICE", "")
+    if headless.strip():
+        # DNS 조회 전까지는 단일 호스트를 사용
+        return EndpointPool(endpoints=[f"{host}:{port}"], headless_service=headless.strip(), port=port)
+    
+    return EndpointPool(endpoints=[f"{host}:{port}"], port=port)
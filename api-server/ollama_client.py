@@ -1,13 +1,31 @@
 """
 Ollama LLM 클라이언트
 - Ollama API를 통한 LLM 추론
+- 입장 제어기를 통한 동시 생성 수 제한
+- 다중 레플리카 로드밸런싱 및 헤지 요청
+- 커넥션 풀을 공유하는 단일 httpx.AsyncClient 사용
 """
 
+import asyncio
 import httpx
 import os
+import time
 from typing import Optional, List, Dict, Any
 import json
 
+from admission_control import AdmissionController, get_admission_controller
+from ollama_balancer import EndpointPool, OllamaEndpoint, build_endpoint_pool
+from tracing import span, record
+
+
+def _is_retryable(error: Exception) -> bool:
+    """다른 레플리카로 재시도할 만한 오류인지 판단"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return False
+
 
 class OllamaClient:
     """Ollama API 클라이언트"""
@@ -16,7 +34,9 @@ class OllamaClient:
         self,
         host: str = None,
         port: int = 11434,
-        model: str = "gemma2:2b"
+        model: str = "gemma2:2b",
+        admission: AdmissionController = None,
+        pool: EndpointPool = None
     ):
         """
         Ollama 클라이언트 초기화
@@ -25,11 +45,197 @@ class OllamaClient:
             host: Ollama 서버 호스트
             port: Ollama 서버 포트
             model: 사용할 모델명 (기본: gemma2:2b - 한국어 지원 우수)
+            admission: 생성 요청 입장 제어기 (기본: 싱글톤)
+            pool: 엔드포인트 풀 (기본: 환경 변수로 구성)
         """
         self.host = host or os.getenv("OLLAMA_HOST", "ollama-service")
         self.port = port
         self.model = model
         self.base_url = f"http://{self.host}:{self.port}"
+        self.admission = admission or get_admission_controller()
+        self.pool = pool or build_endpoint_pool(self.host, self.port)
+        
+        # 헤지 요청 설정
+        self.hedge_enabled = os.getenv("OLLAMA_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_percentile = float(os.getenv("OLLAMA_HEDGE_PERCENTILE", "0.95"))
+        self.hedge_default_delay = float(os.getenv("OLLAMA_HEDGE_DEFAULT_DELAY", "5.0"))
+        self.hedge_min_delay = float(os.getenv("OLLAMA_HEDGE_MIN_DELAY", "0.5"))
+        
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop = None
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """공유 HTTP 클라이언트 (요청마다 연결을 새로 맺지 않음)"""
+        # 커넥션은 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만든다
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                timeout=120.0,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=16)
+            )
+            self._http_loop = loop
+        return self._http
+    
+    async def aclose(self):
+        """공유 HTTP 클라이언트 종료"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._http_loop = None
+    
+    async def _endpoint(self, exclude=()) -> OllamaEndpoint:
+        """요청을 보낼 엔드포인트 선택"""
+        await self.pool.refresh()
+        endpoint = self.pool.pick(exclude=exclude)
+        if endpoint is None:
+            raise RuntimeError("사용 가능한 Ollama 엔드포인트가 없습니다.")
+        return endpoint
+    
+    def _hedge_delay(self) -> float:
+        """헤지 요청을 보내기 전 첫 토큰 대기 시간 (p95 기반)"""
+        observed = self.pool.ttft.percentile(self.hedge_percentile)
+        if observed is None:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, observed)
+    
+    async def _stream_generate(
+        self,
+        endpoint: OllamaEndpoint,
+        payload: Dict[str, Any],
+        first_token: asyncio.Event
+    ) -> str:
+        """
+        한 레플리카에서 스트리밍 생성 수행
+        
+        첫 토큰을 받으면 first_token 이벤트를 설정합니다.
+        """
+        endpoint.outstanding += 1
+        started = time.monotonic()
+        try:
+            parts = []
+            async with self.http.stream("POST", f"{endpoint.base_url}/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if not first_token.is_set():
+                        ttft = time.monotonic() - started
+                        self.pool.ttft.record(ttft)
+                        record("llm_ttft", ttft * 1000, endpoint=endpoint.base_url)
+                        first_token.set()
+                    parts.append(data.get("response", ""))
+                    if data.get("done"):
+                        self._record_durations(data, endpoint)
+                        break
+            self.pool.report_success(endpoint)
+            return "".join(parts)
+        except Exception as e:
+            if _is_retryable(e):
+                self.pool.report_failure(endpoint)
+            raise
+        finally:
+            endpoint.outstanding -= 1
+    
+    def _record_durations(self, data: Dict[str, Any], endpoint: OllamaEndpoint):
+        """Ollama가 마지막 메시지로 보고한 로드/prefill/decode 시간 기록 (나노초 → ms)"""
+        stages = [
+            ("llm_load", "load_duration", None),
+            ("llm_prefill", "prompt_eval_duration", "prompt_eval_count"),
+            ("llm_decode", "eval_duration", "eval_count"),
+        ]
+        for name, duration_key, count_key in stages:
+            if data.get(duration_key):
+                attributes = {"endpoint": endpoint.base_url}
+                if count_key and data.get(count_key) is not None:
+                    attributes["tokens"] = data[count_key]
+                record(name, data[duration_key] / 1e6, **attributes)
+    
+    async def _generate_with_hedging(self, payload: Dict[str, Any]) -> str:
+        """
+        레플리카 간 헤지/장애 조치를 적용한 생성
+        
+        - 첫 번째 레플리카가 마감 시간 안에 첫 토큰을 내지 못하면 두 번째 레플리카에 중복 요청
+          (중복 요청은 입장 슬롯을 하나 더 사용하며, 여유 슬롯이 없으면 보내지 않음)
+        - 먼저 첫 토큰을 낸 쪽을 채택하고 나머지는 취소
+        - 연결 오류/5xx로 실패하면 아직 시도하지 않은 레플리카로 재시도
+        """
+        primary = await self._endpoint()
+        attempts = {}  # task -> first_token 이벤트
+        
+        def launch(endpoint: OllamaEndpoint):
+            event = asyncio.Event()
+            task = asyncio.create_task(self._stream_generate(endpoint, payload, event))
+            attempts[task] = event
+            return task
+        
+        launch(primary)
+        tried = [primary]
+        hedge_deadline = time.monotonic() + self._hedge_delay() if self.hedge_enabled else None
+        
+        try:
+            while attempts:
+                # 첫 토큰을 받은 시도가 있으면 나머지를 취소하고 그 결과를 사용
+                for task, event in list(attempts.items()):
+                    if event.is_set():
+                        for other in attempts:
+                            if other is not task:
+                                other.cancel()
+                        return await task
+                
+                waiters = {asyncio.create_task(event.wait()) for event in attempts.values()}
+                timeout = None
+                if hedge_deadline is not None:
+                    timeout = max(0.0, hedge_deadline - time.monotonic())
+                
+                try:
+                    done, _ = await asyncio.wait(
+                        set(attempts) | waiters,
+                        timeout=timeout,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    # 호출자가 취소(생성 제한 시간 초과 등)해도 대기 태스크를 남기지 않음
+                    for waiter in waiters:
+                        waiter.cancel()
+                
+                # 완료(성공/실패)된 시도 처리
+                for task in [t for t in attempts if t.done()]:
+                    attempts.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        for other in attempts:
+                            other.cancel()
+                        return task.result()
+                    if not _is_retryable(error) or attempts:
+                        if not attempts:
+                            raise error
+                        continue
+                    # 장애 조치: 아직 시도하지 않은 레플리카로 재시도
+                    fallback = self.pool.pick(exclude=tried)
+                    if fallback is None:
+                        raise error
+                    launch(fallback)
+                    tried.append(fallback)
+                
+                # 헤지 마감 시간 경과: 두 번째 레플리카로 중복 요청
+                if hedge_deadline is not None and time.monotonic() >= hedge_deadline:
+                    hedge_deadline = None
+                    if not any(event.is_set() for event in attempts.values()):
+                        secondary = self.pool.pick(exclude=tried)
+                        # 헤지는 Ollama 부하를 더하므로 남는 입장 슬롯이 있을 때만 전송 (대기 요청이 있으면 생략)
+                        if secondary is not None and await self.admission.try_acquire_extra():
+                            print(f"헤지 요청 전송: {secondary.base_url}")
+                            launch(secondary).add_done_callback(lambda _: self.admission.release_extra())
+                            tried.append(secondary)
+                        elif secondary is not None:
+                            print("헤지 생략: 여유 입장 슬롯 없음")
+            
+            raise RuntimeError("Ollama 생성 요청이 모두 실패했습니다.")
+        finally:
+            for task in attempts:
+                task.cancel()
     
     async def generate(
         self,
@@ -49,13 +255,14 @@ class OllamaClient:
         
         Returns:
             생성된 텍스트
-        """
-        url = f"{self.base_url}/api/generate"
         
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간이 초과된 경우
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens
@@ -65,11 +272,11 @@ class OllamaClient:
         if system_prompt:
             payload["system"] = system_prompt
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            return result.get("response", "")
+        queued = time.monotonic()
+        async with self.admission.slot():
+            record("llm_queue", (time.monotonic() - queued) * 1000)
+            with span("llm_generate", model=self.model):
+                return await self._generate_with_hedging(payload)
     
     async def chat(
         self,
@@ -88,8 +295,6 @@ class OllamaClient:
         Returns:
             생성된 응답
         """
-        url = f"{self.base_url}/api/chat"
-        
         payload = {
             "model": self.model,
             "messages": messages,
@@ -100,35 +305,56 @@ class OllamaClient:
             }
         }
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            return result.get("message", {}).get("content", "")
+        async with self.admission.slot():
+            endpoint = await self._endpoint()
+            endpoint.outstanding += 1
+            try:
+                response = await self.http.post(f"{endpoint.base_url}/api/chat", json=payload)
+                response.raise_for_status()
+                result = response.json()
+                self.pool.report_success(endpoint)
+                return result.get("message", {}).get("content", "")
+            except Exception as e:
+                if _is_retryable(e):
+                    self.pool.report_failure(endpoint)
+                raise
+            finally:
+                endpoint.outstanding -= 1
     
-    async def check_health(self) -> bool:
-        """Ollama 서버 상태 확인"""
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
-        except Exception:
-            return False
+    async def check_health(self, timeout: float = 5.0) -> bool:
+        """Ollama 서버 상태 확인 (레플리카 중 하나라도 정상이면 True)"""
+        await self.pool.refresh()
+        
+        async def probe(endpoint: OllamaEndpoint) -> bool:
+            try:
+                response = await self.http.get(f"{endpoint.base_url}/api/tags", timeout=timeout)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                self.pool.report_success(endpoint)
+            else:
+                self.pool.report_failure(endpoint)
+            return ok
+        
+        # 레플리카를 동시에 확인
+        results = await asyncio.gather(*[probe(ep) for ep in self.pool.endpoints])
+        return any(results)
     
     async def list_models(self) -> List[str]:
         """사용 가능한 모델 목록"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                response.raise_for_status()
-                data = response.json()
-                return [model["name"] for model in data.get("models", [])]
+            endpoint = await self._endpoint()
+            response = await self.http.get(f"{endpoint.base_url}/api/tags", timeout=10.0)
+            response.raise_for_status()
+            data = response.json()
+            return [model["name"] for model in data.get("models", [])]
         except Exception as e:
             return []
     
     async def pull_model(self, model_name: str = None) -> bool:
         """
-        모델 다운로드
+        모델 다운로드 (모든 레플리카)
         
         Args:
             model_name: 다운로드할 모델명 (기본: 설정된 모델)
@@ -137,15 +363,18 @@ class OllamaClient:
             성공 여부
         """
         model = model_name or self.model
-        url = f"{self.base_url}/api/pull"
+        await self.pool.refresh()
         
         try:
-            async with httpx.AsyncClient(timeout=600.0) as client:
-                response = await client.post(
-                    url,
-                    json={"name": model, "stream": False}
+            results = []
+            for endpoint in self.pool.endpoints:
+                response = await self.http.post(
+                    f"{endpoint.base_url}/api/pull",
+                    json={"name": model, "stream": False},
+                    timeout=600.0
                 )
-                return response.status_code == 200
+                results.append(response.status_code == 200)
+            return all(results)
         except Exception as e:
             print(f"모델 다운로드 실패: {e}")
             return False
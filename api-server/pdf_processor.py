@@ -1,26 +1,37 @@
 """
 PDF 처리 모듈
-- PDF 파일에서 텍스트 추출
-- 텍스트 청킹
+- PDF 파일에서 텍스트 추출 (페이지 단위)
+- 텍스트 청킹 (문자 기준 / 임베딩 토크나이저 기준)
 """
 
 from pypdf import PdfReader
-from typing import List
+from typing import List, Dict, Any, Iterator, Iterable
+from collections import deque
 import io
+import os
+import re
 
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
-    """PDF 바이트에서 텍스트 추출"""
+# 토큰 기준 청킹 설정 (CHUNK_MAX_TOKENS=0 이면 임베딩 모델 최대 길이 사용)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+
+
+# 문장 단위 분할: 문장부호 + 공백 또는 줄 끝까지
+_SENTENCE_RE = re.compile(r"\S.*?(?:[.!?。]+(?=\s)|$)", re.MULTILINE)
+
+
+def extract_pages_from_pdf(pdf_bytes: bytes) -> List[str]:
+    """PDF 바이트에서 페이지별 텍스트 추출 (텍스트가 없는 페이지는 빈 문자열)"""
     pdf_file = io.BytesIO(pdf_bytes)
     reader = PdfReader(pdf_file)
     
-    text = ""
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text += page_text + "\n"
-    
-    return text
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    """PDF 바이트에서 텍스트 추출"""
+    return "".join(page_text + "\n" for page_text in extract_pages_from_pdf(pdf_bytes) if page_text)
 
 
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
@@ -61,3 +72,130 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]
         start = end - overlap if end - overlap > start else end
     
     return chunks
+
+
+def _sentence_tokens(text: str, offset: int, tokenizer) -> List[tuple]:
+    """
+    문장의 토큰별 (시작, 끝) 문자 오프셋 (offset을 더한 문서 기준 위치)
+    
+    토크나이저 오프셋 매핑을 사용하므로 긴 문장도 토큰 경계에서 자를 수 있습니다.
+    """
+    encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    return [(offset + start, offset + end) for start, end in encoded["offset_mapping"] if end > start]
+
+
+def iter_token_chunks(
+    pages: Iterable[str],
+    tokenizer,
+    max_tokens: int = 126,
+    overlap_tokens: int = 16
+) -> Iterator[Dict[str, Any]]:
+    """
+    임베딩 모델 토크나이저 기준으로 텍스트를 청크로 분할 (제너레이터)
+    
+    문장이 통째로 들어가지 않으면 문장 경계에서 청크를 끝내고, 한 청크에 담기지 않는 긴 문장은
+    토큰 경계에서 자릅니다. 다음 청크는 이전 청크의 마지막 overlap_tokens개 토큰으로 시작합니다
+    (필요하면 문장 중간부터). 각 문장은 한 번만 토큰화되므로 전체 길이에 선형 시간입니다.
+    
+    Args:
+        pages: 페이지별 텍스트 (extract_pages_from_pdf 결과)
+        tokenizer: Hugging Face 토크나이저 (fast 토크나이저, 오프셋 지원)
+        max_tokens: 청크당 최대 토큰 수 (특수 토큰 제외)
+        overlap_tokens: 청크 간 오버랩 토큰 수 (max_tokens 미만으로 제한)
+    
+    Yields:
+        {"text", "page_start", "page_end", "char_start", "char_end", "token_count"}
+        (페이지는 1부터, 문자 오프셋은 extract_text_from_pdf 결과 기준)
+    """
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens - 1))
+    window = deque()        # 토큰별 (시작, 끝, 페이지)
+    fresh = 0               # 마지막 청크 이후 새로 들어온 토큰 수 (오버랩만 남은 청크는 내보내지 않음)
+    page_texts = {}         # 페이지 번호 -> (문서 내 시작 오프셋, 텍스트), 현재 창에 걸친 페이지만 보관
+    doc_offset = 0
+    
+    def emit():
+        first, last = window[0], window[-1]
+        base = page_texts[first[2]][0]
+        text = "".join(
+            page_texts[no][1] for no in range(first[2], last[2] + 1) if no in page_texts
+        )
+        return {
+            "text": text[first[0] - base:last[1] - base],
+            "page_start": first[2],
+            "page_end": last[2],
+            "char_start": first[0],
+            "char_end": last[1],
+            "token_count": len(window),
+        }
+    
+    def carry_overlap():
+        # 마지막 overlap_tokens개 토큰만 다음 청크로 넘김
+        while len(window) > overlap_tokens:
+            window.popleft()
+    
+    for page_no, page_text in enumerate(pages, start=1):
+        if not page_text:
+            continue
+        page_texts[page_no] = (doc_offset, page_text + "\n")
+        
+        for match in _SENTENCE_RE.finditer(page_text):
+            tokens = _sentence_tokens(match.group(), doc_offset + match.start(), tokenizer)
+            if not tokens:
+                continue
+            
+            # 문장이 현재 청크에 들어가지 않지만 다음 청크(오버랩 포함)에는 들어가면 문장 경계에서 종료
+            # (다음 청크에도 안 들어가는 긴 문장은 현재 청크를 채운 뒤 토큰 경계에서 자름)
+            if fresh and len(window) + len(tokens) > max_tokens and len(tokens) <= max_tokens - overlap_tokens:
+                yield emit()
+                carry_overlap()
+                fresh = 0
+            
+            for start, end in tokens:
+                # 한 문장이 청크보다 길면 토큰 경계에서 자름
+                if len(window) >= max_tokens:
+                    yield emit()
+                    carry_overlap()
+                    fresh = 0
+                window.append((start, end, page_no))
+                fresh += 1
+        
+        doc_offset += len(page_text) + 1
+        
+        # 창 밖으로 밀려난 페이지 텍스트 해제
+        oldest = window[0][2] if window else page_no
+        for no in [no for no in page_texts if no < oldest]:
+            del page_texts[no]
+    
+    if fresh:
+        yield emit()
+
+
+def chunk_pages_for_model(
+    pages: List[str],
+    embedding_model,
+    max_tokens: int = None,
+    overlap_tokens: int = None
+) -> List[Dict[str, Any]]:
+    """
+    임베딩 모델 토크나이저 기준 청킹 (설정값 적용)
+    
+    Args:
+        pages: 페이지별 텍스트
+        embedding_model: tokenizer / max_tokens 속성을 가진 임베딩 모델
+        max_tokens: 청크당 최대 토큰 수 (기본: CHUNK_MAX_TOKENS, 0이면 모델 최대 길이)
+        overlap_tokens: 청크 간 오버랩 토큰 수 (기본: CHUNK_OVERLAP_TOKENS)
+    
+    Returns:
+        청크 딕셔너리 리스트 (iter_token_chunks 참고)
+    """
+    if max_tokens is None:
+        max_tokens = CHUNK_MAX_TOKENS
+    if overlap_tokens is None:
+        overlap_tokens = CHUNK_OVERLAP_TOKENS
+    max_tokens = max_tokens or embedding_model.max_tokens
+    return list(iter_token_chunks(
+        pages,
+        embedding_model.tokenizer,
+        max_tokens=max_tokens,
+        overlap_tokens=min(overlap_tokens, max_tokens // 2)
+    ))
@@ -0,0 +1,68 @@
+"""
+샘플링 프로파일러
+- 실행 중인 프로세스의 모든 스레드 스택을 일정 간격으로 수집
+- 결과는 folded stack 형식 ("함수;함수;함수 횟수") - flamegraph.pl, speedscope 등에서 바로 사용
+- 계측 코드 없이 운영 중인 서버의 병목 구간을 확인하는 용도
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+# 동시에 하나의 프로파일만 수집
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """다른 프로파일 수집이 진행 중인 경우"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, thread_names: bool = True) -> str:
+    """
+    지정 시간 동안 스택 샘플링
+    
+    Args:
+        seconds: 수집 시간 (초)
+        interval: 샘플링 간격 (초)
+        thread_names: 스택 맨 앞에 스레드 이름 포함 여부
+    
+    Returns:
+        folded stack 텍스트 (한 줄에 "프레임;프레임;... 횟수")
+    
+    Raises:
+        ProfilerBusyError: 다른 수집이 진행 중인 경우
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("다른 프로파일 수집이 진행 중입니다.")
+    
+    try:
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                if thread_names:
+                    stack.insert(0, f"thread:{names.get(ident, ident)}")
+                counts[";".join(stack)] += 1
+            time.sleep(interval)
+        
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        _profile_lock.release()
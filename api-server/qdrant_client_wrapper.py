@@ -1,21 +1,151 @@
 """
 Qdrant 벡터 데이터베이스 클라이언트 래퍼
 - 벡터 저장 및 검색 기능
+- 임베딩은 float32 numpy 배열 그대로 전달 (배치 단위로만 직렬화)
+- 테넌트별 컬렉션 또는 커스텀 샤드 키로 테넌트 데이터 분리
+- 단일 노드용 임베디드 모드 (qdrant-client 로컬 모드, 메모리 또는 디스크 경로)
 """
 
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
     Distance,
     VectorParams,
-    PointStruct,
     Filter,
     FieldCondition,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    ShardingMethod,
     MatchValue,
+    OverwritePayloadOperation,
+    PointIdsList,
+    PayloadSelectorExclude,
+    SetPayload,
+    SetPayloadOperation,
 )
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+import numpy as np
+import hashlib
 import os
+import threading
 import uuid
 
+from tenancy import TENANCY_MODE, resolve_tenant, tenant_settings, tenant_collection
+from tracing import span
+
+
+# 검색 결과로 가져올 payload 필드 (전체 payload 대신)
+SEARCH_PAYLOAD_FIELDS = [
+    "text",
+    "doc_id",
+    "filename",
+    "chunk_index",
+    "page_start",
+    "page_end",
+    "char_start",
+    "char_end",
+]
+
+# 연결 방식
+# - server: Qdrant 서버 (QDRANT_HOST:6333)
+# - memory: 프로세스 내 메모리 (재시작 시 데이터 소실, 테스트/임시 환경용)
+# - local: 프로세스 내 + QDRANT_PATH 디스크에 저장 (단일 노드/엣지 환경, 한 프로세스만 열 수 있음)
+QDRANT_MODE = os.getenv("QDRANT_MODE", "server")
+QDRANT_PATH = os.getenv("QDRANT_PATH", "/data/qdrant")
+
+# 인덱스/검색 파라미터 (테넌트 설정의 hnsw_m, hnsw_ef, quantization이 우선)
+# - QDRANT_HNSW_M: HNSW 그래프 이웃 수 (0 = Qdrant 기본값 16, 컬렉션 생성 시에만 적용)
+# - QDRANT_HNSW_EF: 검색 시 탐색 후보 수 (0 = Qdrant 기본값)
+# - QDRANT_QUANTIZATION: none / int8 (int8은 양자화 벡터로 검색 후 원본 벡터로 재채점, 컬렉션 생성 시에만 적용)
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "0"))
+QDRANT_HNSW_EF = int(os.getenv("QDRANT_HNSW_EF", "0"))
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")
+
+# 메모리에 유지할 테넌트별 래퍼 수 (초과 시 가장 오래 안 쓴 테넌트부터 제거, 연결은 공유라 닫지 않음)
+QDRANT_CLIENT_CACHE_SIZE = int(os.getenv("QDRANT_CLIENT_CACHE_SIZE", "64"))
+
+# upload 요청당 포인트 수
+UPLOAD_BATCH_SIZE = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "256"))
+
+# 결정적 포인트 ID 생성용 네임스페이스
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2d4e-8a3b-5c7d-9e0f-1a2b3c4d5e6f")
+
+
+def chunk_hash(text: str) -> str:
+    """청크 내용 해시 (SHA-256)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_point_ids(doc_id: str, texts: List[str]) -> List[Tuple[str, str]]:
+    """
+    청크별 결정적 포인트 ID 계산
+    
+    같은 문서 안에서 내용이 같은 청크는 등장 순서로 구분합니다.
+    
+    Args:
+        doc_id: 문서 ID
+        texts: 문서 전체 청크 리스트
+    
+    Returns:
+        (포인트 ID, 청크 해시) 리스트
+    """
+    seen: Dict[str, int] = {}
+    result = []
+    for text in texts:
+        digest = chunk_hash(text)
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        point_id = uuid.uuid5(POINT_ID_NAMESPACE, f"{doc_id}:{digest}:{occurrence}")
+        result.append((str(point_id), digest))
+    return result
+
+
+class _SerializedClient:
+    """임베디드 모드 클라이언트 호출 직렬화 (로컬 모드는 스레드 안전하지 않음)"""
+    
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.RLock()
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+def create_qdrant_client(host: str, port: int, mode: str = None, path: str = None):
+    """
+    연결 방식에 맞는 QdrantClient 생성
+    
+    Args:
+        host: Qdrant 서버 호스트 (server 모드)
+        port: Qdrant 서버 포트 (server 모드)
+        mode: server / memory / local (기본: QDRANT_MODE)
+        path: 저장 경로 (local 모드, 기본: QDRANT_PATH)
+    """
+    mode = mode or QDRANT_MODE
+    path = path or QDRANT_PATH
+    if mode == "server":
+        # gRPC는 벡터를 packed float32로 전송 (REST JSON 텍스트 직렬화 회피)
+        prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+        return QdrantClient(host=host, port=port, prefer_grpc=prefer_grpc)
+    if mode == "memory":
+        return _SerializedClient(QdrantClient(location=":memory:"))
+    if mode == "local":
+        os.makedirs(path, exist_ok=True)
+        print(f"임베디드 Qdrant 사용: {path}")
+        return _SerializedClient(QdrantClient(path=path))
+    raise ValueError(f"알 수 없는 QDRANT_MODE: {mode} (server, memory, local 중 하나)")
+
 
 class QdrantWrapper:
     """Qdrant 클라이언트 래퍼"""
@@ -24,7 +154,12 @@ class QdrantWrapper:
         self,
         host: str = None,
         port: int = 6333,
-        collection_name: str = "documents"
+        collection_name: str = None,
+        tenant: str = None,
+        client: QdrantClient = None,
+        mode: str = None,
+        settings: Optional[Dict[str, Any]] = None,
+        use_shard_key: Optional[bool] = None
     ):
         """
         Qdrant 클라이언트 초기화
@@ -32,48 +167,143 @@ class QdrantWrapper:
         Args:
             host: Qdrant 서버 호스트
             port: Qdrant 서버 포트
-            collection_name: 컬렉션 이름
+            collection_name: 컬렉션 이름 (기본: 테넌트 설정에 따름)
+            tenant: 테넌트 ID (기본: DEFAULT_TENANT)
+            client: 공유할 QdrantClient (테넌트별 래퍼가 연결을 재사용)
+            mode: 연결 방식 server / memory / local (기본: QDRANT_MODE)
+            settings: 테넌트 설정 위에 덮어쓸 컬렉션 설정 (hnsw_m, hnsw_ef, quantization 등)
+            use_shard_key: 테넌트 샤드 키 사용 여부 (기본: TENANCY_MODE=shard_key일 때,
+                           측정용 임시 컬렉션처럼 단독으로 쓰는 컬렉션은 False)
         """
         self.host = host or os.getenv("QDRANT_HOST", "qdrant-service")
         self.port = port
-        self.collection_name = collection_name
-        self.client = QdrantClient(host=self.host, port=self.port)
+        self.mode = mode or QDRANT_MODE
+        self.tenant = resolve_tenant(tenant)
+        self.settings = tenant_settings(self.tenant)
+        self.settings.update(settings or {})
+        self.collection_name = collection_name or tenant_collection(self.tenant)
+        # shard_key 모드에서는 모든 요청을 테넌트 샤드로 한정
+        if use_shard_key is None:
+            use_shard_key = TENANCY_MODE == "shard_key"
+        self.shard_key = self.tenant if use_shard_key else None
+        self._exists = False
+        self._quantized: Optional[bool] = None     # 실제 컬렉션의 양자화 여부 (검색 파라미터용 캐시)
+        
+        if self.shard_key is not None and self.mode != "server":
+            raise ValueError("임베디드 Qdrant는 샤드 키를 지원하지 않습니다 (TENANCY_MODE=collection 사용).")
+        
+        if client is None:
+            client = create_qdrant_client(self.host, self.port, self.mode)
+        self.client = client
     
     def ensure_collection(self, vector_size: int):
         """
-        컬렉션이 없으면 생성
+        컬렉션(및 테넌트 샤드 키)이 없으면 생성
         
         Args:
             vector_size: 벡터 차원
         """
-        collections = self.client.get_collections().collections
-        collection_names = [c.name for c in collections]
+        if self._exists:
+            return
         
-        if self.collection_name not in collection_names:
+        if not self.client.collection_exists(self.collection_name):
+            options: Dict[str, Any] = {}
+            if self.shard_key is not None:
+                options["sharding_method"] = ShardingMethod.CUSTOM
+            else:
+                # 테넌트별 컬렉션 설정
+                if "shard_number" in self.settings:
+                    options["shard_number"] = self.settings["shard_number"]
+                if "replication_factor" in self.settings:
+                    options["replication_factor"] = self.settings["replication_factor"]
+            
+            # 인덱스 설정 (shard_key 모드의 공유 컬렉션은 전역 설정만 사용)
+            index_settings = self.settings if self.shard_key is None else {}
+            hnsw_m = index_settings.get("hnsw_m", QDRANT_HNSW_M)
+            if hnsw_m:
+                options["hnsw_config"] = HnswConfigDiff(m=hnsw_m)
+            quantization = index_settings.get("quantization", QDRANT_QUANTIZATION)
+            if quantization == "int8":
+                options["quantization_config"] = ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+                )
+            elif quantization not in ("none", "", None):
+                raise ValueError(f"알 수 없는 quantization: {quantization} (none, int8 중 하나)")
+            
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
                     size=vector_size,
-                    distance=Distance.COSINE
-                )
+                    distance=Distance.COSINE,
+                    on_disk=self.settings.get("on_disk")
+                ),
+                **options
             )
             print(f"컬렉션 '{self.collection_name}' 생성 완료")
+        
+        if self.shard_key is not None and not self.exists():
+            self.client.create_shard_key(
+                collection_name=self.collection_name,
+                shard_key=self.shard_key,
+                shards_number=self.settings.get("shard_number"),
+                replication_factor=self.settings.get("replication_factor")
+            )
+            print(f"샤드 키 '{self.shard_key}' 생성 완료 (컬렉션 '{self.collection_name}')")
+        
+        self._exists = True
+    
+    def exists(self) -> bool:
+        """테넌트 데이터 위치(컬렉션, shard_key 모드에서는 샤드 키)가 있는지 확인"""
+        if self._exists:
+            return True
+        if not self.client.collection_exists(self.collection_name):
+            return False
+        if self.shard_key is not None:
+            try:
+                self.client.count(
+                    collection_name=self.collection_name,
+                    shard_key_selector=self.shard_key,
+                    exact=False
+                )
+            except Exception:
+                return False
+        self._exists = True
+        return True
+    
+    def drop_tenant(self):
+        """테넌트 데이터 전체 삭제 (컬렉션 또는 샤드 키 단위, 필터 스캔 없음)"""
+        if self.shard_key is not None:
+            if self.exists():
+                self.client.delete_shard_key(
+                    collection_name=self.collection_name,
+                    shard_key=self.shard_key
+                )
+        elif self.client.collection_exists(self.collection_name):
+            self.client.delete_collection(self.collection_name)
+        self._exists = False
+        self._quantized = None
+        # 삭제된 테넌트의 래퍼는 캐시에서 제거
+        with _qdrant_clients_lock:
+            if _qdrant_clients.get(self.tenant) is self:
+                del _qdrant_clients[self.tenant]
     
     def add_documents(
         self,
         texts: List[str],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray,
         metadata: Optional[List[Dict[str, Any]]] = None,
-        doc_id: str = None
+        doc_id: str = None,
+        point_ids: Optional[List[Tuple[str, str]]] = None
     ) -> List[str]:
         """
         문서 추가
         
         Args:
             texts: 텍스트 청크 리스트
-            embeddings: 임베딩 벡터 리스트
+            embeddings: (len(texts), dim) float32 배열
             metadata: 메타데이터 리스트 (선택)
             doc_id: 문서 ID (선택)
+            point_ids: (포인트 ID, 청크 해시) 리스트 (기본: chunk_point_ids로 계산)
         
         Returns:
             생성된 포인트 ID 리스트
@@ -81,54 +311,260 @@ class QdrantWrapper:
         if doc_id is None:
             doc_id = str(uuid.uuid4())
         
-        points = []
-        point_ids = []
+        if point_ids is None:
+            point_ids = chunk_point_ids(doc_id, texts)
         
-        for i, (text, embedding) in enumerate(zip(texts, embeddings)):
-            point_id = str(uuid.uuid4())
-            point_ids.append(point_id)
-            
+        payloads = []
+        
+        for i, (text, (point_id, digest)) in enumerate(zip(texts, point_ids)):
             payload = {
                 "text": text,
                 "doc_id": doc_id,
-                "chunk_index": i
+                "chunk_index": i,
+                "chunk_hash": digest
             }
             
             if metadata and i < len(metadata):
                 payload.update(metadata[i])
             
-            points.append(
-                PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload=payload
-                )
+            payloads.append(payload)
+        
+        ids = [point_id for point_id, _ in point_ids]
+        self.upsert_points(ids, embeddings, payloads)
+        return ids
+    
+    def upsert_points(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        payloads: List[Dict[str, Any]],
+        parallel: int = 1
+    ):
+        """
+        포인트 일괄 저장 (UPLOAD_BATCH_SIZE 단위 배치 업로드)
+        
+        Args:
+            ids: 포인트 ID 리스트
+            vectors: (len(ids), dim) float32 배열
+            payloads: payload 리스트
+            parallel: 업로드 병렬 프로세스 수
+        """
+        # numpy 배열을 그대로 넘기면 클라이언트가 배치 단위로만 변환
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with span("qdrant_upsert", collection=self.collection_name, points=len(ids)):
+            self.client.upload_collection(
+                collection_name=self.collection_name,
+                vectors=vectors,
+                payload=payloads,
+                ids=ids,
+                batch_size=UPLOAD_BATCH_SIZE,
+                parallel=parallel,
+                shard_key_selector=self.shard_key,
+                wait=True
             )
+    
+    def iter_document_points(
+        self,
+        doc_id: str,
+        with_payload: Any = True,
+        with_vectors: bool = False,
+        batch_size: int = 256
+    ) -> Iterator[Any]:
+        """
+        문서의 모든 포인트 순회 (scroll 페이지 단위)
         
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
+        Args:
+            doc_id: 문서 ID
+            with_payload: 가져올 payload (True, 필드 리스트 또는 선택자)
+            with_vectors: 벡터 포함 여부
+            batch_size: scroll 요청당 포인트 수
+        
+        Returns:
+            포인트 이터레이터 (테넌트 데이터가 없으면 빈 이터레이터)
+        """
+        return self.iter_points(
+            scroll_filter=Filter(
+                must=[
+                    FieldCondition(
+                        key="doc_id",
+                        match=MatchValue(value=doc_id)
+                    )
+                ]
+            ),
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+            batch_size=batch_size
         )
+    
+    def iter_points(
+        self,
+        scroll_filter: Optional[Filter] = None,
+        with_payload: Any = True,
+        with_vectors: bool = False,
+        batch_size: int = 256
+    ) -> Iterator[Any]:
+        """
+        테넌트의 포인트 순회 (scroll 페이지 단위)
+        
+        Args:
+            scroll_filter: 포인트 필터 (기본: 전체)
+            with_payload: 가져올 payload (True, 필드 리스트 또는 선택자)
+            with_vectors: 벡터 포함 여부
+            batch_size: scroll 요청당 포인트 수
+        
+        Returns:
+            포인트 이터레이터 (테넌트 데이터가 없으면 빈 이터레이터)
+        """
+        if not self.exists():
+            return
+        
+        offset = None
+        while True:
+            batch, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+                shard_key_selector=self.shard_key
+            )
+            yield from batch
+            if offset is None:
+                break
+    
+    def get_document_points(self, doc_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        문서의 모든 포인트 조회 (텍스트/벡터 제외)
+        
+        Args:
+            doc_id: 문서 ID
+        
+        Returns:
+            포인트 ID → payload 딕셔너리
+        """
+        return {
+            str(point.id): point.payload or {}
+            for point in self.iter_document_points(
+                doc_id, with_payload=PayloadSelectorExclude(exclude=["text"])
+            )
+        }
+    
+    def update_document(
+        self,
+        doc_id: str,
+        texts: List[str],
+        embed: Callable[[List[str]], np.ndarray],
+        metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, int]:
+        """
+        문서 증분 갱신
+        
+        청크 해시를 저장된 포인트와 비교하여 새 청크만 임베딩/저장하고,
+        사라진 청크는 삭제하며, 유지된 청크는 위치 정보(payload)만 갱신합니다.
+        새 메타데이터에 없는 키가 저장되어 있으면 payload 전체를 덮어씁니다.
+        
+        청크는 앞에서부터 토큰 예산을 채우는 방식으로 잘리므로, 문서 앞부분의
+        편집으로 청크 경계가 밀리면 그 뒤 청크들도 해시가 바뀌어 다시
+        임베딩됩니다. 증분 갱신의 이득은 편집 이후 경계가 원래 위치로 다시
+        맞춰지는 경우(문장 경계 절단)나 문서 뒷부분 편집에서 주로 생깁니다.
+        
+        Args:
+            doc_id: 문서 ID (유지됨)
+            texts: 새 버전 문서의 전체 청크 리스트
+            embed: 텍스트 리스트 → 임베딩 리스트 함수
+            metadata: 청크별 메타데이터 리스트 (선택)
+        
+        Returns:
+            {"added": 추가 수, "removed": 삭제 수, "unchanged": 유지 수}
+        """
+        existing = self.get_document_points(doc_id)
+        ids = chunk_point_ids(doc_id, texts)
+        metadata = metadata or [{} for _ in texts]
+        
+        # chunk_index는 새 버전 기준으로 다시 매김
+        new_payloads = [
+            {**metadata[i], "chunk_index": i}
+            for i in range(len(texts))
+        ]
+        
+        added = [i for i, (point_id, _) in enumerate(ids) if point_id not in existing]
+        kept = [i for i, (point_id, _) in enumerate(ids) if point_id in existing]
+        removed = set(existing) - {point_id for point_id, _ in ids}
+        
+        if added:
+            self.add_documents(
+                texts=[texts[i] for i in added],
+                embeddings=embed([texts[i] for i in added]),
+                metadata=[new_payloads[i] for i in added],
+                doc_id=doc_id,
+                point_ids=[ids[i] for i in added]
+            )
+        
+        # 위치가 바뀐 유지 청크의 payload만 갱신
+        operations = []
+        for i in kept:
+            point_id, digest = ids[i]
+            stored = existing[point_id]
+            payload = {"doc_id": doc_id, "chunk_hash": digest, **new_payloads[i]}
+            if set(stored) - set(payload):
+                # 삭제된 메타데이터 키가 남지 않도록 전체 payload를 덮어씀
+                # (청크 해시가 같으므로 text도 그대로 다시 씀)
+                operations.append(
+                    OverwritePayloadOperation(overwrite_payload=SetPayload(
+                        payload={"text": texts[i], **payload},
+                        points=[point_id],
+                        shard_key=self.shard_key
+                    ))
+                )
+                continue
+            changes = {k: v for k, v in new_payloads[i].items() if stored.get(k) != v}
+            if changes:
+                operations.append(
+                    SetPayloadOperation(set_payload=SetPayload(
+                        payload=changes, points=[point_id], shard_key=self.shard_key
+                    ))
+                )
+        if operations:
+            self.client.batch_update_points(
+                collection_name=self.collection_name,
+                update_operations=operations
+            )
+        
+        if removed:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=list(removed)),
+                shard_key_selector=self.shard_key
+            )
         
-        return point_ids
+        return {"added": len(added), "removed": len(removed), "unchanged": len(kept)}
     
     def search(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         top_k: int = 5,
-        doc_id: Optional[str] = None
+        doc_id: Optional[str] = None,
+        payload_fields: Optional[List[str]] = None,
+        with_vectors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         유사 문서 검색
         
         Args:
-            query_embedding: 쿼리 임베딩 벡터
+            query_embedding: 쿼리 임베딩 벡터 (float32 배열)
             top_k: 반환할 결과 수
             doc_id: 특정 문서 내에서만 검색 (선택)
+            payload_fields: 가져올 payload 필드 (기본: SEARCH_PAYLOAD_FIELDS)
+            with_vectors: 결과에 포인트 벡터 포함 여부 (MMR 선택용)
         
         Returns:
-            검색 결과 리스트
+            검색 결과 리스트 (metadata에는 text를 제외한 선택 필드만 포함,
+            with_vectors이면 "vector"에 float32 배열)
         """
+        if not self.exists():
+            return []
+        
         search_filter = None
         if doc_id:
             search_filter = Filter(
@@ -140,23 +576,54 @@ class QdrantWrapper:
                 ]
             )
         
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_embedding,
-            query_filter=search_filter,
-            limit=top_k
-        )
+        with span("qdrant_search", collection=self.collection_name, top_k=top_k):
+            results = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=query_embedding,
+                query_filter=search_filter,
+                limit=top_k,
+                with_payload=payload_fields or SEARCH_PAYLOAD_FIELDS,
+                with_vectors=with_vectors,
+                search_params=self._search_params(),
+                shard_key_selector=self.shard_key
+            )
         
-        return [
-            {
+        hits = []
+        for hit in results:
+            metadata = dict(hit.payload or {})
+            result = {
                 "id": str(hit.id),
                 "score": hit.score,
-                "text": hit.payload.get("text", ""),
-                "doc_id": hit.payload.get("doc_id", ""),
-                "metadata": hit.payload
+                "text": metadata.pop("text", ""),
+                "doc_id": metadata.get("doc_id", ""),
+                "metadata": metadata
             }
-            for hit in results
-        ]
+            if with_vectors:
+                result["vector"] = np.asarray(hit.vector, dtype=np.float32)
+            hits.append(result)
+        return hits
+    
+    def _collection_quantized(self) -> bool:
+        """
+        컬렉션이 실제로 양자화되어 있는지 (컬렉션 정보 기준, 한 번만 조회)
+        
+        shard_key 모드의 공유 컬렉션은 전역 설정으로 만들어지므로 테넌트 설정 대신 실제 구성을 따릅니다.
+        """
+        if self._quantized is None:
+            info = self.client.get_collection(self.collection_name)
+            self._quantized = info.config.quantization_config is not None
+        return self._quantized
+    
+    def _search_params(self) -> Optional[SearchParams]:
+        """검색 파라미터 (hnsw_ef, 양자화 재채점), 모두 기본값이면 None"""
+        hnsw_ef = self.settings.get("hnsw_ef", QDRANT_HNSW_EF)
+        quantized = self._collection_quantized()
+        if not hnsw_ef and not quantized:
+            return None
+        return SearchParams(
+            hnsw_ef=hnsw_ef or None,
+            quantization=QuantizationSearchParams(rescore=True) if quantized else None
+        )
     
     def delete_document(self, doc_id: str):
         """
@@ -165,6 +632,9 @@ class QdrantWrapper:
         Args:
             doc_id: 삭제할 문서 ID
         """
+        if not self.exists():
+            return
+        
         self.client.delete(
             collection_name=self.collection_name,
             points_selector=Filter(
@@ -174,13 +644,47 @@ class QdrantWrapper:
                         match=MatchValue(value=doc_id)
                     )
                 ]
-            )
+            ),
+            shard_key_selector=self.shard_key
         )
     
+    def check_health(self) -> bool:
+        """Qdrant 서버 상태 확인 (공유 클라이언트로 컬렉션 목록 조회)"""
+        try:
+            self.client.get_collections()
+            return True
+        except Exception:
+            return False
+    
     def get_collection_info(self) -> Dict[str, Any]:
-        """컬렉션 정보 반환 - REST API 직접 호출로 Pydantic 검증 우회"""
+        """컬렉션 정보 반환 - 서버 모드는 REST API 직접 호출로 Pydantic 검증 우회"""
         import httpx
         
+        # 공유 컬렉션에서는 테넌트 샤드의 포인트 수만 집계
+        if self.shard_key is not None:
+            count = self.client.count(
+                collection_name=self.collection_name,
+                shard_key_selector=self.shard_key,
+                exact=True
+            ).count if self.exists() else 0
+            return {
+                "name": self.collection_name,
+                "tenant": self.tenant,
+                "vectors_count": count,
+                "points_count": count,
+                "status": "ok"
+            }
+        
+        # 임베디드 모드는 HTTP 엔드포인트가 없으므로 클라이언트로 조회
+        if self.mode != "server":
+            try:
+                return self._collection_info_from_client()
+            except Exception as e:
+                return {
+                    "error": str(e),
+                    "message": "컬렉션 정보를 조회할 수 없습니다."
+                }
+        
         # REST API로 직접 조회 (Pydantic 검증 문제 우회)
         url = f"http://{self.host}:{self.port}/collections/{self.collection_name}"
         
@@ -209,26 +713,29 @@ class QdrantWrapper:
                         "error": f"HTTP {response.status_code}",
                         "message": "컬렉션 정보 조회 실패"
                     }
-                    
+        
         except Exception as e:
             # REST API 실패 시 qdrant-client로 재시도
             try:
-                info = self.client.get_collection(self.collection_name)
-                vectors_count = info.vectors_count if info.vectors_count is not None else info.points_count
-                points_count = info.points_count if info.points_count is not None else 0
-                
-                return {
-                    "name": self.collection_name,
-                    "vectors_count": vectors_count,
-                    "points_count": points_count,
-                    "status": "ok"
-                }
+                return self._collection_info_from_client()
             except:
                 return {
                     "error": str(e),
                     "message": "컬렉션 정보를 조회할 수 없습니다."
                 }
     
+    def _collection_info_from_client(self) -> Dict[str, Any]:
+        info = self.client.get_collection(self.collection_name)
+        vectors_count = info.vectors_count if info.vectors_count is not None else info.points_count
+        points_count = info.points_count if info.points_count is not None else 0
+        
+        return {
+            "name": self.collection_name,
+            "vectors_count": vectors_count,
+            "points_count": points_count,
+            "status": "ok"
+        }
+    
     def list_documents(self) -> List[Dict[str, Any]]:
         """
         저장된 모든 문서 목록 조회
@@ -239,13 +746,16 @@ class QdrantWrapper:
         try:
             # 모든 포인트 스크롤 (offset 기반)
             documents_dict: Dict[str, Dict[str, Any]] = {}
+            if not self.exists():
+                return []
             
             # Scroll을 사용하여 모든 포인트 조회
             points, _ = self.client.scroll(
                 collection_name=self.collection_name,
                 limit=100,  # 한 번에 조회할 포인트 수
                 with_payload=True,
-                with_vectors=False
+                with_vectors=False,
+                shard_key_selector=self.shard_key
             )
             
             # doc_id별로 그룹화
@@ -283,13 +793,32 @@ class QdrantWrapper:
             }]
 
 
-# 싱글톤 인스턴스
-_qdrant_client = None
+# 테넌트별 인스턴스 (QDRANT_CLIENT_CACHE_SIZE개까지 LRU 유지)
+_qdrant_clients: "OrderedDict[str, QdrantWrapper]" = OrderedDict()
+# 모든 테넌트가 공유하는 QdrantClient 연결
+_shared_client: Optional[QdrantClient] = None
+# asyncio.to_thread 워커에서 동시에 처음 호출돼도 클라이언트를 하나만 만들도록 보호
+# (임베디드 local 모드는 저장 경로당 클라이언트 하나만 열 수 있음)
+_qdrant_clients_lock = threading.Lock()
 
 
-def get_qdrant_client() -> QdrantWrapper:
-    """Qdrant 클라이언트 싱글톤 인스턴스 반환"""
-    global _qdrant_client
-    if _qdrant_client is None:
-        _qdrant_client = QdrantWrapper()
-    return _qdrant_client
+def get_qdrant_client(tenant: Optional[str] = None) -> QdrantWrapper:
+    """
+    테넌트의 Qdrant 클라이언트 인스턴스 반환
+    
+    Args:
+        tenant: 테넌트 ID (기본: DEFAULT_TENANT)
+    """
+    global _shared_client
+    tenant = resolve_tenant(tenant)
+    with _qdrant_clients_lock:
+        wrapper = _qdrant_clients.get(tenant)
+        if wrapper is None:
+            wrapper = QdrantWrapper(tenant=tenant, client=_shared_client)
+            _shared_client = wrapper.client
+            _qdrant_clients[tenant] = wrapper
+            while len(_qdrant_clients) > max(QDRANT_CLIENT_CACHE_SIZE, 1):
+                _qdrant_clients.popitem(last=False)
+        else:
+            _qdrant_clients.move_to_end(tenant)
+    return wrapper
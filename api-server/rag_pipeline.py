@@ -1,24 +1,79 @@
 """
 LangGraph 기반 RAG 파이프라인
 - PDF 처리 → 임베딩 → 저장
-- 질문 → 검색 → 생성 → 답변
+- 질문 → (질의 확장) → 검색 → 생성 → 답변 (비동기)
+- LLM 장애/과부하 시 생성 대신 추출형 답변 (검색 전용 저하 모드)
 """
 
-from typing import TypedDict, List, Optional, Annotated
+from typing import TypedDict, List, Optional, Annotated, Dict, Any
 from langgraph.graph import StateGraph, END
+import asyncio
+import numpy as np
 import operator
+import os
+import re
 
 from embedding_model import get_embedding_model
 from qdrant_client_wrapper import get_qdrant_client
 from ollama_client import get_ollama_client
-from pdf_processor import extract_text_from_pdf, chunk_text
+from admission_control import AdmissionRejected, QueueFullError
+from degraded_mode import (
+    QUERY_MODE_DEFAULT,
+    DEGRADE_GENERATE_TIMEOUT,
+    DEGRADED_NOTICE,
+    EXTRACTIVE_NOTICE,
+    extractive_answer,
+    get_degradation_policy,
+)
+from hot_document_index import get_hot_index
+from pdf_processor import extract_pages_from_pdf, chunk_pages_for_model
+from tracing import span
+
+
+# 답변 생성 온도
+QUERY_TEMPERATURE = 0.3
+
+# 질의 확장 설정 (요청별로 덮어쓸 수 있음)
+QUERY_EXPANSION_ENABLED = os.getenv("QUERY_EXPANSION_ENABLED", "false").lower() == "true"
+QUERY_EXPANSION_COUNT = int(os.getenv("QUERY_EXPANSION_COUNT", "3"))
+
+NOT_FOUND_RESPONSE = "관련 문서를 찾을 수 없습니다. 먼저 PDF를 업로드해주세요."
+NO_RELEVANT_RESPONSE = "질문과 관련된 내용을 문서에서 찾을 수 없습니다."
+
+# 검색 결과 선택 설정 (요청별로 덮어쓸 수 있음)
+# - 최대 청크 수, 최소 유사도, 최고 점수 대비 허용 하락 비율
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", os.getenv("TOP_K_RESULTS", "3")))
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.3"))
+RETRIEVAL_SCORE_GAP = float(os.getenv("RETRIEVAL_SCORE_GAP", "0.2"))
+
+# 청크 선택 방식 (요청별로 덮어쓸 수 있음)
+# - score: 점수 순 / mmr: 후보를 더 가져와 서로 겹치지 않는 청크 선택 (Maximal Marginal Relevance)
+RETRIEVAL_STRATEGY = os.getenv("RETRIEVAL_STRATEGY", "score")
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))         # 1이면 점수 순과 동일, 낮을수록 다양성 우선
+MMR_FETCH_K = int(os.getenv("MMR_FETCH_K", "20"))          # MMR 후보 수
+
+# 문서 지정 질의를 인메모리 인덱스로 처리할지 여부
+HOT_INDEX_ENABLED = os.getenv("HOT_INDEX_ENABLED", "true").lower() == "true"
 
 
 # RAG 상태 정의
 class RAGState(TypedDict):
     """RAG 파이프라인 상태"""
     query: str                          # 사용자 질문
+    tenant: Optional[str]               # 테넌트 ID (기본: DEFAULT_TENANT)
     doc_id: Optional[str]               # 문서 ID (특정 문서 검색 시)
+    expand: bool                        # 질의 확장 사용 여부
+    top_k: Optional[int]                # 최대 청크 수 (기본: RETRIEVAL_MAX_K)
+    min_score: Optional[float]          # 최소 유사도 (기본: RETRIEVAL_MIN_SCORE)
+    score_gap: Optional[float]          # 최고 점수 대비 허용 하락 비율 (기본: RETRIEVAL_SCORE_GAP)
+    strategy: Optional[str]             # 청크 선택 방식 (기본: RETRIEVAL_STRATEGY)
+    mmr_lambda: Optional[float]         # MMR 관련성/다양성 가중치 (기본: MMR_LAMBDA)
+    mode: str                           # 응답 방식 요청 (auto / llm / retrieval)
+    answer_mode: str                    # 실제 응답 방식 (llm / extractive / not_found)
+    degraded_reason: Optional[str]      # 추출형 답변으로 전환한 사유
+    candidates: int                     # 임계값 적용 전 검색 결과 수
+    queries: List[str]                  # 검색에 사용할 질문들 (원 질문 + 재작성)
+    results: List[Dict[str, Any]]       # 병합된 검색 결과
     retrieved_contexts: List[str]       # 검색된 컨텍스트
     response: str                       # 최종 응답
     error: Optional[str]                # 에러 메시지
@@ -28,9 +83,11 @@ class DocumentState(TypedDict):
     """문서 처리 상태"""
     pdf_bytes: bytes                    # PDF 바이트
     filename: str                       # 파일명
-    text: str                           # 추출된 텍스트
+    tenant: Optional[str]               # 테넌트 ID (기본: DEFAULT_TENANT)
+    pages: List[str]                    # 페이지별 추출 텍스트
     chunks: List[str]                   # 청크 리스트
-    embeddings: List[List[float]]       # 임베딩 리스트
+    chunk_metadata: List[Dict[str, Any]]  # 청크별 페이지/문자 오프셋
+    embeddings: np.ndarray              # 임베딩 (청크 수, 차원) float32 배열
     doc_id: str                         # 문서 ID
     error: Optional[str]                # 에러 메시지
 
@@ -40,9 +97,9 @@ class DocumentState(TypedDict):
 def extract_text_node(state: DocumentState) -> DocumentState:
     """PDF에서 텍스트 추출"""
     try:
-        text = extract_text_from_pdf(state["pdf_bytes"])
-        state["text"] = text
-        print(f"텍스트 추출 완료: {len(text)} 문자")
+        pages = extract_pages_from_pdf(state["pdf_bytes"])
+        state["pages"] = pages
+        print(f"텍스트 추출 완료: {len(pages)} 페이지, {sum(len(p) for p in pages)} 문자")
     except Exception as e:
         state["error"] = f"텍스트 추출 실패: {str(e)}"
     return state
@@ -54,8 +111,9 @@ def chunk_text_node(state: DocumentState) -> DocumentState:
         return state
     
     try:
-        chunks = chunk_text(state["text"], chunk_size=500, overlap=50)
-        state["chunks"] = chunks
+        chunks = chunk_pages_for_model(state["pages"], get_embedding_model())
+        state["chunks"] = [chunk.pop("text") for chunk in chunks]
+        state["chunk_metadata"] = chunks
         print(f"청킹 완료: {len(chunks)} 청크")
     except Exception as e:
         state["error"] = f"청킹 실패: {str(e)}"
@@ -83,7 +141,7 @@ def store_vectors_node(state: DocumentState) -> DocumentState:
         return state
     
     try:
-        qdrant = get_qdrant_client()
+        qdrant = get_qdrant_client(state.get("tenant"))
         embedding_model = get_embedding_model()
         
         # 컬렉션 확인/생성
@@ -93,7 +151,7 @@ def store_vectors_node(state: DocumentState) -> DocumentState:
         import uuid
         doc_id = str(uuid.uuid4())
         
-        metadata = [{"filename": state["filename"]} for _ in state["chunks"]]
+        metadata = [{"filename": state["filename"], **chunk} for chunk in state["chunk_metadata"]]
         
         qdrant.add_documents(
             texts=state["chunks"],
@@ -111,37 +169,246 @@ def store_vectors_node(state: DocumentState) -> DocumentState:
 
 # ===== RAG 질의응답 노드 =====
 
-def retrieve_node(state: RAGState) -> RAGState:
-    """관련 문서 검색"""
+def select_hits(
+    hits: List[Dict[str, Any]],
+    max_k: int,
+    min_score: float,
+    score_gap: float
+) -> List[Dict[str, Any]]:
+    """
+    점수 기준으로 프롬프트에 넣을 청크 선택
+    
+    Args:
+        hits: 점수 내림차순 검색 결과
+        max_k: 최대 청크 수
+        min_score: 이보다 낮은 유사도는 제외
+        score_gap: 최고 점수보다 |최고 점수| × score_gap 넘게 낮은 결과는 제외 (0이면 사용 안 함)
+    
+    Returns:
+        선택된 결과 (모두 기준 미달이면 빈 리스트)
+    """
+    hits = [h for h in hits[:max_k] if h["score"] >= min_score]
+    if hits and score_gap > 0:
+        # 최고 점수가 음수여도 최고 점수 자체는 남도록 절댓값 기준으로 하한 계산
+        top = hits[0]["score"]
+        floor = top - abs(top) * score_gap
+        hits = [h for h in hits if h["score"] >= floor]
+    return hits
+
+
+def mmr_select(hits: List[Dict[str, Any]], k: int, lambda_mult: float) -> List[Dict[str, Any]]:
+    """
+    Maximal Marginal Relevance 선택
+    
+    이미 고른 청크와 비슷한 후보(겹치는 청크, 반복되는 상용구)를 감점하여
+    프롬프트에 중복 내용이 들어가지 않도록 합니다.
+    
+    Args:
+        hits: 점수 내림차순 후보 ("vector" 포함)
+        k: 선택할 수
+        lambda_mult: 관련성 가중치 (1 - lambda_mult가 다양성 가중치)
+    
+    Returns:
+        선택 순서대로의 결과 (첫 번째는 항상 최고 점수)
+    """
+    if len(hits) <= 1 or k <= 0:
+        return hits[:k]
+    
+    vectors = np.stack([h["vector"] for h in hits]).astype(np.float32, copy=False)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    relevance = np.array([h["score"] for h in hits], dtype=np.float32)
+    similarity = vectors @ vectors.T
+    
+    selected = [0]
+    max_similarity = similarity[0].copy()
+    available = np.ones(len(hits), dtype=bool)
+    available[0] = False
+    
+    while len(selected) < min(k, len(hits)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    
+    return [hits[i] for i in selected]
+
+
+def _search(
+    query_embedding: np.ndarray,
+    top_k: int,
+    doc_id: Optional[str],
+    tenant: Optional[str],
+    with_vectors: bool = False
+) -> List[Dict[str, Any]]:
+    """문서 지정 질의는 인메모리 인덱스 우선, 적재할 수 없으면 Qdrant 검색"""
+    qdrant = get_qdrant_client(tenant)
+    if doc_id and HOT_INDEX_ENABLED:
+        with span("hot_index"):
+            hits = get_hot_index().search(query_embedding, top_k, doc_id, qdrant.tenant, with_vectors=with_vectors)
+        if hits is not None:
+            return hits
+    return qdrant.search(
+        query_embedding=query_embedding,
+        top_k=top_k,
+        doc_id=doc_id,
+        with_vectors=with_vectors
+    )
+
+
+async def expand_query_node(state: RAGState) -> RAGState:
+    """질의 확장 - LLM으로 검색용 재작성 질문 생성"""
+    state["queries"] = [state["query"]]
+    
+    # LLM 사용 여부를 먼저 판단: 검색 전용 요청이거나 LLM이 과부하/장애 상태면 확장 없이 진행
+    mode = state.get("mode") or QUERY_MODE_DEFAULT
+    if mode == "retrieval":
+        state["degraded_reason"] = "requested"
+    elif mode == "auto":
+        state["degraded_reason"] = get_degradation_policy().reason()
+    if not state.get("expand") or state.get("degraded_reason"):
+        return state
+    
     try:
-        embedding_model = get_embedding_model()
-        qdrant = get_qdrant_client()
+        ollama = get_ollama_client()
         
-        # 쿼리 임베딩
-        query_embedding = embedding_model.embed_single(state["query"])
+        prompt = f"""다음 질문을 문서 검색에 적합하도록 서로 다른 표현으로 {QUERY_EXPANSION_COUNT}개 바꿔 쓰세요.
+한 줄에 하나씩, 번호나 설명 없이 질문만 출력하세요.
+
+[질문]
+{state["query"]}"""
         
-        # 검색
-        results = qdrant.search(
-            query_embedding=query_embedding,
-            top_k=3,
-            doc_id=state.get("doc_id")
+        # auto 모드에서는 생성과 같은 제한 시간 적용 (느린 LLM에서 확장이 응답을 붙잡지 않도록)
+        expansion = ollama.generate(
+            prompt=prompt,
+            temperature=0.7,
+            max_tokens=256
         )
+        if mode == "auto" and DEGRADE_GENERATE_TIMEOUT > 0:
+            expansion = asyncio.wait_for(expansion, timeout=DEGRADE_GENERATE_TIMEOUT)
+        with span("expand_query"):
+            response = await expansion
         
-        contexts = [r["text"] for r in results]
-        state["retrieved_contexts"] = contexts
-        print(f"검색 완료: {len(contexts)} 문서")
+        rewrites = []
+        for line in response.splitlines():
+            line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip()
+            if line and line != state["query"] and line not in rewrites:
+                rewrites.append(line)
+        
+        state["queries"] += rewrites[:QUERY_EXPANSION_COUNT]
+        print(f"질의 확장 완료: {len(state['queries']) - 1}개")
+    except AdmissionRejected:
+        # 확장은 선택 단계이므로 과부하 시 원 질문만으로 진행
+        print("질의 확장 생략: LLM 대기열 포화")
+    except asyncio.TimeoutError:
+        # LLM이 확장에서 이미 제한 시간을 넘겼으므로 답변도 추출형으로 전환
+        print("질의 확장 시간 초과 (원 질문만 사용)")
+        state["degraded_reason"] = "llm_timeout"
+    except Exception as e:
+        print(f"질의 확장 실패 (원 질문만 사용): {e}")
+    return state
+
+
+async def retrieve_node(state: RAGState) -> RAGState:
+    """관련 문서 검색 - 여러 질문의 임베딩/검색을 동시에 수행하고 병합"""
+    try:
+        embedding_model = get_embedding_model()
+        queries = state.get("queries") or [state["query"]]
+        max_k = state.get("top_k") or RETRIEVAL_MAX_K
+        min_score = RETRIEVAL_MIN_SCORE if state.get("min_score") is None else state["min_score"]
+        score_gap = RETRIEVAL_SCORE_GAP if state.get("score_gap") is None else state["score_gap"]
+        use_mmr = (state.get("strategy") or RETRIEVAL_STRATEGY) == "mmr"
+        # MMR은 후보를 더 가져와 그중에서 다양하게 선택
+        fetch_k = max(max_k, MMR_FETCH_K) if use_mmr else max_k
+        
+        # 쿼리 임베딩 (한 번의 배치)
+        with span("embed_query", queries=len(queries)):
+            query_embeddings = await asyncio.to_thread(embedding_model.embed, queries)
+        
+        # 검색 (질문별 동시 실행)
+        searches = await asyncio.gather(*[
+            asyncio.to_thread(_search, query_embedding, fetch_k, state.get("doc_id"), state.get("tenant"), use_mmr)
+            for query_embedding in query_embeddings
+        ])
+        
+        # 같은 포인트는 최고 점수로 병합
+        merged: Dict[str, Dict[str, Any]] = {}
+        for hits in searches:
+            for hit in hits:
+                if hit["id"] not in merged or hit["score"] > merged[hit["id"]]["score"]:
+                    merged[hit["id"]] = hit
+        ranked = sorted(merged.values(), key=lambda r: r["score"], reverse=True)
+        if use_mmr:
+            lambda_mult = MMR_LAMBDA if state.get("mmr_lambda") is None else state["mmr_lambda"]
+            candidates = select_hits(ranked, fetch_k, min_score, score_gap)
+            with span("mmr", candidates=len(candidates)):
+                results = mmr_select(candidates, max_k, lambda_mult)
+            # 벡터는 선택에만 사용 (응답/병합 결과에 싣지 않음)
+            results = [{k: v for k, v in r.items() if k != "vector"} for r in results]
+        else:
+            results = select_hits(ranked, max_k, min_score, score_gap)
+        
+        state["candidates"] = len(ranked)
+        state["results"] = results
+        state["retrieved_contexts"] = [r["text"] for r in results]
+        print(f"검색 완료: {len(results)}/{len(ranked)} 문서 선택 (질문 {len(queries)}개)")
+        
+        # LLM 사용 여부를 검색 직후 판단 (과부하/장애 시 생성 대기 없이 응답)
+        # (질의 확장 단계에서 이미 저하로 판단했으면 유지)
+        mode = state.get("mode") or QUERY_MODE_DEFAULT
+        if mode == "retrieval":
+            state["degraded_reason"] = "requested"
+        elif mode == "auto" and not state.get("degraded_reason"):
+            state["degraded_reason"] = get_degradation_policy().reason()
     except Exception as e:
         state["error"] = f"검색 실패: {str(e)}"
+        state["results"] = []
         state["retrieved_contexts"] = []
     return state
 
 
+def route_after_retrieve(state: RAGState) -> str:
+    """검색 결과에 따라 다음 노드 결정"""
+    if state.get("error"):
+        return "end"
+    if not state.get("retrieved_contexts"):
+        return "not_found"
+    if state.get("degraded_reason"):
+        return "extractive"
+    return "generate"
+
+
+def not_found_node(state: RAGState) -> RAGState:
+    """검색 결과가 없거나 모두 기준 미달일 때 LLM 호출 없이 응답"""
+    state["response"] = NO_RELEVANT_RESPONSE if state.get("candidates") else NOT_FOUND_RESPONSE
+    state["answer_mode"] = "not_found"
+    return state
+
+
+def extractive_node(state: RAGState) -> RAGState:
+    """LLM 없이 검색 결과에서 질문 관련 문장을 발췌하여 응답"""
+    requested = state.get("degraded_reason") == "requested"
+    with span("extractive_answer"):
+        state["response"] = extractive_answer(
+            state["query"],
+            state.get("results") or [],
+            notice=EXTRACTIVE_NOTICE if requested else DEGRADED_NOTICE
+        )
+    state["answer_mode"] = "extractive"
+    if not requested:
+        get_degradation_policy().record(state["degraded_reason"])
+        print(f"추출형 답변으로 응답 (사유: {state['degraded_reason']})")
+    return state
+
+
 async def generate_node(state: RAGState) -> RAGState:
     """답변 생성"""
     if state.get("error"):
         state["response"] = "검색 중 오류가 발생했습니다."
         return state
     
+    mode = state.get("mode") or QUERY_MODE_DEFAULT
     try:
         ollama = get_ollama_client()
         
@@ -152,9 +419,9 @@ async def generate_node(state: RAGState) -> RAGState:
         system_prompt = """당신은 주어진 문서를 바탕으로 질문에 답변하는 AI 어시스턴트입니다.
 반드시 제공된 컨텍스트 내용만을 기반으로 답변하세요.
 컨텍스트에 없는 정보는 "해당 정보를 찾을 수 없습니다"라고 답변하세요.
-한국어로 답변하세요."""
+한국어로 친절하게 답변하세요."""
         
-        prompt = f"""[컨텍스트]
+        prompt = f"""[참고 문서]
 {context}
 
 [질문]
@@ -162,16 +429,33 @@ async def generate_node(state: RAGState) -> RAGState:
 
 [답변]"""
         
-        # 생성
-        response = await ollama.generate(
+        # 생성 (auto 모드에서는 제한 시간 초과 시 추출형 답변으로 전환)
+        generation = ollama.generate(
             prompt=prompt,
             system_prompt=system_prompt,
-            temperature=0.3
+            temperature=QUERY_TEMPERATURE
         )
+        if mode == "auto" and DEGRADE_GENERATE_TIMEOUT > 0:
+            generation = asyncio.wait_for(generation, timeout=DEGRADE_GENERATE_TIMEOUT)
+        response = await generation
         
         state["response"] = response
+        state["answer_mode"] = "llm"
         print("답변 생성 완료")
+    except AdmissionRejected as e:
+        if mode != "auto":
+            # 과부하 거절은 API 계층에서 429/503으로 변환
+            raise
+        state["degraded_reason"] = "queue_full" if isinstance(e, QueueFullError) else "queue_timeout"
+        return extractive_node(state)
+    except asyncio.TimeoutError:
+        state["degraded_reason"] = "llm_timeout"
+        return extractive_node(state)
     except Exception as e:
+        if mode == "auto":
+            print(f"답변 생성 실패, 추출형 답변으로 전환: {e}")
+            state["degraded_reason"] = "llm_error"
+            return extractive_node(state)
         state["error"] = str(e)
         state["response"] = f"답변 생성 중 오류가 발생했습니다: {str(e)}"
     return state
@@ -200,15 +484,27 @@ def build_document_pipeline():
 
 
 def build_rag_pipeline():
-    """RAG 질의응답 파이프라인 생성 (동기 버전)"""
+    """RAG 질의응답 파이프라인 생성 (비동기 - ainvoke로 실행)"""
     workflow = StateGraph(RAGState)
     
     # 노드 추가
+    workflow.add_node("expand_query", expand_query_node)
     workflow.add_node("retrieve", retrieve_node)
+    workflow.add_node("not_found", not_found_node)
+    workflow.add_node("generate", generate_node)
+    workflow.add_node("extractive", extractive_node)
     
     # 엣지 연결
-    workflow.set_entry_point("retrieve")
-    workflow.add_edge("retrieve", END)
+    workflow.set_entry_point("expand_query")
+    workflow.add_edge("expand_query", "retrieve")
+    workflow.add_conditional_edges(
+        "retrieve",
+        route_after_retrieve,
+        {"generate": "generate", "extractive": "extractive", "not_found": "not_found", "end": END}
+    )
+    workflow.add_edge("not_found", END)
+    workflow.add_edge("extractive", END)
+    workflow.add_edge("generate", END)
     
     return workflow.compile()
 
@@ -0,0 +1,395 @@
+"""
+검색 파라미터 자동 튜닝 CLI
+- 질문 → 정답 청크 라벨 세트로 청킹/검색/인덱스 파라미터 조합 비교
+  (CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, top_k, HNSW m / ef, 양자화)
+- 조합마다 QdrantWrapper로 임시 컬렉션을 만들어 recall@k, MRR, p95 검색 지연, 인덱스 메모리(추정) 측정
+- 파레토 최적 조합을 보고하고, 선택된 설정을 ConfigMap 패치(YAML)로 저장
+- 임베딩은 청킹 설정별로 한 번만 계산하고, 임시 컬렉션은 측정 후 삭제
+
+라벨 파일 형식 (JSON Lines, 한 줄에 질문 하나):
+    {"question": "Pod가 재시작되는 원인은?", "expected": ["CrashLoopBackOff 상태는"]}
+    {"question": "HPA 설정 방법", "filename": "k8s-guide.pdf", "page": 12}
+청크 경계가 조합마다 달라지므로 청크 ID 대신 본문 일부(짧은 구절) 또는 파일/페이지로 정답을 지정합니다.
+
+사용 예 (API 서버 Pod 안에서):
+    python retrieval_tuner.py labels.jsonl /data/pdfs \\
+        --chunk-tokens 64 128 0 --overlap-tokens 0 16 32 --top-k 3 5 \\
+        --hnsw-m 16 32 --hnsw-ef 0 64 128 --quantization none int8 \\
+        --max-p95-ms 20 --output tuned-configmap.yaml
+    kubectl patch configmap rag-config -n rag-system --patch-file tuned-configmap.yaml
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client.http.models import CollectionStatus, OptimizersConfigDiff
+
+from pdf_processor import extract_pages_from_pdf, chunk_pages_for_model
+from qdrant_client_wrapper import QdrantWrapper, create_qdrant_client, QDRANT_MODE
+
+
+# 파레토 비교 지표 (이름, 클수록 좋은지 여부)
+OBJECTIVES = [("recall", True), ("mrr", True), ("p95_ms", False), ("memory_mb", False)]
+
+# Qdrant HNSW 기본 이웃 수 (hnsw_m=0일 때 메모리 추정용)
+DEFAULT_HNSW_M = 16
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def load_labels(path: str) -> List[Dict[str, Any]]:
+    """
+    라벨 파일 읽기
+    
+    Args:
+        path: JSON Lines 파일 경로
+    
+    Returns:
+        {"question", "expected"(정규화된 구절 목록), "filename", "page"} 리스트
+    """
+    labels = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            expected = entry.get("expected") or []
+            if isinstance(expected, str):
+                expected = [expected]
+            if not entry.get("question") or not (expected or entry.get("filename")):
+                raise ValueError(f"{path}:{line_no}: question과 expected 또는 filename이 필요합니다.")
+            labels.append({
+                "question": entry["question"],
+                "expected": [_normalize(e) for e in expected],
+                "filename": entry.get("filename"),
+                "page": entry.get("page"),
+            })
+    return labels
+
+
+def load_documents(paths: List[str]) -> List[Tuple[str, List[str]]]:
+    """PDF 파일/디렉토리에서 (파일 이름, 페이지별 텍스트) 목록 읽기"""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.rglob("*.pdf")) if path.is_dir() else [path])
+    return [(file.name, extract_pages_from_pdf(file.read_bytes())) for file in files]
+
+
+def is_relevant(label: Dict[str, Any], hit: Dict[str, Any]) -> bool:
+    """검색 결과 청크가 라벨의 정답인지 판정 (구절 포함 또는 파일/페이지 일치)"""
+    if label["expected"]:
+        text = _normalize(hit["text"])
+        if any(expected in text for expected in label["expected"]):
+            return True
+    if label["filename"] and hit["metadata"].get("filename") == label["filename"]:
+        if label["page"] is None:
+            return True
+        return hit["metadata"].get("page_start", 0) <= label["page"] <= hit["metadata"].get("page_end", 0)
+    return False
+
+
+def estimate_index_mb(points: int, dim: int, hnsw_m: int, quantization: str, on_disk: bool = False) -> float:
+    """
+    인덱스 메모리 추정 (MB)
+    
+    원본 float32 벡터(on_disk이면 제외) + int8 양자화 벡터 + HNSW 0층 링크(포인트당 2m개, 4바이트)
+    payload와 상위 층 링크는 제외합니다.
+    
+    Args:
+        points: 포인트 수
+        dim: 벡터 차원
+        hnsw_m: HNSW 이웃 수 (0이면 Qdrant 기본값)
+        quantization: none / int8
+        on_disk: 원본 벡터를 디스크에 두는지 여부
+    
+    Returns:
+        추정 메모리 (MB)
+    """
+    total = 0 if on_disk else points * dim * 4
+    if quantization == "int8":
+        total += points * dim
+    total += points * 2 * (hnsw_m or DEFAULT_HNSW_M) * 4
+    return total / (1024 * 1024)
+
+
+def pareto_front(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """다른 어떤 결과에도 지배되지 않는 결과 목록 (OBJECTIVES 기준)"""
+    def dominates(a, b):
+        at_least = all((a[k] >= b[k]) if higher else (a[k] <= b[k]) for k, higher in OBJECTIVES)
+        better = any((a[k] > b[k]) if higher else (a[k] < b[k]) for k, higher in OBJECTIVES)
+        return at_least and better
+    
+    return [r for r in results if not any(dominates(other, r) for other in results)]
+
+
+def choose_best(
+    front: List[Dict[str, Any]],
+    max_p95_ms: float = 0,
+    max_memory_mb: float = 0,
+    recall_tolerance: float = 0.01
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    파레토 조합 중 운영 설정으로 쓸 조합 선택
+    
+    지연/메모리 예산을 만족하는 조합 중 최고 recall에서 recall_tolerance 이내인 것들을 모아,
+    top_k가 작은 것(LLM 컨텍스트 절약) → MRR이 높은 것 → p95가 낮은 것 → 메모리가 작은 것 순으로 고릅니다.
+    
+    Args:
+        front: 파레토 최적 결과 목록
+        max_p95_ms: p95 검색 지연 예산 (0이면 제한 없음)
+        max_memory_mb: 인덱스 메모리 예산 (0이면 제한 없음)
+        recall_tolerance: 최고 recall 대비 허용 차이
+    
+    Returns:
+        (선택된 결과, 예산 만족 여부)
+    """
+    within = [
+        r for r in front
+        if (not max_p95_ms or r["p95_ms"] <= max_p95_ms) and (not max_memory_mb or r["memory_mb"] <= max_memory_mb)
+    ]
+    candidates = within or front
+    best_recall = max(r["recall"] for r in candidates)
+    close = [r for r in candidates if r["recall"] >= best_recall - recall_tolerance]
+    close.sort(key=lambda r: (r["top_k"], -r["mrr"], r["p95_ms"], r["memory_mb"]))
+    return close[0], bool(within)
+
+
+def _wait_indexed(client, collection_name: str, timeout: float = 300):
+    """서버 모드에서 옵티마이저(HNSW 구축)가 끝날 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while client.get_collection(collection_name).status != CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            print(f"  경고: '{collection_name}' 인덱싱이 {timeout:.0f}초 안에 끝나지 않아 측정을 계속합니다.")
+            return
+        time.sleep(0.2)
+
+
+def measure(
+    qdrant: QdrantWrapper,
+    labels: List[Dict[str, Any]],
+    query_vectors: np.ndarray,
+    top_k: int,
+    warmup: int = 5
+) -> Dict[str, float]:
+    """
+    라벨 질문 전체를 검색해 recall@k, MRR@k, p95 지연 측정
+    
+    Args:
+        qdrant: 측정할 컬렉션 래퍼 (settings의 hnsw_ef가 검색에 적용됨)
+        labels: 라벨 목록
+        query_vectors: 질문 임베딩 (labels와 같은 순서)
+        top_k: 검색 결과 수
+        warmup: 측정 전 워밍업 검색 수
+    
+    Returns:
+        {"recall", "mrr", "p95_ms"}
+    """
+    for vector in query_vectors[:warmup]:
+        qdrant.search(vector, top_k=top_k)
+    
+    hits_total = 0
+    reciprocal_sum = 0.0
+    latencies = []
+    for label, vector in zip(labels, query_vectors):
+        started = time.monotonic()
+        hits = qdrant.search(vector, top_k=top_k)
+        latencies.append(time.monotonic() - started)
+        for rank, hit in enumerate(hits, start=1):
+            if is_relevant(label, hit):
+                hits_total += 1
+                reciprocal_sum += 1.0 / rank
+                break
+    
+    latencies.sort()
+    return {
+        "recall": hits_total / len(labels),
+        "mrr": reciprocal_sum / len(labels),
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000,
+    }
+
+
+def run_sweep(args, labels: List[Dict[str, Any]], documents: List[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+    """모든 파라미터 조합 측정"""
+    from embedding_model import get_embedding_model
+    
+    embedding_model = get_embedding_model()
+    query_vectors = embedding_model.embed([label["question"] for label in labels])
+    
+    path = tempfile.mkdtemp(prefix="qdrant-tune-") if args.mode == "local" else None
+    client = create_qdrant_client(args.host, args.port, mode=args.mode, path=path)
+    if args.mode != "server":
+        print("임베디드 모드는 전수 비교로 검색하므로 hnsw_m / hnsw_ef / quantization이 결과에 반영되지 않습니다.")
+    
+    results = []
+    try:
+        for max_tokens, overlap_tokens in itertools.product(args.chunk_tokens, args.overlap_tokens):
+            # 청킹 + 임베딩은 청킹 설정별로 한 번만
+            docs = []
+            for filename, pages in documents:
+                chunks = chunk_pages_for_model(pages, embedding_model, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+                if chunks:
+                    texts = [chunk.pop("text") for chunk in chunks]
+                    metadata = [{"filename": filename, **chunk} for chunk in chunks]
+                    docs.append((filename, texts, metadata, embedding_model.embed(texts)))
+            points = sum(len(texts) for _, texts, _, _ in docs)
+            print(f"[chunk {max_tokens or embedding_model.max_tokens} / overlap {overlap_tokens}] 청크 {points}개")
+            
+            for hnsw_m, quantization in itertools.product(args.hnsw_m, args.quantization):
+                qdrant = QdrantWrapper(
+                    host=args.host,
+                    port=args.port,
+                    collection_name=f"tune_{uuid.uuid4().hex[:8]}",
+                    client=client,
+                    mode=args.mode,
+                    settings={"hnsw_m": hnsw_m, "quantization": quantization, "hnsw_ef": 0},
+                    # 임시 컬렉션은 단독 사용하므로 shard_key 모드에서도 샤드 키 없이 생성
+                    use_shard_key=False
+                )
+                try:
+                    qdrant.ensure_collection(embedding_model.dimension)
+                    if args.mode == "server":
+                        # 라벨 세트 규모에서도 HNSW가 만들어지도록 인덱싱 임계값을 낮춤
+                        client.update_collection(
+                            qdrant.collection_name,
+                            optimizers_config=OptimizersConfigDiff(indexing_threshold=1)
+                        )
+                    for filename, texts, metadata, embeddings in docs:
+                        qdrant.add_documents(texts=texts, embeddings=embeddings, doc_id=filename, metadata=metadata)
+                    if args.mode == "server":
+                        _wait_indexed(client, qdrant.collection_name)
+                    
+                    memory_mb = estimate_index_mb(points, embedding_model.dimension, hnsw_m, quantization)
+                    for hnsw_ef, top_k in itertools.product(args.hnsw_ef, args.top_k):
+                        qdrant.settings["hnsw_ef"] = hnsw_ef
+                        metrics = measure(qdrant, labels, query_vectors, top_k)
+                        result = {
+                            "chunk_max_tokens": max_tokens,
+                            "chunk_overlap_tokens": overlap_tokens,
+                            "top_k": top_k,
+                            "hnsw_m": hnsw_m,
+                            "hnsw_ef": hnsw_ef,
+                            "quantization": quantization,
+                            "chunks": points,
+                            "memory_mb": memory_mb,
+                            **metrics,
+                        }
+                        results.append(result)
+                        print(
+                            f"  m={hnsw_m} ef={hnsw_ef} q={quantization} k={top_k}: "
+                            f"recall={result['recall']:.3f} mrr={result['mrr']:.3f} "
+                            f"p95={result['p95_ms']:.2f}ms mem={memory_mb:.1f}MB"
+                        )
+                finally:
+                    client.delete_collection(qdrant.collection_name)
+    finally:
+        if path:
+            client.close()
+            shutil.rmtree(path, ignore_errors=True)
+    return results
+
+
+def configmap_patch(best: Dict[str, Any], within_budget: bool) -> str:
+    """
+    선택된 조합을 ConfigMap 패치 YAML로 변환 (kubectl patch --patch-file 용)
+    
+    Args:
+        best: 선택된 측정 결과
+        within_budget: 지연/메모리 예산 만족 여부
+    
+    Returns:
+        YAML 문자열
+    """
+    data = {
+        "CHUNK_MAX_TOKENS": best["chunk_max_tokens"],
+        "CHUNK_OVERLAP_TOKENS": best["chunk_overlap_tokens"],
+        "TOP_K_RESULTS": best["top_k"],
+        "RETRIEVAL_MAX_K": best["top_k"],
+        "QDRANT_HNSW_M": best["hnsw_m"],
+        "QDRANT_HNSW_EF": best["hnsw_ef"],
+        "QDRANT_QUANTIZATION": best["quantization"],
+    }
+    lines = [
+        "# retrieval_tuner 결과",
+        f"# recall@{best['top_k']}={best['recall']:.3f} MRR={best['mrr']:.3f} "
+        f"p95={best['p95_ms']:.2f}ms 인덱스 메모리(추정)={best['memory_mb']:.1f}MB",
+    ]
+    if not within_budget:
+        lines.append("# 주의: 지연/메모리 예산을 만족하는 조합이 없어 예산을 무시하고 선택했습니다.")
+    lines += [
+        "# 청킹 설정은 문서를 다시 업로드해야, QDRANT_HNSW_M / QDRANT_QUANTIZATION은 컬렉션을 다시 만들어야 적용됩니다.",
+        "data:",
+    ]
+    lines += [f"  {key}: {json.dumps(str(value))}" for key, value in data.items()]
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="검색 파라미터 자동 튜닝 (recall vs 지연/메모리)")
+    parser.add_argument("labels", help="라벨 파일 (JSON Lines: question + expected 또는 filename/page)")
+    parser.add_argument("pdfs", nargs="+", help="PDF 파일 또는 디렉토리")
+    parser.add_argument("--chunk-tokens", type=int, nargs="+", default=[64, 128, 0], help="CHUNK_MAX_TOKENS 후보 (0 = 모델 최대 길이)")
+    parser.add_argument("--overlap-tokens", type=int, nargs="+", default=[0, 16, 32], help="CHUNK_OVERLAP_TOKENS 후보")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 5], help="top_k 후보")
+    parser.add_argument("--hnsw-m", type=int, nargs="+", default=[16, 32], help="HNSW m 후보 (0 = Qdrant 기본값)")
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[0, 64, 128], help="검색 hnsw_ef 후보 (0 = Qdrant 기본값)")
+    parser.add_argument("--quantization", nargs="+", default=["none", "int8"], choices=["none", "int8"], help="양자화 후보")
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="p95 검색 지연 예산 (0 = 제한 없음)")
+    parser.add_argument("--max-memory-mb", type=float, default=0, help="인덱스 메모리 예산 (0 = 제한 없음)")
+    parser.add_argument("--recall-tolerance", type=float, default=0.01, help="최고 recall 대비 동급으로 볼 차이")
+    parser.add_argument("--mode", default=None, choices=["server", "memory", "local"], help="Qdrant 연결 방식 (기본: QDRANT_MODE)")
+    parser.add_argument("--host", default=None, help="Qdrant 서버 호스트 (기본: QDRANT_HOST)")
+    parser.add_argument("--port", type=int, default=6333, help="Qdrant 서버 포트")
+    parser.add_argument("--output", default="tuned-configmap.yaml", help="ConfigMap 패치 출력 경로")
+    parser.add_argument("--report", default=None, help="전체 측정 결과 JSON 출력 경로 (선택)")
+    args = parser.parse_args(argv)
+    args.host = args.host or os.getenv("QDRANT_HOST", "qdrant-service")
+    args.mode = args.mode or QDRANT_MODE
+    
+    labels = load_labels(args.labels)
+    documents = load_documents(args.pdfs)
+    if not labels or not documents:
+        parser.error("라벨과 PDF가 각각 하나 이상 필요합니다.")
+    print(f"라벨 {len(labels)}개, 문서 {len(documents)}개")
+    
+    results = run_sweep(args, labels, documents)
+    front = pareto_front(results)
+    front.sort(key=lambda r: (-r["recall"], -r["mrr"], r["p95_ms"], r["memory_mb"]))
+    best, within_budget = choose_best(front, args.max_p95_ms, args.max_memory_mb, args.recall_tolerance)
+    
+    print(f"\n=== 파레토 최적 조합 ({len(front)}/{len(results)}) ===")
+    print(f"{'chunk':>6} {'overlap':>7} {'k':>3} {'m':>3} {'ef':>4} {'quant':>5} "
+          f"{'recall':>7} {'MRR':>6} {'p95 ms':>7} {'mem MB':>7}")
+    for r in front:
+        marker = " *" if r is best else ""
+        print(
+            f"{r['chunk_max_tokens']:>6} {r['chunk_overlap_tokens']:>7} {r['top_k']:>3} {r['hnsw_m']:>3} "
+            f"{r['hnsw_ef']:>4} {r['quantization']:>5} {r['recall']:>7.3f} {r['mrr']:>6.3f} "
+            f"{r['p95_ms']:>7.2f} {r['memory_mb']:>7.1f}{marker}"
+        )
+    if not within_budget:
+        print("\n지연/메모리 예산을 만족하는 조합이 없어 예산을 무시하고 선택했습니다.")
+    
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(configmap_patch(best, within_budget))
+    print(f"\n선택된 설정(*)을 {args.output}에 저장했습니다.")
+    print(f"적용: kubectl patch configmap rag-config -n rag-system --patch-file {args.output}")
+    
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "pareto": front, "selected": best}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
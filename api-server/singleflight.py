@@ -0,0 +1,107 @@
+"""
+동일 요청 병합 (Single-flight) 모듈
+- 같은 키로 동시에 들어온 요청은 하나의 진행 중 작업 결과를 공유
+- 작업이 끝나면 키를 제거 (결과 캐싱 아님)
+- 합류한 요청의 Trace에는 공유 작업의 구간과 대기 시간(singleflight;desc="follower")을 기록
+"""
+
+import asyncio
+import re
+import time
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from tracing import Trace, current_trace
+
+
+def normalize_query(query: str) -> str:
+    """질문 정규화 (유니코드 NFKC, 공백 압축, 대소문자 무시)"""
+    text = unicodedata.normalize("NFKC", query)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.casefold()
+
+
+def make_query_key(query: str, doc_id: Optional[str] = None, **params: Any) -> tuple:
+    """
+    질의 병합 키 생성
+    
+    Args:
+        query: 사용자 질문
+        doc_id: 문서 ID (선택)
+        params: 결과에 영향을 주는 생성/검색 파라미터
+    
+    Returns:
+        해시 가능한 키
+    """
+    return (normalize_query(query), doc_id or None, tuple(sorted(params.items())))
+
+
+class SingleFlight:
+    """진행 중인 동일 작업 병합기"""
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, Optional[Trace]]] = {}  # 키 → (작업, 선행 요청 Trace)
+        self.leaders_total = 0      # 실제로 실행된 작업 수
+        self.coalesced_total = 0    # 진행 중 작업에 합류한 요청 수
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        키에 해당하는 작업 실행 또는 진행 중 작업에 합류
+        
+        첫 요청자가 연결을 끊어도 공유 작업은 취소되지 않습니다.
+        
+        Args:
+            key: 병합 키
+            fn: 작업 코루틴 팩토리
+        
+        Returns:
+            작업 결과 (예외도 모든 대기자에게 동일하게 전달)
+        """
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = (task, current_trace())
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.leaders_total += 1
+            return await asyncio.shield(task)
+        
+        task, leader_trace = inflight
+        self.coalesced_total += 1
+        started = time.monotonic()
+        try:
+            return await asyncio.shield(task)
+        finally:
+            # 합류한 요청의 Server-Timing에도 공유 작업의 구간이 보이도록 복사
+            current = current_trace()
+            if current is not None:
+                if leader_trace is not None and leader_trace is not current:
+                    current.extend(leader_trace)
+                current.add("singleflight", (time.monotonic() - started) * 1000, desc="follower")
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is task:
+            del self._inflight[key]
+        # 대기자가 모두 취소된 경우 예외 미수거 경고 방지
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> Dict[str, Any]:
+        """병합 지표"""
+        return {
+            "inflight": len(self._inflight),
+            "leaders_total": self.leaders_total,
+            "coalesced_total": self.coalesced_total,
+        }
+
+
+# 싱글톤 인스턴스
+_query_coalescer = None
+
+
+def get_query_coalescer() -> SingleFlight:
+    """질의 병합기 싱글톤 인스턴스 반환"""
+    global _query_coalescer
+    if _query_coalescer is None:
+        _query_coalescer = SingleFlight()
+    return _query_coalescer
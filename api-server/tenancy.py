@@ -0,0 +1,92 @@
+"""
+멀티 테넌트 설정 모듈
+- 요청의 테넌트 ID 검증/기본값 처리 (허용 목록에 없는 테넌트 거부)
+- 테넌트 분리 방식: 테넌트별 컬렉션(collection) 또는 하나의 컬렉션 + 커스텀 샤드 키(shard_key)
+- 테넌트별 컬렉션 설정 (TENANT_SETTINGS JSON)
+"""
+
+import json
+import os
+import re
+from typing import Dict, Any, Optional
+
+
+# 테넌트 분리 방식: "collection" (테넌트별 컬렉션) 또는 "shard_key" (커스텀 샤딩)
+TENANCY_MODE = os.getenv("TENANCY_MODE", "collection").lower()
+
+# 테넌트를 지정하지 않은 요청이 사용하는 테넌트 (기존 documents 컬렉션)
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+
+# 요청 헤더 이름
+TENANT_HEADER = "X-Tenant-ID"
+
+# 기본 컬렉션 이름 (shard_key 모드에서는 모든 테넌트가 공유)
+BASE_COLLECTION = os.getenv("QDRANT_COLLECTION", "documents")
+
+# 컬렉션 이름에 그대로 쓰이므로 영문/숫자/-/_ 만 허용
+_TENANT_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+# 테넌트별 설정 예:
+# {"team-a": {"collection": "team_a_docs", "shard_number": 2, "replication_factor": 2,
+#             "on_disk": true, "hnsw_m": 32, "hnsw_ef": 128, "quantization": "int8"}}
+_TENANT_SETTINGS: Dict[str, Dict[str, Any]] = json.loads(os.getenv("TENANT_SETTINGS", "") or "{}")
+
+# 요청에서 지정할 수 있는 테넌트 (쉼표 구분, DEFAULT_TENANT와 TENANT_SETTINGS 키는 항상 허용)
+# 헤더만으로 임의 컬렉션이 생기지 않도록 기본은 목록에 있는 테넌트만 허용, "*"이면 형식만 검사
+_ALLOWED_TENANTS_ENV = os.getenv("ALLOWED_TENANTS", "").strip()
+ALLOW_ANY_TENANT = _ALLOWED_TENANTS_ENV == "*"
+ALLOWED_TENANTS = (
+    {t.strip() for t in _ALLOWED_TENANTS_ENV.split(",") if t.strip() and t.strip() != "*"}
+    | set(_TENANT_SETTINGS)
+    | {DEFAULT_TENANT}
+)
+
+
+class InvalidTenantError(ValueError):
+    """형식이 잘못된 테넌트 ID"""
+
+
+class UnknownTenantError(InvalidTenantError):
+    """허용 목록(ALLOWED_TENANTS)에 없는 테넌트 ID"""
+
+
+def resolve_tenant(tenant: Optional[str]) -> str:
+    """
+    요청의 테넌트 ID 정규화
+    
+    Args:
+        tenant: 요청에 지정된 테넌트 ID (없으면 DEFAULT_TENANT)
+    
+    Returns:
+        검증된 테넌트 ID
+    
+    Raises:
+        InvalidTenantError: 허용되지 않는 문자가 포함된 경우
+        UnknownTenantError: 허용 목록에 없는 테넌트인 경우
+    """
+    if tenant is None or not tenant.strip():
+        return DEFAULT_TENANT
+    tenant = tenant.strip()
+    if not _TENANT_RE.match(tenant):
+        raise InvalidTenantError(f"잘못된 테넌트 ID입니다: {tenant!r}")
+    if not ALLOW_ANY_TENANT and tenant not in ALLOWED_TENANTS:
+        raise UnknownTenantError(f"허용되지 않은 테넌트입니다: {tenant!r}")
+    return tenant
+
+
+def tenant_settings(tenant: str) -> Dict[str, Any]:
+    """테넌트별 컬렉션/샤드 설정 (없으면 빈 딕셔너리)"""
+    return dict(_TENANT_SETTINGS.get(tenant, {}))
+
+
+def tenant_collection(tenant: str) -> str:
+    """테넌트가 사용할 컬렉션 이름"""
+    if TENANCY_MODE == "shard_key":
+        return BASE_COLLECTION
+    settings = tenant_settings(tenant)
+    if settings.get("collection"):
+        return settings["collection"]
+    # 기본 테넌트는 기존 컬렉션을 그대로 사용
+    if tenant == DEFAULT_TENANT:
+        return BASE_COLLECTION
+    return f"{BASE_COLLECTION}_{tenant}"
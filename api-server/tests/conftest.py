@@ -0,0 +1,5 @@
+import os
+import sys
+
+# api-server 모듈을 테스트에서 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,111 @@
+"""LLM 생성 입장 제어 테스트"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission_control import AdmissionController, QueueFullError, QueueTimeoutError
+
+
+def _assert_no_leak(controller: AdmissionController):
+    assert controller.in_flight == 0
+    assert controller.queue_depth == 0
+    assert controller.semaphore._value == controller.max_concurrency
+
+
+def test_queue_full_rejects_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+        
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+        
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        assert controller.in_flight == 1 and controller.queue_depth == 1
+        
+        with pytest.raises(QueueFullError) as info:
+            async with controller.slot():
+                pass
+        assert info.value.status_code == 429
+        assert info.value.retry_after >= 1
+        assert controller.rejected_full_total == 1
+        
+        release.set()
+        await asyncio.gather(holder, waiter)
+        _assert_no_leak(controller)
+    
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects_and_returns_permit():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+        release = asyncio.Event()
+        
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(QueueTimeoutError) as info:
+            async with controller.slot():
+                pass
+        assert info.value.status_code == 503
+        assert info.value.retry_after >= 1
+        assert controller.rejected_timeout_total == 1
+        
+        release.set()
+        await holder
+        _assert_no_leak(controller)
+        
+        # 반환된 슬롯으로 다음 요청이 바로 입장
+        async with controller.slot():
+            assert controller.in_flight == 1
+        _assert_no_leak(controller)
+    
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_permit():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, queue_timeout=5)
+        release = asyncio.Event()
+        
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+        
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        release.set()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        _assert_no_leak(controller)
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("error, status", [
+    (QueueFullError("full", retry_after=7), 429),
+    (QueueTimeoutError("timeout", retry_after=3), 503),
+])
+def test_query_endpoint_maps_rejection_to_status_and_retry_after(monkeypatch, error, status):
+    async def reject(request, tenant):
+        raise error
+    
+    monkeypatch.setattr(main, "_answer_query", reject)
+    response = TestClient(main.app).post("/query", json={"query": "배포 절차는?"})
+    
+    assert response.status_code == status
+    assert response.headers["Retry-After"] == str(error.retry_after)
@@ -0,0 +1,125 @@
+"""bulk_ingest 파이프라인 테스트 (임베딩 실패 시 중단 없이 종료)"""
+
+import json
+import sys
+import threading
+import types
+from concurrent.futures import Future
+
+import numpy as np
+
+import bulk_ingest
+import qdrant_client_wrapper
+
+
+class _InlineExecutor:
+    """ProcessPoolExecutor 대체 (호출 스레드에서 바로 실행)"""
+    
+    def __init__(self, *args, initializer=None, initargs=(), **kwargs):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class _FailingModel:
+    model_name = "fake"
+    max_tokens = 128
+    dimension = 4
+    
+    def embed(self, texts):
+        raise RuntimeError("embedding backend down")
+
+
+class _FakeQdrant:
+    def __init__(self):
+        self.added = 0
+    
+    def ensure_collection(self, vector_size):
+        pass
+    
+    def add_documents(self, texts, embeddings, metadata=None, doc_id=None, point_ids=None):
+        self.added += len(texts)
+
+
+def _fake_extract(path):
+    return {
+        "path": path,
+        "sha256": path,
+        "pages": 1,
+        "texts": [f"{path} chunk {i}" for i in range(3)],
+        "metadata": [{"filename": path} for _ in range(3)],
+        "seconds": 0.0,
+    }
+
+
+def test_embed_failure_records_failed_and_finishes(tmp_path, monkeypatch):
+    qdrant = _FakeQdrant()
+    monkeypatch.setitem(
+        sys.modules,
+        "embedding_model",
+        types.SimpleNamespace(get_embedding_model=lambda: _FailingModel())
+    )
+    monkeypatch.setattr(qdrant_client_wrapper, "get_qdrant_client", lambda tenant=None: qdrant)
+    monkeypatch.setattr(bulk_ingest, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(bulk_ingest, "_extract_and_chunk", _fake_extract)
+    monkeypatch.setattr(bulk_ingest, "_file_key", lambda path: {"path": str(path), "size": 1, "mtime_ns": 1})
+    
+    paths = [tmp_path / f"doc{i}.pdf" for i in range(60)]
+    manifest = bulk_ingest.Manifest(str(tmp_path / "manifest.jsonl"))
+    result = {}
+    
+    def target():
+        result["stats"] = bulk_ingest.run(
+            paths,
+            manifest,
+            workers=1,
+            embed_batch=5,
+            upsert_workers=1,
+            upsert_batch=16,
+            queue_size=2
+        )
+    
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), "임베딩 실패 후 파이프라인이 멈춤"
+    
+    stats = result["stats"]
+    assert stats.failed == len(paths)
+    assert stats.files == 0
+    assert qdrant.added == 0
+    
+    with open(tmp_path / "manifest.jsonl", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert {entry["path"] for entry in entries} == {str(p) for p in paths}
+    assert all(entry["status"] == "failed" for entry in entries)
+
+
+def test_embed_vectors_reach_upsert(tmp_path, monkeypatch):
+    class _Model(_FailingModel):
+        def embed(self, texts):
+            return np.zeros((len(texts), self.dimension), dtype=np.float32)
+    
+    qdrant = _FakeQdrant()
+    monkeypatch.setitem(sys.modules, "embedding_model", types.SimpleNamespace(get_embedding_model=lambda: _Model()))
+    monkeypatch.setattr(qdrant_client_wrapper, "get_qdrant_client", lambda tenant=None: qdrant)
+    monkeypatch.setattr(bulk_ingest, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(bulk_ingest, "_extract_and_chunk", _fake_extract)
+    monkeypatch.setattr(bulk_ingest, "_file_key", lambda path: {"path": str(path), "size": 1, "mtime_ns": 1})
+    
+    paths = [tmp_path / f"doc{i}.pdf" for i in range(10)]
+    manifest = bulk_ingest.Manifest(str(tmp_path / "manifest.jsonl"))
+    stats = bulk_ingest.run(paths, manifest, workers=1, embed_batch=5, upsert_workers=2, upsert_batch=16, queue_size=2)
+    
+    assert stats.files == len(paths)
+    assert qdrant.added == 3 * len(paths)
+    assert len(manifest.done) == len(paths)
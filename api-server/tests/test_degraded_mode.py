@@ -0,0 +1,31 @@
+"""추출형 답변 테스트"""
+
+from degraded_mode import extractive_answer
+
+
+def _result(text, filename="guide.pdf", page=1):
+    return {"text": text, "metadata": {"filename": filename, "page_start": page}}
+
+
+def test_extractive_answer_skips_repeated_sentences():
+    sentence = "Pod는 하나 이상의 컨테이너를 묶은 배포 단위입니다."
+    results = [
+        _result(f"{sentence} Deployment는 Pod 복제본을 관리합니다."),
+        _result(f"앞 청크와 겹치는 부분. {sentence}", page=2),
+        _result(f"  pod는   하나 이상의 컨테이너를 묶은 배포 단위입니다.  ", filename="copy.pdf"),
+    ]
+    
+    answer = extractive_answer("Pod는 무엇인가요?", results, max_sentences=3, notice="NOTICE")
+    lines = [line for line in answer.splitlines() if line.startswith("- ")]
+    
+    normalized = [" ".join(line.split("(")[0].replace("**", "").split()).casefold() for line in lines]
+    assert len(normalized) == len(set(normalized))
+    assert sum("컨테이너를 묶은" in line for line in lines) == 1
+    # 중복을 건너뛴 만큼 다른 문장이 채워짐
+    assert any("Deployment" in line for line in lines)
+
+
+def test_extractive_answer_without_matches_returns_first_sentence():
+    answer = extractive_answer("zzz", [_result("첫 문장입니다. 둘째 문장입니다.")], notice="NOTICE")
+    assert answer.splitlines()[0] == "NOTICE"
+    assert answer.splitlines()[-1].startswith("- 첫 문장입니다.")
@@ -0,0 +1,55 @@
+"""문서 인덱스 적재 테스트"""
+
+import threading
+import time
+
+import numpy as np
+
+from hot_document_index import HotDocumentIndex, _DocEntry
+
+
+def _entry(n=4, dim=8):
+    vectors = np.ones((n, dim), dtype=np.float32) / np.sqrt(dim)
+    return _DocEntry([str(i) for i in range(n)], vectors, ["x"] * n, [{} for _ in range(n)])
+
+
+def test_concurrent_misses_load_document_once(monkeypatch):
+    index = HotDocumentIndex(max_bytes=1 << 20, ttl=60)
+    calls = []
+    
+    def slow_load(tenant, doc_id):
+        calls.append(doc_id)
+        time.sleep(0.2)
+        return _entry()
+    
+    monkeypatch.setattr(index, "_load", slow_load)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(index._get("default", "doc")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert calls == ["doc"]
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert index.misses == 1 and index.hits == 7
+    assert not index._loading
+
+
+def test_entry_larger_than_max_bytes_is_not_cached(monkeypatch):
+    small = _entry(n=2)
+    index = HotDocumentIndex(max_bytes=small.nbytes * 3, ttl=60)
+    big = _entry(n=32)
+    loads = {"small": small, "big": big}
+    monkeypatch.setattr(index, "_load", lambda tenant, doc_id: loads[doc_id])
+    
+    assert index._get("default", "small") is small
+    assert index._get("default", "big") is None
+    assert index.total_bytes == small.nbytes <= index.max_bytes
+    assert list(index._docs) == [("default", "small")]
+    # 큰 문서 판정은 TTL 동안 유지되어 다시 적재하지 않음
+    monkeypatch.setattr(index, "_load", lambda tenant, doc_id: 1 / 0)
+    assert index._get("default", "big") is None
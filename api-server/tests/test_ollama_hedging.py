@@ -0,0 +1,73 @@
+"""Ollama 헤지 요청 테스트"""
+
+import asyncio
+
+from admission_control import AdmissionController
+from ollama_balancer import EndpointPool
+from ollama_client import OllamaClient
+
+SLOW = "http://slow:11434"
+FAST = "http://fast:11434"
+
+
+def _client(max_concurrency: int):
+    client = OllamaClient(
+        admission=AdmissionController(max_concurrency=max_concurrency, max_queue=4, queue_timeout=5),
+        pool=EndpointPool(endpoints=[SLOW, FAST])
+    )
+    client.hedge_enabled = True
+    client.hedge_default_delay = 0.05
+    return client
+
+
+def _fake_stream(client, slow_seconds: float, started, cancelled, in_flight):
+    async def stream(endpoint, payload, first_token):
+        started.append(endpoint.base_url)
+        try:
+            if endpoint.base_url == SLOW:
+                await asyncio.sleep(slow_seconds)
+            in_flight.append(client.admission.in_flight)
+            first_token.set()
+            return endpoint.base_url
+        except asyncio.CancelledError:
+            cancelled.append(endpoint.base_url)
+            raise
+    return stream
+
+
+def test_hedge_uses_extra_slot_and_cancels_loser():
+    async def scenario():
+        client = _client(max_concurrency=2)
+        started, cancelled, in_flight = [], [], []
+        client._stream_generate = _fake_stream(client, 10, started, cancelled, in_flight)
+        
+        result = await client.generate("질문")
+        for _ in range(3):
+            await asyncio.sleep(0)
+        
+        assert result == FAST
+        assert started == [SLOW, FAST]
+        # 헤지 요청이 입장 슬롯을 하나 더 사용
+        assert in_flight == [2]
+        assert cancelled == [SLOW]
+        assert client.admission.in_flight == 0
+        assert client.admission.semaphore._value == 2
+    
+    asyncio.run(scenario())
+
+
+def test_hedge_skipped_without_spare_slot():
+    async def scenario():
+        client = _client(max_concurrency=1)
+        started, cancelled, in_flight = [], [], []
+        client._stream_generate = _fake_stream(client, 0.2, started, cancelled, in_flight)
+        
+        result = await client.generate("질문")
+        
+        assert result == SLOW
+        assert started == [SLOW]
+        assert in_flight == [1]
+        assert client.admission.in_flight == 0
+        assert client.admission.semaphore._value == 1
+    
+    asyncio.run(scenario())
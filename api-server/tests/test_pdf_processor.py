@@ -0,0 +1,72 @@
+"""토큰 기준 청킹 테스트 (오버랩, 문자 오프셋)"""
+
+import re
+
+import pytest
+
+from pdf_processor import iter_token_chunks
+
+
+class _WordTokenizer:
+    """공백 단위 토크나이저 (오프셋 매핑만 제공)"""
+    
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=True):
+        return {"offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]}
+
+
+def _document(pages):
+    # extract_text_from_pdf와 같은 방식으로 페이지를 이어 붙임
+    return "".join(page + "\n" for page in pages if page)
+
+
+def _token_positions(text, chunk):
+    return {
+        m.start() for m in re.finditer(r"\S+", text)
+        if chunk["char_start"] <= m.start() and m.end() <= chunk["char_end"]
+    }
+
+
+PAGES = [
+    "Kubernetes schedules pods onto nodes based on resource requests and constraints. "
+    "A deployment keeps the desired number of replicas running at all times. Short one.",
+    "",
+    "Services give pods a stable virtual address and load balance traffic between them "
+    "even while individual pods are replaced during rolling updates of the deployment. End.",
+]
+
+
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(8, 3), (12, 4), (20, 16), (6, 0)])
+def test_consecutive_chunks_share_overlap_tokens(max_tokens, overlap_tokens):
+    text = _document(PAGES)
+    chunks = list(iter_token_chunks(PAGES, _WordTokenizer(), max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+    assert len(chunks) > 2
+    
+    overlap = min(overlap_tokens, max_tokens - 1)
+    for prev, current in zip(chunks, chunks[1:]):
+        shared = _token_positions(text, prev) & _token_positions(text, current)
+        assert len(shared) == min(overlap, prev["token_count"])
+        assert current["char_start"] >= prev["char_start"]
+
+
+def test_long_sentence_windows_overlap():
+    page = " ".join(f"word{i}" for i in range(50))
+    chunks = list(iter_token_chunks([page], _WordTokenizer(), max_tokens=10, overlap_tokens=4))
+    
+    words = [chunk["text"].split() for chunk in chunks]
+    for prev, current in zip(words, words[1:]):
+        assert current[:4] == prev[-4:]
+    assert all(chunk["token_count"] <= 10 for chunk in chunks)
+    # 모든 단어가 어느 청크에든 포함
+    assert {w for chunk in words for w in chunk} == set(page.split())
+
+
+def test_offsets_match_text():
+    text = _document(PAGES)
+    for max_tokens, overlap_tokens in [(5, 2), (9, 3), (126, 16)]:
+        chunks = list(iter_token_chunks(PAGES, _WordTokenizer(), max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+        for chunk in chunks:
+            assert text[chunk["char_start"]:chunk["char_end"]] == chunk["text"]
+            assert chunk["token_count"] == len(chunk["text"].split())
+            assert chunk["page_start"] <= chunk["page_end"]
+        assert chunks[0]["char_start"] == 0
+        assert chunks[-1]["char_end"] == len(text.rstrip("\n"))
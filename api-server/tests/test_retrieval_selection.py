@@ -0,0 +1,77 @@
+"""검색 결과 청크 선택 테스트"""
+
+import numpy as np
+
+from rag_pipeline import mmr_select, select_hits
+
+
+def _hits(*scores):
+    return [{"id": str(i), "score": score} for i, score in enumerate(scores)]
+
+
+def test_select_hits_applies_max_k_min_score_and_gap():
+    hits = _hits(0.9, 0.8, 0.6, 0.5)
+    
+    assert [h["id"] for h in select_hits(hits, max_k=3, min_score=0.0, score_gap=0.0)] == ["0", "1", "2"]
+    assert [h["id"] for h in select_hits(hits, max_k=4, min_score=0.55, score_gap=0.0)] == ["0", "1", "2"]
+    # 0.9 * (1 - 0.2) = 0.72 미만 제외
+    assert [h["id"] for h in select_hits(hits, max_k=4, min_score=0.0, score_gap=0.2)] == ["0", "1"]
+
+
+def test_select_hits_edge_cases():
+    assert select_hits([], max_k=3, min_score=0.3, score_gap=0.2) == []
+    assert select_hits(_hits(0.9), max_k=0, min_score=0.0, score_gap=0.0) == []
+    # 모두 기준 미달이면 빈 리스트 (LLM 호출 생략)
+    assert select_hits(_hits(0.2, 0.1), max_k=3, min_score=0.3, score_gap=0.2) == []
+    # 경계값은 포함
+    assert [h["id"] for h in select_hits(_hits(0.3, 0.24), max_k=3, min_score=0.3, score_gap=0.0)] == ["0"]
+    # 최고 점수와 같은 결과는 score_gap과 무관하게 유지
+    assert len(select_hits(_hits(0.5, 0.5, 0.5), max_k=5, min_score=0.0, score_gap=0.5)) == 3
+
+
+def test_select_hits_keeps_top_hit_with_negative_scores():
+    hits = _hits(-0.2, -0.25, -0.5)
+    
+    selected = select_hits(hits, max_k=3, min_score=-1.0, score_gap=0.5)
+    
+    # 하한 = -0.2 - 0.2 * 0.5 = -0.3
+    assert [h["id"] for h in selected] == ["0", "1"]
+
+
+def _vector_hits(*items):
+    return [
+        {"id": str(i), "score": score, "vector": np.asarray(vector, dtype=np.float32)}
+        for i, (score, vector) in enumerate(items)
+    ]
+
+
+def test_mmr_select_skips_near_duplicates():
+    hits = _vector_hits(
+        (0.90, [1.0, 0.0]),
+        (0.89, [1.0, 0.01]),     # 첫 청크와 거의 같은 내용
+        (0.70, [0.0, 1.0]),
+    )
+    
+    assert [h["id"] for h in mmr_select(hits, k=2, lambda_mult=0.5)] == ["0", "2"]
+    # lambda_mult=1이면 점수 순서 그대로
+    assert [h["id"] for h in mmr_select(hits, k=2, lambda_mult=1.0)] == ["0", "1"]
+
+
+def test_mmr_select_edge_cases():
+    hits = _vector_hits((0.9, [1.0, 0.0]), (0.8, [0.0, 1.0]))
+    
+    assert mmr_select([], k=3, lambda_mult=0.5) == []
+    assert mmr_select(hits, k=0, lambda_mult=0.5) == []
+    assert mmr_select(hits[:1], k=3, lambda_mult=0.5) == hits[:1]
+    # k가 후보 수보다 커도 각 후보는 한 번만 선택
+    assert [h["id"] for h in mmr_select(hits, k=5, lambda_mult=0.5)] == ["0", "1"]
+
+
+def test_mmr_select_handles_zero_vectors_without_mutating_hits():
+    hits = _vector_hits((0.9, [3.0, 4.0]), (0.8, [0.0, 0.0]), (0.7, [4.0, 3.0]))
+    
+    selected = mmr_select(hits, k=3, lambda_mult=0.5)
+    
+    assert sorted(h["id"] for h in selected) == ["0", "1", "2"]
+    assert selected[0]["id"] == "0"
+    np.testing.assert_array_equal(hits[0]["vector"], [3.0, 4.0])
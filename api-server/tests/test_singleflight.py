@@ -0,0 +1,97 @@
+"""동일 질의 병합 테스트"""
+
+import asyncio
+
+from singleflight import SingleFlight, make_query_key
+from tracing import record, start_trace
+
+
+def test_follower_server_timing_includes_leader_stages():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        
+        async def work():
+            record("llm_generate", 120.0)
+            await release.wait()
+            return "answer"
+        
+        async def request():
+            trace = start_trace()
+            result = await flight.do("key", work)
+            return result, trace.server_timing()
+        
+        leader = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        release.set()
+        
+        (leader_result, leader_timing), (follower_result, follower_timing) = await asyncio.gather(leader, follower)
+        assert leader_result == follower_result == "answer"
+        assert "llm_generate;dur=120.0" in leader_timing
+        assert "singleflight" not in leader_timing
+        assert "llm_generate;dur=120.0" in follower_timing
+        assert 'singleflight;dur=' in follower_timing and 'desc="follower"' in follower_timing
+    
+    asyncio.run(scenario())
+
+
+def _run_concurrently(flight, keys):
+    calls = []
+    
+    async def scenario():
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.02)
+            return len(calls)
+        
+        return await asyncio.gather(*(flight.do(key, lambda key=key: work(key)) for key in keys))
+    
+    return asyncio.run(scenario()), calls
+
+
+def test_identical_normalized_queries_coalesce():
+    flight = SingleFlight()
+    keys = [
+        make_query_key("Pod이란?", tenant="default", top_k=3),
+        make_query_key("  pod이란?  ", tenant="default", top_k=3),
+        make_query_key("ＰＯＤ이란?", top_k=3, tenant="default"),
+    ]
+    
+    results, calls = _run_concurrently(flight, keys)
+    
+    assert len(calls) == 1
+    assert results == [1, 1, 1]
+    assert flight.stats() == {"inflight": 0, "leaders_total": 1, "coalesced_total": 2}
+
+
+def test_different_params_do_not_coalesce():
+    flight = SingleFlight()
+    keys = [
+        make_query_key("Pod이란?", tenant="default", top_k=3),
+        make_query_key("Pod이란?", tenant="default", top_k=5),
+        make_query_key("Pod이란?", tenant="team-a", top_k=3),
+        make_query_key("Pod이란?", "doc-1", tenant="default", top_k=3),
+    ]
+    
+    _, calls = _run_concurrently(flight, keys)
+    
+    assert len(calls) == 4
+    assert flight.stats()["leaders_total"] == 4 and flight.stats()["coalesced_total"] == 0
+
+
+def test_leader_error_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+        
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.stats()["leaders_total"] == 1
+        assert flight.stats()["inflight"] == 0
+    
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+"""테넌트 허용 목록 / 클라이언트 캐시 테스트"""
+
+import pytest
+
+import qdrant_client_wrapper
+import tenancy
+from tenancy import DEFAULT_TENANT, InvalidTenantError, UnknownTenantError, resolve_tenant
+
+
+@pytest.fixture
+def allowed(monkeypatch):
+    monkeypatch.setattr(tenancy, "ALLOW_ANY_TENANT", False)
+    monkeypatch.setattr(tenancy, "ALLOWED_TENANTS", {DEFAULT_TENANT, "team-a", "team-b", "team-c"})
+
+
+def test_resolve_tenant_rejects_unlisted_tenant(allowed):
+    assert resolve_tenant(None) == DEFAULT_TENANT
+    assert resolve_tenant(" team-a ") == "team-a"
+    with pytest.raises(UnknownTenantError):
+        resolve_tenant("team-z")
+    with pytest.raises(InvalidTenantError):
+        resolve_tenant("../etc")
+
+
+def test_resolve_tenant_allows_any_well_formed_id_with_wildcard(monkeypatch):
+    monkeypatch.setattr(tenancy, "ALLOW_ANY_TENANT", True)
+    assert resolve_tenant("team-z") == "team-z"
+
+
+def test_client_cache_is_bounded_and_forgets_dropped_tenants(allowed, monkeypatch):
+    monkeypatch.setattr(qdrant_client_wrapper, "QDRANT_MODE", "memory")
+    monkeypatch.setattr(qdrant_client_wrapper, "QDRANT_CLIENT_CACHE_SIZE", 2)
+    monkeypatch.setattr(qdrant_client_wrapper, "_qdrant_clients", type(qdrant_client_wrapper._qdrant_clients)())
+    monkeypatch.setattr(qdrant_client_wrapper, "_shared_client", None)
+    get = qdrant_client_wrapper.get_qdrant_client
+    
+    a = get("team-a")
+    b = get("team-b")
+    assert get("team-a") is a      # team-a가 최근 사용으로 이동
+    get("team-c")
+    assert list(qdrant_client_wrapper._qdrant_clients) == ["team-a", "team-c"]
+    assert b.client is a.client    # 연결은 공유
+    
+    a.drop_tenant()
+    assert "team-a" not in qdrant_client_wrapper._qdrant_clients
+    assert get("team-a") is not a
@@ -0,0 +1,59 @@
+"""문서 증분 갱신 테스트"""
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from qdrant_client_wrapper import QdrantWrapper
+
+
+def _embed(texts):
+    return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def _wrapper():
+    wrapper = QdrantWrapper(
+        collection_name="test_update", client=QdrantClient(":memory:"),
+        mode="memory", use_shard_key=False
+    )
+    wrapper.ensure_collection(4)
+    return wrapper
+
+
+def test_update_document_drops_removed_metadata_keys():
+    wrapper = _wrapper()
+    texts = ["첫 청크", "둘째 청크"]
+    wrapper.add_documents(
+        texts, _embed(texts),
+        metadata=[{"filename": "a.pdf", "page_start": 1}, {"filename": "a.pdf", "page_start": 2}],
+        doc_id="doc"
+    )
+    
+    stats = wrapper.update_document(
+        "doc", texts, _embed, metadata=[{"filename": "a.pdf"}, {"filename": "a.pdf"}]
+    )
+    
+    assert stats == {"added": 0, "removed": 0, "unchanged": 2}
+    points = list(wrapper.iter_document_points("doc", with_payload=True))
+    for point in points:
+        assert "page_start" not in point.payload
+        assert point.payload["text"] in texts
+        assert point.payload["doc_id"] == "doc"
+        assert point.payload["chunk_hash"]
+
+
+def test_update_document_reembeds_only_changed_chunks():
+    wrapper = _wrapper()
+    texts = ["A", "B", "C"]
+    wrapper.add_documents(texts, _embed(texts), doc_id="doc")
+    embedded = []
+    
+    def embed(batch):
+        embedded.extend(batch)
+        return _embed(batch)
+    
+    stats = wrapper.update_document("doc", ["A", "B2", "C", "D"], embed)
+    
+    assert embedded == ["B2", "D"]
+    assert stats == {"added": 2, "removed": 1, "unchanged": 2}
+    payloads = {p.payload["text"]: p.payload for p in wrapper.iter_document_points("doc", with_payload=True)}
+    assert {text: payload["chunk_index"] for text, payload in payloads.items()} == {"A": 0, "B2": 1, "C": 2, "D": 3}
@@ -0,0 +1,184 @@
+"""
+요청 단위 구간 시간 측정 (Tracing) 모듈
+- contextvars로 요청별 Trace를 전달 (asyncio 태스크/to_thread에도 전파)
+- 구간별 소요 시간을 Server-Timing 응답 헤더로 반환
+- OTEL_EXPORTER_OTLP_ENDPOINT가 설정되고 opentelemetry가 설치되어 있으면 OTLP로 span 내보내기
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+
+# OpenTelemetry 내보내기 설정 (비어 있으면 사용 안 함)
+OTEL_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "rag-api-server")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("rag_trace", default=None)
+
+_tracer = None
+_tracer_initialized = False
+
+
+def _get_tracer():
+    """OpenTelemetry tracer (설정/설치되지 않았으면 None)"""
+    global _tracer, _tracer_initialized
+    if _tracer_initialized:
+        return _tracer
+    _tracer_initialized = True
+    if not OTEL_ENDPOINT:
+        return None
+    
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        print("OpenTelemetry 패키지가 없어 span 내보내기를 사용하지 않습니다.")
+        return None
+    
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provider.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{OTEL_ENDPOINT.rstrip('/')}/v1/traces"))
+    )
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("k8s-rag")
+    print(f"OpenTelemetry span 내보내기: {OTEL_ENDPOINT}")
+    return _tracer
+
+
+class Trace:
+    """요청 하나의 구간 기록"""
+    
+    def __init__(self):
+        self.started = time.monotonic()
+        self.spans: List[Tuple[str, float]] = []    # (이름, 소요 ms)
+        self.descriptions: Dict[str, str] = {}      # 이름 → Server-Timing desc
+        self._lock = threading.Lock()
+    
+    def add(self, name: str, duration_ms: float, desc: Optional[str] = None):
+        with self._lock:
+            self.spans.append((name, duration_ms))
+            if desc:
+                self.descriptions[name] = desc
+    
+    def extend(self, other: "Trace"):
+        """다른 Trace의 구간 기록 복사 (병합된 요청이 공유 작업의 구간을 함께 보고할 때)"""
+        with other._lock:
+            spans = list(other.spans)
+            descriptions = dict(other.descriptions)
+        with self._lock:
+            self.spans.extend(spans)
+            self.descriptions.update(descriptions)
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """구간 이름별 합계/횟수"""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for name, duration in self.spans:
+                entry = totals.setdefault(name, {"dur": 0.0, "count": 0})
+                entry["dur"] += duration
+                entry["count"] += 1
+        return totals
+    
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (같은 이름은 합산, desc는 지정값 또는 여러 번일 때 횟수)"""
+        parts = []
+        for name, entry in self.summary().items():
+            token = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+            part = f"{token};dur={entry['dur']:.1f}"
+            desc = self.descriptions.get(name)
+            if desc is None and entry["count"] > 1:
+                desc = f"x{entry['count']}"
+            if desc:
+                part += f';desc="{desc}"'
+            parts.append(part)
+        total = (time.monotonic() - self.started) * 1000
+        parts.append(f"total;dur={total:.1f}")
+        return ", ".join(parts)
+
+
+def start_trace() -> Optional[Trace]:
+    """현재 컨텍스트에 새 Trace 시작"""
+    if not TRACING_ENABLED:
+        return None
+    current = Trace()
+    _current_trace.set(current)
+    return current
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_request(name: str, **attributes: Any):
+    """요청 하나의 Trace 시작 (OpenTelemetry 사용 시 루트 span 포함)"""
+    current = start_trace()
+    tracer = _get_tracer()
+    if tracer is None:
+        yield current
+        return
+    with tracer.start_as_current_span(name, attributes=attributes or None):
+        yield current
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    구간 시간 측정
+    
+    Args:
+        name: 구간 이름 (Server-Timing 항목 이름)
+        attributes: OpenTelemetry span 속성
+    """
+    current = _current_trace.get()
+    tracer = _get_tracer()
+    if current is None and tracer is None:
+        yield
+        return
+    
+    started = time.monotonic()
+    if tracer is not None:
+        with tracer.start_as_current_span(name, attributes=attributes or None):
+            try:
+                yield
+            finally:
+                if current is not None:
+                    current.add(name, (time.monotonic() - started) * 1000)
+    else:
+        try:
+            yield
+        finally:
+            current.add(name, (time.monotonic() - started) * 1000)
+
+
+def record(name: str, duration_ms: float, end_time: Optional[float] = None, **attributes: Any):
+    """
+    외부에서 측정된 구간 기록 (예: Ollama가 보고한 prefill/decode 시간)
+    
+    Args:
+        name: 구간 이름
+        duration_ms: 소요 시간 (ms)
+        end_time: 구간 종료 시각 (epoch 초, 기본: 현재)
+        attributes: OpenTelemetry span 속성
+    """
+    current = _current_trace.get()
+    if current is not None:
+        current.add(name, duration_ms)
+    
+    tracer = _get_tracer()
+    if tracer is not None:
+        end_ns = int((end_time or time.time()) * 1e9)
+        otel_span = tracer.start_span(
+            name, start_time=end_ns - int(duration_ms * 1e6), attributes=attributes or None
+        )
+        otel_span.end(end_time=end_ns)
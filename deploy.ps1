@@ -29,6 +29,8 @@ kubectl wait --for=condition=ready pod -l app=ollama -n rag-system --timeout=600
 
 # API Server 배포
 Write-Host "`n[5/5] API Server 배포..." -ForegroundColor Yellow
+# 독립 임베딩 서비스 (기본 replicas 0, EMBEDDING_SERVICE_URL 설정 시 사용)
+kubectl apply -f k8s/embedding-deployment.yaml
 kubectl apply -f k8s/api-server-deployment.yaml
 
 # API Server 준비 대기